@@ -0,0 +1,3 @@
+"""
+Lunar Brightness Adjuster のベンチマークパッケージ
+"""
@@ -0,0 +1,71 @@
+"""
+ディスプレイ制御バックエンドの書き込みレイテンシを比較するベンチマーク
+
+使い方:
+    python -m benchmarks.bench_controller [--writes N] [--command PATH]
+"""
+import argparse
+import logging
+import os
+import statistics
+import time
+from src.logger import logger
+from src.lunar import LunarController, PersistentLunarController
+
+# テスト用のLunar CLIの代替スクリプト
+FAKE_LUNAR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests', 'fake_lunar'
+)
+
+
+def measure_write_latency(controller, writes: int) -> list:
+    """
+    輝度の書き込みを繰り返し、1回あたりのレイテンシ（秒）を返す
+
+    Args:
+        controller: 計測するコントローラー
+        writes (int): 書き込み回数
+
+    Returns:
+        list: 各書き込みのレイテンシ（秒）
+    """
+    latencies = []
+    for i in range(writes):
+        start = time.perf_counter()
+        if not controller.set_brightness(i % 101):
+            raise RuntimeError("輝度の書き込みに失敗しました")
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ディスプレイ制御バックエンドの書き込みレイテンシを比較します。")
+    parser.add_argument("--writes", type=int, default=200, help="書き込み回数（デフォルト: 200）")
+    parser.add_argument("--command", default=FAKE_LUNAR, help="lunar コマンドのパス（デフォルト: 代替スクリプト）")
+    args = parser.parse_args()
+
+    # 書き込みごとのログ出力を計測に含めない
+    logger.setLevel(logging.WARNING)
+
+    controllers = {
+        'cli': LunarController(args.command),
+        'persistent': PersistentLunarController(args.command),
+    }
+
+    for name, controller in controllers.items():
+        try:
+            # 初回はヘルパーの起動を含むため計測から除外する
+            controller.set_brightness(50)
+            latencies = measure_write_latency(controller, args.writes)
+        finally:
+            controller.close()
+
+        print(
+            f"{name:>10}: 平均 {statistics.mean(latencies) * 1e3:7.3f} ms, "
+            f"中央値 {statistics.median(latencies) * 1e3:7.3f} ms, "
+            f"最大 {max(latencies) * 1e3:7.3f} ms ({args.writes}回)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+DEBUGログを有効にした状態で、測定ループの1フレームあたりの処理時間を比較するベンチマーク
+
+使い方:
+    python -m benchmarks.bench_logging [--frames N] [--resolution vga]
+
+以前の方式（フレームごとのf-stringのログを、測定スレッドでファイルとコンソールに書き込む）と、
+現在の方式（測定の終了時にまとめて記録し、書き込みはバックグラウンドのスレッドで行う）を比較する。
+"""
+import argparse
+import contextlib
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Iterator
+from unittest.mock import patch
+from src import logger as logger_module
+from src.camera import AmbientLightSensor
+from src.logger import logger, setup_logger, shutdown_logger
+from .fakes import RESOLUTIONS, VARYING_LEVELS, make_frames, synthetic_camera
+
+
+class PerFrameLoggingSensor(AmbientLightSensor):
+    """以前の方式と同じく、フレームごとに輝度をf-stringでログに出力するセンサー"""
+
+    def get_frame_brightness(self, frame):
+        brightness = super().get_frame_brightness(frame)
+        logger.debug(f"フレーム輝度: {brightness:.2f}")
+        return brightness
+
+
+# 比較する方式: (フレームごとにログを出力するか, ログのレベル, キューを使うか)
+MODES = {
+    'no-debug': (False, 'INFO', False),
+    'before (per-frame, sync)': (True, 'DEBUG', False),
+    'per-frame, queue': (True, 'DEBUG', True),
+    'after (summary, queue)': (False, 'DEBUG', True),
+}
+
+
+@contextlib.contextmanager
+def configured_logger(level: str, use_queue: bool) -> Iterator[None]:
+    """
+    ログの出力先を一時ディレクトリと /dev/null にしてロガーを設定し直す
+
+    Args:
+        level (str): ログのレベル
+        use_queue (bool): キューを使うかどうか
+    """
+    with tempfile.TemporaryDirectory() as temp_dir, open(os.devnull, 'w') as devnull, \
+            patch.object(logger_module, 'LOG_DIR', temp_dir), \
+            patch.object(logger_module, 'LOG_FILE', os.path.join(temp_dir, 'bench.log')), \
+            patch.object(sys, 'stdout', devnull):
+        logger.handlers = []
+        setup_logger(level=level, use_queue=use_queue)
+        try:
+            yield
+        finally:
+            # キューに残ったログの書き込みも計測後に済ませる
+            shutdown_logger()
+            for handler in logger.handlers:
+                handler.close()
+            logger.handlers = []
+
+
+def measure_per_frame(per_frame_logging: bool, frames: int, images) -> float:
+    """
+    測定ループを実行し、1フレームあたりの処理時間（秒）を返す
+
+    Args:
+        per_frame_logging (bool): フレームごとにログを出力するかどうか
+        frames (int): 測定するフレーム数の目安
+        images: 疑似カメラが返すフレーム
+
+    Returns:
+        float: 1フレームあたりの処理時間（秒）
+    """
+    sensor_class = PerFrameLoggingSensor if per_frame_logging else AmbientLightSensor
+    sensor = sensor_class(max_drain_frames=0, warmup_timeout=0)
+    with synthetic_camera(images, realtime=False) as opened:
+        sensor.open()
+        try:
+            # 1回目の実行で処理時間を見積もり、frames 枚程度になる測定時間を決める
+            start = time.perf_counter()
+            sensor.measure_ambient_light(duration=0.05, sample_interval=0)
+            first_frames = opened[0].retrieve_count
+            duration = (time.perf_counter() - start) / max(1, first_frames) * frames
+
+            before = opened[0].retrieve_count
+            start = time.perf_counter()
+            sensor.measure_ambient_light(duration=duration, sample_interval=0)
+            elapsed = time.perf_counter() - start
+            return elapsed / (opened[0].retrieve_count - before)
+        finally:
+            sensor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DEBUGログ有効時の測定ループの処理時間を比較します。")
+    parser.add_argument("--frames", type=int, default=2000, help="1回の測定のフレーム数（デフォルト: 2000）")
+    parser.add_argument("--repeat", type=int, default=5, help="繰り返し回数（デフォルト: 5）")
+    parser.add_argument("--resolution", default='vga', choices=RESOLUTIONS,
+                        help="合成フレームの解像度（デフォルト: vga）")
+    args = parser.parse_args()
+
+    images = make_frames(*RESOLUTIONS[args.resolution], levels=VARYING_LEVELS)
+    results = {}
+    for name, (per_frame_logging, level, use_queue) in MODES.items():
+        samples = []
+        for _ in range(args.repeat):
+            with configured_logger(level, use_queue):
+                samples.append(measure_per_frame(per_frame_logging, args.frames, images))
+        results[name] = statistics.median(samples)
+
+    baseline = results['no-debug']
+    for name, per_frame in results.items():
+        print(
+            f"{name:<26} 1フレームあたり {per_frame * 1e6:8.1f} µs "
+            f"（ログによる増加: {(per_frame - baseline) * 1e6:+7.1f} µs）"
+        )
+
+
+if __name__ == "__main__":
+    main()
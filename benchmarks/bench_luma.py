@@ -0,0 +1,94 @@
+"""
+YUYV形式のフレームから輝度を求める際の、1フレームあたりのCPU時間を比較するベンチマーク
+
+使い方:
+    python -m benchmarks.bench_luma [--frames N] [--resolutions vga,hd,fhd]
+
+カメラがYUYVで送るフレームを合成し、以前の方式（OpenCVがBGRに変換したフレームを
+グレースケールにして平均する）と、raw_luma の方式（変換せずにYの値を直接平均する）を比較する。
+"""
+import argparse
+import time
+from typing import Callable, Dict, List
+import cv2
+import numpy as np
+from src.camera import AmbientLightSensor
+from .fakes import RESOLUTIONS, VARYING_LEVELS
+
+
+def make_yuyv_frames(width: int, height: int, levels=VARYING_LEVELS, seed: int = 0) -> List[np.ndarray]:
+    """
+    合成したYUYVのフレーム（高さ, 幅, 2）を作成する
+
+    Args:
+        width (int): フレームの幅
+        height (int): フレームの高さ
+        levels: フレームごとのYの基準値（この数だけ作成する）
+        seed (int): ノイズの乱数シード
+
+    Returns:
+        List[np.ndarray]: 作成したフレーム
+    """
+    rng = np.random.default_rng(seed)
+    frames = []
+    for base in levels:
+        frame = np.empty((height, width, 2), dtype=np.uint8)
+        frame[:, :, 0] = np.clip(base + rng.integers(0, 32, size=(height, width)), 16, 235)
+        frame[:, :, 1] = rng.integers(112, 144, size=(height, width))
+        frames.append(frame)
+    return frames
+
+
+def cpu_time_per_frame(measure: Callable[[np.ndarray], float], frames: List[np.ndarray],
+                       count: int) -> float:
+    """
+    count 枚のフレームを処理したCPU時間から、1フレームあたりのCPU時間（秒）を求める
+
+    Args:
+        measure (Callable[[np.ndarray], float]): 1フレームの輝度を求める処理
+        frames (List[np.ndarray]): 処理するフレーム（順に繰り返す）
+        count (int): 処理するフレーム数
+
+    Returns:
+        float: 1フレームあたりのCPU時間（秒）
+    """
+    measure(frames[0])
+    start = time.process_time()
+    for index in range(count):
+        measure(frames[index % len(frames)])
+    return (time.process_time() - start) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="YUYVのフレームから輝度を求めるCPU時間を比較します。")
+    parser.add_argument("--frames", type=int, default=500, help="処理するフレーム数（デフォルト: 500）")
+    parser.add_argument("--resolutions", default="vga,hd,fhd",
+                        help="使用する解像度（デフォルト: vga,hd,fhd）")
+    args = parser.parse_args()
+
+    sensor = AmbientLightSensor()
+    luma_sensor = AmbientLightSensor(luma_weighted=True)
+    # BGRの方式は、カメラの読み取り時のYUYV→BGR変換も含めて計測する
+    paths: Dict[str, Callable[[np.ndarray], float]] = {
+        'bgr (convert + gray)': lambda frame: sensor.get_frame_brightness(
+            cv2.cvtColor(frame, cv2.COLOR_YUV2BGR_YUYV)
+        ),
+        'bgr (convert + luma_weighted)': lambda frame: luma_sensor.get_frame_brightness(
+            cv2.cvtColor(frame, cv2.COLOR_YUV2BGR_YUYV)
+        ),
+        'raw_luma (Y plane)': sensor.get_frame_brightness,
+    }
+
+    for resolution in args.resolutions.split(','):
+        frames = make_yuyv_frames(*RESOLUTIONS[resolution])
+        results = {name: cpu_time_per_frame(measure, frames, args.frames) for name, measure in paths.items()}
+        baseline = results['bgr (convert + gray)']
+        for name, per_frame in results.items():
+            print(
+                f"{resolution:<4} {name:<30} 1フレームあたりのCPU時間 {per_frame * 1e6:8.1f} µs "
+                f"（{baseline / per_frame:5.1f}倍）"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+ベンチマーク用の疑似カメラ（合成フレーム）と代替 lunar コマンド
+"""
+import contextlib
+import os
+import tempfile
+import time
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from unittest.mock import patch
+import cv2
+import numpy as np
+from src import camera
+
+# 代替 lunar コマンド（呼び出しの記録と応答の遅延に対応）
+#   FAKE_LUNAR_LOG   呼び出された引数を1行ずつ追記するファイル
+#   FAKE_LUNAR_DELAY 応答までの遅延（秒）
+STUB_LUNAR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests', 'fake_lunar'
+)
+
+# ベンチマークで使う解像度（幅, 高さ）
+RESOLUTIONS: Dict[str, Tuple[int, int]] = {
+    'vga': (640, 480),
+    'hd': (1280, 720),
+    'fhd': (1920, 1080),
+    '4k': (3840, 2160),
+}
+
+
+# 合成フレームの明るさ（フレームごとに変える場合と、一定の場合）
+VARYING_LEVELS = (40, 73, 106, 140)
+STEADY_LEVELS = (100, 100, 100, 100)
+
+
+def make_frames(width: int, height: int, levels: Sequence[int] = VARYING_LEVELS,
+                seed: int = 0) -> List[np.ndarray]:
+    """
+    合成フレーム（BGR）を作成する
+
+    横方向のグラデーションにノイズを加え、フレームごとに全体の明るさを変える。
+
+    Args:
+        width (int): フレームの幅
+        height (int): フレームの高さ
+        levels (Sequence[int]): フレームごとの明るさの基準値（この数だけ作成する）
+        seed (int): ノイズの乱数シード
+
+    Returns:
+        List[np.ndarray]: 作成したフレーム
+    """
+    rng = np.random.default_rng(seed)
+    gradient = np.linspace(0, 96, width, dtype=np.float32)[np.newaxis, :, np.newaxis]
+    frames = []
+    for base in levels:
+        noise = rng.integers(0, 16, size=(height, width, 3), dtype=np.uint8)
+        frame = np.clip(gradient + base, 0, 239).astype(np.uint8)
+        frames.append(np.broadcast_to(frame, (height, width, 3)) + noise)
+    return frames
+
+
+class SyntheticCapture:
+    """
+    cv2.VideoCapture の代わりに合成フレームを返す疑似カメラ
+
+    realtime=True の場合は、grab() が次のフレームの到着時刻まで待つことで
+    実際のカメラのフレームレートを模擬する。解像度・フレームレートの要求
+    （CAP_PROP_FRAME_WIDTH/HEIGHT/FPS）には、縮小したフレームを返すことで応じる。
+    """
+
+    def __init__(self, frames: List[np.ndarray], fps: float = 30.0, realtime: bool = True,
+                 resized: Optional[Dict[Tuple[int, int], List[np.ndarray]]] = None):
+        """
+        SyntheticCaptureを初期化
+
+        Args:
+            frames (List[np.ndarray]): 順番に返すフレーム
+            fps (float): フレームレート
+            realtime (bool): フレームの到着を待つかどうか
+            resized (Dict, optional): 要求された (幅, 高さ) ごとの縮小したフレームのキャッシュ
+                （カメラ側の縮小の処理時間を計測に含めないよう、開き直しても共有する）
+        """
+        self.frames = frames
+        self.fps = fps
+        self.realtime = realtime
+        self.grab_count = 0
+        self.retrieve_count = 0
+        self.released = False
+        self._started = time.monotonic()
+        # 要求された (幅, 高さ) と、その大きさに縮小したフレーム
+        self._size = (frames[0].shape[1], frames[0].shape[0])
+        self._cache = resized if resized is not None else {}
+        self._resized: List[np.ndarray] = frames
+
+    def isOpened(self) -> bool:
+        return not self.released
+
+    def get(self, prop_id: int) -> float:
+        if prop_id == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop_id == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self._size[0])
+        if prop_id == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self._size[1])
+        return 0.0
+
+    def set(self, prop_id: int, value: float) -> bool:
+        if prop_id == cv2.CAP_PROP_FPS:
+            self.fps = float(value)
+            self._started = time.monotonic() - self.grab_count / self.fps
+            return True
+        if prop_id in (cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT):
+            width, height = self._size
+            if prop_id == cv2.CAP_PROP_FRAME_WIDTH:
+                width = int(value)
+            else:
+                height = int(value)
+            self._size = (width, height)
+            self._resized = self._cache.get(self._size)
+            if self._resized is None:
+                self._resized = self._cache[self._size] = [
+                    cv2.resize(frame, self._size, interpolation=cv2.INTER_AREA) for frame in self.frames
+                ]
+            return True
+        # 露出などのプロパティには対応しない（バックエンドが無視する場合と同じ）
+        return False
+
+    def grab(self) -> bool:
+        if self.realtime:
+            next_frame_time = self._started + (self.grab_count + 1) / self.fps
+            delay = next_frame_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        self.grab_count += 1
+        return True
+
+    def retrieve(self) -> Tuple[bool, np.ndarray]:
+        frame = self._resized[self.retrieve_count % len(self._resized)]
+        self.retrieve_count += 1
+        return True, frame
+
+    def read(self) -> Tuple[bool, np.ndarray]:
+        return self.retrieve() if self.grab() else (False, None)
+
+    def release(self):
+        self.released = True
+
+
+@contextlib.contextmanager
+def synthetic_camera(frames: List[np.ndarray], fps: float = 30.0,
+                     realtime: bool = True) -> Iterator[List[SyntheticCapture]]:
+    """
+    AmbientLightSensor が開くカメラを疑似カメラに置き換える
+
+    Args:
+        frames (List[np.ndarray]): 疑似カメラが返すフレーム
+        fps (float): フレームレート
+        realtime (bool): フレームの到着を待つかどうか
+
+    Yields:
+        List[SyntheticCapture]: これまでに開かれた疑似カメラ
+    """
+    opened: List[SyntheticCapture] = []
+    resized: Dict[Tuple[int, int], List[np.ndarray]] = {}
+
+    def open_capture(index):
+        capture = SyntheticCapture(frames, fps=fps, realtime=realtime, resized=resized)
+        opened.append(capture)
+        return capture
+
+    with patch.object(camera.cv2, 'VideoCapture', open_capture):
+        yield opened
+
+
+@contextlib.contextmanager
+def stub_lunar(delay: float = 0.0) -> Iterator[str]:
+    """
+    代替 lunar コマンドの呼び出しを記録するファイルを用意し、応答の遅延を設定する
+
+    Args:
+        delay (float): 応答までの遅延（秒）
+
+    Yields:
+        str: 呼び出しが記録されるファイルのパス
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log_path = os.path.join(temp_dir, 'calls.log')
+        env = {'FAKE_LUNAR_LOG': log_path}
+        if delay > 0:
+            env['FAKE_LUNAR_DELAY'] = f"{delay:g}"
+        with patch.dict(os.environ, env):
+            yield log_path
+
+
+def count_calls(log_path: str) -> int:
+    """代替 lunar コマンドが記録した呼び出しの回数"""
+    if not os.path.exists(log_path):
+        return 0
+    with open(log_path, encoding='utf-8') as f:
+        return sum(1 for _ in f)
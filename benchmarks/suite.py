@@ -0,0 +1,391 @@
+"""
+カメラやLunarを使わずに、輝度計算・調整サイクル・デーモンの定常状態を計測するベンチマーク
+
+使い方:
+    python -m benchmarks.suite [--scenarios frame,source,cycle,daemon] [--resolutions vga,hd,fhd,4k]
+                               [--output results.json] [--compare baseline.json]
+
+結果をJSONで保存し、別のコミットで保存した結果と --compare で比較できる。
+"""
+import argparse
+import datetime
+import itertools
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import cv2
+import numpy as np
+from src.actuator import BrightnessActuator
+from src.brightness_adjuster import BrightnessAdjuster
+from src.camera import AmbientLightSensor
+from src.config import BrightnessConfig
+from src.daemon import BrightnessDaemon
+from src.logger import logger
+from src.lunar import LunarController, create_display_controller
+from src.roi import ROI_PRESETS
+from src.sources import SyntheticSource
+from .fakes import (
+    RESOLUTIONS, STEADY_LEVELS, STUB_LUNAR, VARYING_LEVELS, count_calls, make_frames,
+    stub_lunar, synthetic_camera
+)
+
+SCENARIOS = ('frame', 'source', 'cycle', 'daemon')
+
+# 輝度計算のベンチマークで比較するセンサーの設定
+FRAME_VARIANTS: Dict[str, Dict[str, Any]] = {
+    'default': {},
+    'stride4': {'sample_stride': 4},
+    'thumbnail64': {'thumbnail_size': 64},
+    'luma': {'luma_weighted': True},
+    'luma_stride4': {'luma_weighted': True, 'sample_stride': 4},
+    'roi_top': {'roi': [(0.0, 0.0, 1.0, 0.25)]},
+    'roi_corners': {'roi': list(ROI_PRESETS['corners'])},
+    'center_weight': {'weight_map': 'center'},
+    'roi_top_vignette': {'roi': [(0.0, 0.0, 1.0, 0.25)], 'weight_map': 'vignette'},
+}
+
+# 全画素を使う 'default' より処理が軽くなければならない、画素を減らす設定
+REDUCTION_VARIANTS = ('stride4', 'thumbnail64', 'luma', 'luma_stride4')
+
+# 調整サイクルの計測に使う設定（測定時間は検証で許される最小値）
+CYCLE_CONFIG = dict(capture_duration=0.1, warmup_timeout=1.0)
+
+# 調整サイクルの計測で比較する設定（'' は CYCLE_CONFIG のみ）
+CYCLE_VARIANTS: Dict[str, Dict[str, Any]] = {
+    '': {},
+    'budget': {'cpu_budget_ms': 10.0},
+}
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    """レイテンシ（秒）の一覧を集計する（ミリ秒）"""
+    ordered = sorted(latencies)
+    return {
+        'mean_ms': statistics.mean(ordered) * 1e3,
+        'median_ms': statistics.median(ordered) * 1e3,
+        'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1e3,
+        'max_ms': ordered[-1] * 1e3,
+    }
+
+
+def bench_frame_brightness(resolution: str, frames: int) -> List[Dict[str, Any]]:
+    """
+    get_frame_brightness のスループットをセンサーの設定ごとに計測する
+
+    'default'（全画素）に対する処理時間の比（cost_vs_default）と、輝度の平均誤差
+    （error_vs_default）も記録し、画素を減らす設定の精度と速度を比較できるようにする。
+
+    Args:
+        resolution (str): フレームの解像度
+        frames (int): 計算するフレーム数
+
+    Returns:
+        List[Dict[str, Any]]: 設定ごとの計測結果
+    """
+    images = make_frames(*RESOLUTIONS[resolution], levels=VARYING_LEVELS)
+    reference_sensor = AmbientLightSensor()
+    references = [reference_sensor.get_frame_brightness(image) for image in images]
+    results = []
+
+    for variant, options in FRAME_VARIANTS.items():
+        sensor = AmbientLightSensor(**options)
+        errors = [
+            abs(sensor.get_frame_brightness(image) - reference)
+            for image, reference in zip(images, references)
+        ]
+
+        latencies = []
+        for index in range(frames):
+            start = time.perf_counter()
+            sensor.get_frame_brightness(images[index % len(images)])
+            latencies.append(time.perf_counter() - start)
+
+        results.append({
+            'name': f"frame/{resolution}/{variant}",
+            'variant': variant,
+            'frames': frames,
+            'frames_per_second': len(latencies) / sum(latencies),
+            'error_vs_default': statistics.mean(errors),
+            **summarize(latencies),
+        })
+
+    baseline = next(result['median_ms'] for result in results if result['variant'] == 'default')
+    for result in results:
+        result['cost_vs_default'] = result['median_ms'] / baseline
+    return results
+
+
+def slower_reductions(results: List[Dict[str, Any]]) -> List[str]:
+    """
+    画素を減らす設定のうち、全画素を使う 'default' より処理時間（中央値）が長いものを返す
+
+    Args:
+        results (List[Dict[str, Any]]): 計測結果
+
+    Returns:
+        List[str]: 該当する計測の名前
+    """
+    return [
+        result['name'] for result in results
+        if result.get('variant') in REDUCTION_VARIANTS and result['cost_vs_default'] >= 1.0
+    ]
+
+
+def bench_frame_source(resolution: str, frames: int) -> List[Dict[str, Any]]:
+    """
+    合成フレームの取得元から、待機せずに測定（読み取り→輝度計算→平均）するスループットを計測する
+
+    Args:
+        resolution (str): フレームの解像度
+        frames (int): 1回の測定で読み取るフレーム数
+
+    Returns:
+        List[Dict[str, Any]]: 計測結果
+    """
+    images = make_frames(*RESOLUTIONS[resolution], levels=VARYING_LEVELS)
+    source = SyntheticSource(frames=itertools.cycle(images), count=frames)
+    sensor = AmbientLightSensor(source=source)
+    latencies = []
+
+    for _ in range(5):
+        sensor.close()
+        start = time.perf_counter()
+        # 1フレームごとに測定する（測定時間はフレーム数をフレームレートで割った値）
+        if sensor.measure_ambient_light(duration=frames / source.fps, sample_interval=0) is None:
+            raise RuntimeError("輝度の測定に失敗しました")
+        latencies.append((time.perf_counter() - start) / source.frames_read)
+    sensor.close()
+
+    return [{
+        'name': f"source/{resolution}",
+        'frames': frames,
+        'frames_per_second': 1 / statistics.median(latencies),
+        **summarize(latencies),
+    }]
+
+
+def bench_adjust_cycle(resolution: str, cycles: int, fps: float,
+                       lunar_delay: float) -> List[Dict[str, Any]]:
+    """
+    1回実行（カメラを開く→ウォームアップ→測定→書き込み→閉じる）の adjust() のレイテンシを計測する
+
+    Args:
+        resolution (str): カメラの解像度
+        cycles (int): 実行回数
+        fps (float): カメラのフレームレート
+        lunar_delay (float): 代替 lunar コマンドの応答の遅延（秒）
+
+    Returns:
+        List[Dict[str, Any]]: 計測結果
+    """
+    images = make_frames(*RESOLUTIONS[resolution], levels=STEADY_LEVELS)
+    results = []
+
+    for variant, options in CYCLE_VARIANTS.items():
+        config = BrightnessConfig(**CYCLE_CONFIG, **options).validate()
+        latencies = []
+        cpu_times = []
+
+        with synthetic_camera(images, fps=fps), stub_lunar(lunar_delay) as log_path:
+            # 初回は疑似カメラのフレームの縮小などが入るため、計測に含めない
+            for cycle in range(cycles + 1):
+                # 1回実行と同じく、書き込みの記録を持たない状態から始める
+                adjuster = BrightnessAdjuster(
+                    config,
+                    actuator=BrightnessActuator(LunarController(STUB_LUNAR), hysteresis=0)
+                )
+                start, cpu_start = time.perf_counter(), time.process_time()
+                if not adjuster.adjust():
+                    raise RuntimeError("輝度調整に失敗しました")
+                if cycle == 0:
+                    warmup_calls = count_calls(log_path)
+                    continue
+                latencies.append(time.perf_counter() - start)
+                cpu_times.append(time.process_time() - cpu_start)
+            lunar_calls = count_calls(log_path) - warmup_calls
+
+        results.append({
+            'name': f"cycle/{resolution}/{variant}" if variant else f"cycle/{resolution}",
+            'cycles': cycles,
+            'lunar_calls': lunar_calls,
+            'cpu_ms_per_cycle': statistics.mean(cpu_times) * 1e3,
+            **summarize(latencies),
+        })
+    return results
+
+
+def bench_daemon(resolution: str, cycles: int, fps: float,
+                 lunar_delay: float) -> List[Dict[str, Any]]:
+    """
+    カメラを開いたまま調整を繰り返すデーモンの定常状態を、バックエンドごとに計測する
+
+    Args:
+        resolution (str): カメラの解像度
+        cycles (int): 計測するサイクル数
+        fps (float): カメラのフレームレート
+        lunar_delay (float): 代替 lunar コマンドの応答の遅延（秒）
+
+    Returns:
+        List[Dict[str, Any]]: バックエンドごとの計測結果
+    """
+    images = make_frames(*RESOLUTIONS[resolution], levels=VARYING_LEVELS)
+    results = []
+
+    for backend in ('cli', 'persistent'):
+        config = BrightnessConfig(display_backend=backend, **CYCLE_CONFIG).validate()
+
+        with synthetic_camera(images, fps=fps), stub_lunar(lunar_delay) as log_path:
+            adjuster = BrightnessAdjuster(
+                config,
+                sensor=AmbientLightSensor.from_config(config),
+                actuator=BrightnessActuator(
+                    create_display_controller(backend, STUB_LUNAR), hysteresis=config.hysteresis
+                )
+            )
+            daemon = BrightnessDaemon(adjuster, interval=0)
+            latencies, marks = _stop_after(daemon, cycles + 1)
+            daemon.run()
+            lunar_calls = count_calls(log_path)
+
+        # 最初のサイクル（カメラを開く）は定常状態に含めない
+        (wall_start, cpu_start), (wall_end, cpu_end) = marks[0], marks[-1]
+        results.append({
+            'name': f"daemon/{resolution}/{backend}",
+            'cycles': cycles,
+            'lunar_calls': lunar_calls,
+            'writes': adjuster.actuator.stats.writes,
+            'cpu_ms_per_cycle': (cpu_end - cpu_start) / cycles * 1e3,
+            'wall_ms_per_cycle': (wall_end - wall_start) / cycles * 1e3,
+            **summarize(latencies[1:]),
+        })
+    return results
+
+
+def _stop_after(daemon: BrightnessDaemon,
+                cycles: int) -> Tuple[List[float], List[Tuple[float, float]]]:
+    """
+    指定したサイクル数の後にデーモンを停止するようにし、各サイクルの所要時間と
+    サイクル終了時点の (経過時間, CPU時間) を記録する
+    """
+    latencies: List[float] = []
+    marks: List[Tuple[float, float]] = []
+    adjust = daemon.adjuster.adjust
+
+    def timed_adjust():
+        start = time.perf_counter()
+        result = adjust()
+        end = time.perf_counter()
+        latencies.append(end - start)
+        marks.append((end, time.process_time()))
+        if len(latencies) >= cycles:
+            daemon.stop()
+        return result
+
+    daemon.adjuster.adjust = timed_adjust
+    return latencies, marks
+
+
+def collect_metadata(args: argparse.Namespace) -> Dict[str, Any]:
+    """計測環境の情報（コミット、Python・ライブラリのバージョンなど）"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'commit': commit,
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+        'options': vars(args),
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]):
+    """
+    2つの結果の平均レイテンシを比較して表示する
+
+    Args:
+        baseline (Dict[str, Any]): 比較元の結果
+        current (Dict[str, Any]): 今回の結果
+    """
+    previous = {result['name']: result for result in baseline['results']}
+    print(f"\n比較元: {baseline['metadata'].get('commit')} -> 今回: {current['metadata'].get('commit')}")
+
+    for result in current['results']:
+        before = previous.get(result['name'])
+        if before is None:
+            continue
+        change = (result['mean_ms'] - before['mean_ms']) / before['mean_ms'] * 100
+        print(f"{result['name']:<32} {before['mean_ms']:9.3f} ms -> {result['mean_ms']:9.3f} ms ({change:+6.1f}%)")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="カメラやLunarを使わずに処理時間を計測します。")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"実行するシナリオ（デフォルト: {','.join(SCENARIOS)}）")
+    parser.add_argument("--resolutions", default=",".join(RESOLUTIONS),
+                        help=f"使用する解像度（デフォルト: {','.join(RESOLUTIONS)}）")
+    parser.add_argument("--frames", type=int, default=100, help="輝度計算の計測フレーム数（デフォルト: 100）")
+    parser.add_argument("--cycles", type=int, default=10, help="調整サイクルの計測回数（デフォルト: 10）")
+    parser.add_argument("--fps", type=float, default=30.0, help="疑似カメラのフレームレート（デフォルト: 30）")
+    parser.add_argument("--lunar-delay", type=float, default=0.0,
+                        help="代替 lunar コマンドの応答の遅延（秒）（デフォルト: 0）")
+    parser.add_argument("--output", help="結果を保存するJSONファイル")
+    parser.add_argument("--compare", help="比較元の結果のJSONファイル")
+    args = parser.parse_args(argv)
+
+    # ログ出力を計測に含めない
+    logger.setLevel(logging.WARNING)
+
+    scenarios: Dict[str, Callable[[str], List[Dict[str, Any]]]] = {
+        'frame': lambda resolution: bench_frame_brightness(resolution, args.frames),
+        'source': lambda resolution: bench_frame_source(resolution, args.frames),
+        'cycle': lambda resolution: bench_adjust_cycle(resolution, args.cycles, args.fps, args.lunar_delay),
+        'daemon': lambda resolution: bench_daemon(resolution, args.cycles, args.fps, args.lunar_delay),
+    }
+
+    results = []
+    for scenario in args.scenarios.split(','):
+        for resolution in args.resolutions.split(','):
+            for result in scenarios[scenario](resolution):
+                cpu = result.get('cpu_ms_per_cycle')
+                cost = result.get('cost_vs_default')
+                print(
+                    f"{result['name']:<32} 平均 {result['mean_ms']:9.3f} ms, "
+                    f"中央値 {result['median_ms']:9.3f} ms, p95 {result['p95_ms']:9.3f} ms"
+                    + (f", CPU時間/サイクル {cpu:7.2f} ms" if cpu is not None else "")
+                    + (f", 全画素比 {cost:5.2f}倍, 誤差 {result['error_vs_default']:6.3f}"
+                       if cost is not None else "")
+                )
+                results.append(result)
+
+    report = {'metadata': collect_metadata(args), 'results': results}
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n結果を {args.output} に保存しました。")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(json.load(f), report)
+
+    slower = slower_reductions(results)
+    if slower:
+        print(f"\n画素を減らす設定が全画素より遅くなっています: {', '.join(slower)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
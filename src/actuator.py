@@ -0,0 +1,202 @@
+"""
+ディスプレイ輝度の書き込みを間引く（不感帯・レート制限）アクチュエーターモジュール
+"""
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+from .lunar import DisplayController, LunarController, apply_levels
+from .logger import logger
+
+# 最後に設定した輝度との差がこの値以上の場合、ユーザーが手動で変更したとみなす（%）
+OVERRIDE_TOLERANCE = 2.0
+
+@dataclass
+class ActuatorStats:
+    """書き込みと省略の回数を保持するデータクラス"""
+    writes: int = 0
+    failed_writes: int = 0
+    suppressed_deadband: int = 0
+    suppressed_rate_limit: int = 0
+
+    @property
+    def suppressed(self) -> int:
+        """省略された書き込みの合計"""
+        return self.suppressed_deadband + self.suppressed_rate_limit
+
+
+class BrightnessActuator:
+    """
+    最後に設定した輝度を記憶し、不要なLunar CLIの呼び出しを省略するクラス
+
+    * 最後に設定した値との差が hysteresis 未満の場合は書き込まない（ディスプレイごとに判定）
+    * 前回の書き込みから min_interval 秒経過するまでは書き込まず、
+      その間に届いた目標値は最新のもののみを保留する
+    """
+
+    def __init__(self, controller: Optional[DisplayController] = None,
+                 hysteresis: float = 1.0, min_interval: float = 0.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        BrightnessActuatorを初期化
+
+        Args:
+            controller (DisplayController, optional): 輝度の書き込みに使うコントローラー
+            hysteresis (float): 書き込みを省略する輝度差（%）
+            min_interval (float): 書き込みの最小間隔（秒）
+            clock (Callable[[], float]): 現在時刻を返す関数（テスト用）
+        """
+        self.controller = controller or LunarController()
+        self.hysteresis = max(0.0, hysteresis)
+        self.min_interval = max(0.0, min_interval)
+        self.clock = clock
+        self.stats = ActuatorStats()
+        # ディスプレイごとの状態（Noneは既定のディスプレイ）
+        self._last_applied: Dict[Optional[str], int] = {}
+        self._pending: Dict[Optional[str], int] = {}
+        self._last_write_time: Optional[float] = None
+
+    @property
+    def last_applied(self) -> Optional[int]:
+        """既定のディスプレイに最後に設定した輝度"""
+        return self._last_applied.get(None)
+
+    @property
+    def applied_levels(self) -> Dict[Optional[str], int]:
+        """ディスプレイごとに最後に設定した輝度"""
+        return dict(self._last_applied)
+
+    @property
+    def pending(self) -> Optional[int]:
+        """既定のディスプレイに対して保留中の輝度"""
+        return self._pending.get(None)
+
+    def apply(self, brightness_level: float) -> bool:
+        """
+        既定のディスプレイに目標輝度を適用する（必要な場合のみ書き込む）
+
+        Args:
+            brightness_level (float): 目標輝度（0-100の範囲）
+
+        Returns:
+            bool: 書き込みに失敗しなかったかどうか（省略・保留した場合もTrue）
+        """
+        return self.apply_many({None: brightness_level})[None]
+
+    def apply_many(self, levels: Dict[Optional[str], float]) -> Dict[Optional[str], bool]:
+        """
+        ディスプレイごとの目標輝度を適用する（必要なディスプレイのみ並行して書き込む）
+
+        Args:
+            levels (Dict[Optional[str], float]): ディスプレイごとの目標輝度（0-100の範囲）
+
+        Returns:
+            Dict[Optional[str], bool]: ディスプレイごとの成否（省略・保留した場合もTrue）
+        """
+        results: Dict[Optional[str], bool] = {}
+        to_write: Dict[Optional[str], int] = {}
+
+        for display, level in levels.items():
+            brightness = max(0, min(100, int(level)))
+
+            if self._within_deadband(display, brightness):
+                logger.debug(
+                    f"輝度 {brightness}% は現在値 {self._last_applied[display]}% に近いため設定を省略します。"
+                )
+                self.stats.suppressed_deadband += 1
+                # 保留中の値よりも現在値の方が目標に近いので、保留を破棄する
+                self._pending.pop(display, None)
+                results[display] = True
+            else:
+                to_write[display] = brightness
+
+        if not to_write:
+            return results
+
+        delay = self._rate_limit_delay()
+        if delay > 0:
+            logger.debug(f"書き込み間隔の制限により輝度 {to_write} を {delay:.2f}秒 保留します。")
+            self.stats.suppressed_rate_limit += len(to_write)
+            self._pending.update(to_write)
+            results.update({display: True for display in to_write})
+            return results
+
+        results.update(self._write(to_write))
+        return results
+
+    def flush_delay(self) -> Optional[float]:
+        """
+        保留中の目標値を書き込めるようになるまでの時間を返す
+
+        Returns:
+            Optional[float]: 待ち時間（秒）、保留中の値がない場合はNone
+        """
+        if not self._pending:
+            return None
+        return self._rate_limit_delay()
+
+    def flush(self) -> bool:
+        """
+        保留中の目標値を、書き込み間隔の制限が解除されていれば書き込む
+
+        Returns:
+            bool: 書き込みに失敗しなかったかどうか
+        """
+        if not self._pending or self._rate_limit_delay() > 0:
+            return True
+        return all(self._write(dict(self._pending)).values())
+
+    def manual_override(self, tolerance: float = OVERRIDE_TOLERANCE) -> Optional[float]:
+        """
+        既定のディスプレイの輝度が、最後に設定した値から手動で変更されていればその値を返す
+
+        Args:
+            tolerance (float): 手動で変更したとみなす輝度差（%）、不感帯より小さい場合は不感帯を使う
+
+        Returns:
+            Optional[float]: 現在の輝度（%）、変更されていない・まだ設定していない・取得できない場合、
+                または段階的な変化の途中（実際の輝度が目標値と異なる）の場合はNone
+        """
+        last_applied = self.last_applied
+        if last_applied is None or not self.controller.is_idle():
+            return None
+        try:
+            current = self.controller.get_current_brightness()
+        except NotImplementedError:
+            return None
+        if current is None or abs(current - last_applied) < max(tolerance, self.hysteresis):
+            return None
+        return current
+
+    def close(self):
+        """コントローラーが保持しているリソースを解放する"""
+        self.controller.close()
+
+    def _within_deadband(self, display: Optional[str], brightness: int) -> bool:
+        """最後に設定した値との差が不感帯の範囲内かどうか"""
+        last_applied = self._last_applied.get(display)
+        if last_applied is None:
+            return False
+        difference = abs(brightness - last_applied)
+        return difference == 0 or difference < self.hysteresis
+
+    def _rate_limit_delay(self) -> float:
+        """次に書き込めるようになるまでの時間（秒）"""
+        if self._last_write_time is None:
+            return 0.0
+        return max(0.0, self.min_interval - (self.clock() - self._last_write_time))
+
+    def _write(self, levels: Dict[Optional[str], int]) -> Dict[Optional[str], bool]:
+        """コントローラーで輝度を書き込み、状態を更新する"""
+        for display in levels:
+            self._pending.pop(display, None)
+        self._last_write_time = self.clock()
+        self.stats.writes += len(levels)
+
+        results = apply_levels(self.controller, levels)
+
+        for display, success in results.items():
+            if success:
+                self._last_applied[display] = levels[display]
+            else:
+                self.stats.failed_writes += 1
+        return results
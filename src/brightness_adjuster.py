@@ -2,55 +2,202 @@
 メインのアプリケーションロジックを提供するモジュール
 Webカメラの輝度測定値に基づいてLunar CLIでディスプレイの輝度を調整する
 """
-from typing import Optional
-from .config import BrightnessConfig, load_config
-from .camera import measure_ambient_brightness
-from .lunar import set_display_brightness
+from __future__ import annotations
+import contextlib
+import math
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterator, Optional, Tuple
+from .actuator import BrightnessActuator
+from .config import BrightnessConfig, ConfigWatcher, DisplayRange, load_config
+from .camera import AmbientLightSensor, measure_ambient_brightness, sensor_settings
+from .lunar import (
+    create_display_controller, set_display_brightness, set_displays_brightness
+)
+from .daemon import BrightnessDaemon, DEFAULT_INTERVAL
+from .lazy import LazyModule
 from .logger import logger
+from .metrics import export_metrics, metrics
+from .mapping import ResponseCurve, curve_key
+from .scheduler import AdaptiveScheduler
+from .transition import BrightnessTransition
+
+if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+    import numpy as np
+
+# 非同期パイプラインを使う場合のみ読み込む
+asyncio = LazyModule('asyncio')
+concurrent_futures = LazyModule('concurrent.futures')
+
+@dataclass
+class CycleReport:
+    """1回の調整サイクルの測定値・目標輝度・設定した輝度・手動で設定された輝度・処理段階ごとの所要時間・CPU時間"""
+    timestamp: float = 0.0
+    ambient: float = math.nan
+    samples: int = 0
+    target: float = math.nan
+    applied: float = math.nan
+    override: float = math.nan
+    durations: Dict[str, float] = field(default_factory=dict)
+    cpu_time: float = 0.0
+
 
 class BrightnessAdjuster:
     """
     周囲の明るさに基づいてディスプレイの輝度を自動調整するクラス
     """
     
-    def __init__(self, config: Optional[BrightnessConfig] = None):
+    def __init__(self, config: Optional[BrightnessConfig] = None,
+                 sensor: Optional[AmbientLightSensor] = None,
+                 actuator: Optional[BrightnessActuator] = None):
         """
         BrightnessAdjusterを初期化
         
         Args:
             config (BrightnessConfig, optional): 使用する設定
                 指定しない場合は、デフォルトの設定が読み込まれる
+            sensor (AmbientLightSensor, optional): 使い回すセンサー
+                指定した場合はカメラを開いたまま測定を繰り返す（デーモンモード用）。
+                指定しない場合は、測定のたびにカメラを開閉する
+            actuator (BrightnessActuator, optional): 輝度の書き込みに使うアクチュエーター
+                指定した場合は不要な書き込みを省略する。
+                指定しない場合は、毎回Lunar CLIで輝度を設定する
         """
         self.config = config or load_config()
+        self.sensor = sensor
+        self.actuator = actuator
+        # 最後に実行した調整サイクルの記録（トレース用）
+        self.last_report: Optional[CycleReport] = None
+        self._curve_key = curve_key(self.config)
+        self._curve = ResponseCurve.from_config(self.config)
+    
+    @property
+    def curve(self) -> ResponseCurve:
+        """
+        設定に対応する応答カーブ
+        
+        カーブの形を決める設定値が変わった場合のみルックアップテーブルを作り直す。
+        """
+        key = curve_key(self.config)
+        if key != self._curve_key:
+            logger.debug(f"応答カーブを作り直します: {key[0]}")
+            self._curve_key = key
+            self._curve = ResponseCurve.from_config(self.config)
+        return self._curve
+    
+    def update_config(self, config: BrightnessConfig):
+        """
+        実行中に設定を新しいものに差し替える
+        
+        設定オブジェクトは変更できず、参照の代入1回で入れ替わるため、処理中のサイクルが
+        新旧の設定を混在して使うことはない。応答カーブは形が変わった場合のみ、
+        センサーは測定に関係する値が変わった場合のみ、アクチュエーターはバックエンドと
+        段階的な変化の設定が変わった場合のみ作り直す。
+        
+        Args:
+            config (BrightnessConfig): 新しい設定
+        """
+        previous = self.config
+        self.config = config
+        
+        if self.actuator is not None:
+            if controller_settings(config) != controller_settings(previous):
+                logger.info("ディスプレイ制御の設定が変わったため、アクチュエーターを作り直します。")
+                stats = self.actuator.stats
+                self.actuator.close()
+                self.actuator = create_actuator(config)
+                # 書き込み回数などの統計は引き継ぐ
+                self.actuator.stats = stats
+            self.actuator.hysteresis = max(0.0, config.hysteresis)
+            self.actuator.min_interval = max(0.0, config.min_write_interval)
+        
+        if self.sensor is not None and (
+                sensor_settings(config) != sensor_settings(previous)
+                or config.sensor_socket != previous.sensor_socket):
+            logger.info("センサーの設定が変わったため、カメラを開き直します。")
+            self.sensor.close()
+            self.sensor = create_sensor(config)
     
-    def map_brightness(self, ambient_brightness: float) -> float:
+    def map_brightness(self, ambient_brightness: float,
+                       display_range: Optional[DisplayRange] = None) -> float:
         """
         環境光の輝度（0-255）を、設定された最小・最大輝度の範囲にマッピング
         
         Args:
             ambient_brightness (float): 環境光の輝度（0-255の範囲）
+            display_range (DisplayRange, optional): 使用する輝度範囲
+                指定しない場合は、設定全体の最小・最大輝度を使用する
             
         Returns:
             float: マッピングされたディスプレイ輝度（0-100の範囲）
         """
-        # 最小値と最大値が同じ場合は単純に最小値を返す
-        if self.config.min_brightness == self.config.max_brightness:
-            return float(self.config.min_brightness)
+        brightness_range = display_range or self.config
+        return self.curve.map(
+            ambient_brightness,
+            brightness_range.min_brightness,
+            brightness_range.max_brightness
+        )
+    
+    def map_many(self, ambient_brightness: np.ndarray,
+                 display_range: Optional[DisplayRange] = None) -> np.ndarray:
+        """
+        複数の環境光の輝度（0-255）をまとめて輝度範囲にマッピング（記録の再生や校正用）
         
-        # 環境光の値（0-255）を設定された範囲にマッピング
-        target_brightness = (
-            self.config.min_brightness + 
-            (ambient_brightness / 255) * 
-            (self.config.max_brightness - self.config.min_brightness)
+        Args:
+            ambient_brightness (np.ndarray): 環境光の輝度（0-255の範囲）
+            display_range (DisplayRange, optional): 使用する輝度範囲
+                指定しない場合は、設定全体の最小・最大輝度を使用する
+            
+        Returns:
+            np.ndarray: マッピングされたディスプレイ輝度（0-100の範囲）
+        """
+        brightness_range = display_range or self.config
+        return self.curve.map_many(
+            ambient_brightness,
+            brightness_range.min_brightness,
+            brightness_range.max_brightness
         )
+    
+    def map_displays(self, ambient_brightness: float) -> Dict[str, float]:
+        """
+        環境光の輝度を、ディスプレイごとの輝度範囲にマッピング
         
-        # 結果が設定範囲内に収まるように調整（念のため）
-        target_brightness = max(
-            self.config.min_brightness, 
-            min(self.config.max_brightness, target_brightness)
+        Args:
+            ambient_brightness (float): 環境光の輝度（0-255の範囲）
+            
+        Returns:
+            Dict[str, float]: ディスプレイIDごとのディスプレイ輝度（0-100の範囲）
+        """
+        return {
+            display_id: self.map_brightness(ambient_brightness, display_range)
+            for display_id, display_range in self.config.displays.items()
+        }
+    
+    def measure(self) -> Optional[float]:
+        """
+        環境光の輝度を測定する
+        
+        保持しているセンサーがある場合はそれを使用し、測定に失敗した場合は
+        次回の測定でカメラを開き直せるようにデバイスを解放する。
+        
+        Returns:
+            Optional[float]: 環境光の輝度（0-255の範囲）、またはエラー時にNone
+        """
+        if self.sensor is None:
+            return measure_ambient_brightness(
+                capture_duration=self.config.capture_duration,
+                config=self.config
+            )
+        
+        ambient_brightness = self.sensor.measure_ambient_light(
+            duration=self.config.capture_duration
         )
         
-        return target_brightness
+        if ambient_brightness is None:
+            self.sensor.close()
+        
+        return ambient_brightness
     
     def adjust(self) -> bool:
         """
@@ -59,36 +206,440 @@ class BrightnessAdjuster:
         Returns:
             bool: 調整が成功したかどうか
         """
+        self.last_report = report = CycleReport()
+        cpu_start = time.process_time()
+        try:
+            with self._stage('cycle'):
+                return self._adjust(report)
+        finally:
+            report.timestamp = time.time()
+            # このプロセスが使ったCPU時間（カメラのデコードや輝度計算の負荷の目安）
+            report.cpu_time = time.process_time() - cpu_start
+            metrics.observe('cycle_cpu', report.cpu_time)
+            logger.debug("調整サイクルのCPU時間: %.1fミリ秒", report.cpu_time * 1e3)
+    
+    def _adjust(self, report: CycleReport) -> bool:
+        """adjust() の本体（サイクル全体の所要時間を記録するために分けている）"""
         # 環境光を測定
-        ambient_brightness = measure_ambient_brightness(
-            capture_duration=self.config.capture_duration
-        )
+        with self._stage('measure'):
+            ambient_brightness = self.measure()
+        
+        if self.sensor is not None:
+            report.samples = self.sensor.last_sample_count
         
         if ambient_brightness is None:
             logger.error("環境光の測定に失敗したため、輝度調整をスキップします。")
             return False
         
+        report.ambient = ambient_brightness
+        
+        if self.config.displays:
+            return self._adjust_displays(ambient_brightness, report)
+        
         # 測定値を輝度設定にマッピング
-        target_brightness = self.map_brightness(ambient_brightness)
+        with self._stage('mapping'):
+            target_brightness = self.map_brightness(ambient_brightness)
         
+        report.target = target_brightness
         logger.info(f"環境光の輝度: {ambient_brightness:.2f} -> ディスプレイ輝度: {target_brightness:.2f}%")
         
+        if self.actuator is not None and self.config.trace_file:
+            # 校正用に、前回のサイクル以降にユーザーが手動で選んだ輝度を記録する（上書きする前に取得する）
+            override = self.actuator.manual_override()
+            if override is not None:
+                logger.info(f"輝度が手動で {override:.0f}% に変更されていました（校正用にトレースに記録します）")
+                report.override = override
+        
         # ディスプレイの輝度を設定
-        success = set_display_brightness(target_brightness)
+        with self._stage('actuation'):
+            if self.actuator is not None:
+                success = self.actuator.apply(target_brightness)
+            else:
+                success = set_display_brightness(target_brightness)
+        
+        if self.actuator is not None and self.actuator.last_applied is not None:
+            report.applied = self.actuator.last_applied
         
         return success
+    
+    @contextlib.contextmanager
+    def _stage(self, stage: str) -> Iterator[None]:
+        """処理段階の所要時間を、サイクルの記録とメトリクスの両方に記録する"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.last_report.durations[stage] = elapsed
+            metrics.observe(stage, elapsed)
+    
+    def _adjust_displays(self, ambient_brightness: float, report: CycleReport) -> bool:
+        """
+        ディスプレイごとの輝度範囲にマッピングし、すべてのディスプレイに並行して設定する
+        
+        Args:
+            ambient_brightness (float): 環境光の輝度（0-255の範囲）
+            report (CycleReport): 目標輝度と設定した輝度（ディスプレイの平均）を記録する先
+            
+        Returns:
+            bool: すべてのディスプレイの調整が成功したかどうか
+        """
+        with self._stage('mapping'):
+            targets = self.map_displays(ambient_brightness)
+        
+        report.target = sum(targets.values()) / len(targets)
+        logger.info(
+            f"環境光の輝度: {ambient_brightness:.2f} -> ディスプレイ輝度: "
+            + ", ".join(f"{display_id}={target:.2f}%" for display_id, target in targets.items())
+        )
+        
+        with self._stage('actuation'):
+            if self.actuator is not None:
+                results = self.actuator.apply_many(targets)
+            else:
+                results = set_displays_brightness(targets)
+        
+        if self.actuator is not None:
+            applied = [
+                level for display_id, level in self.actuator.applied_levels.items()
+                if display_id in targets
+            ]
+            if applied:
+                report.applied = sum(applied) / len(applied)
+        
+        failed = [display_id for display_id, success in results.items() if not success]
+        if failed:
+            logger.warning(f"輝度を設定できなかったディスプレイ: {', '.join(failed)}")
+        
+        return not failed
+
+
+# パイプラインの各段の間のキューに保持する要素数（超えた場合は古いものから捨てる）
+DEFAULT_QUEUE_SIZE = 1
+
+# パイプラインの終端を表す値（上流の段が終了したことを下流に伝える）
+_END_OF_STREAM = object()
+
+@dataclass
+class PipelineStats:
+    """
+    非同期パイプラインの測定件数と破棄件数を保持するデータクラス
+
+    書き込みと省略の件数はアクチュエーターの ActuatorStats に記録する。
+    """
+    samples: int = 0
+    failed_samples: int = 0
+    dropped_samples: int = 0
+    dropped_targets: int = 0
 
 
-def main():
-    """アプリケーションのメインエントリーポイント"""
+class AsyncBrightnessAdjuster(BrightnessAdjuster):
+    """
+    測定・推定・書き込みを非同期パイプラインの3段に分けて実行する輝度調整クラス
+
+    * 測定: カメラの読み取りを専用スレッド（executor）で実行する
+    * 推定: 測定値をディスプレイ輝度にマッピングする純粋なコルーチン
+    * 書き込み: BrightnessActuator をスレッド（executor）で実行する
+      （同期の経路と同じバックエンド・不感帯・書き込み間隔の制限を使う）
+
+    各段は上限付きのキューでつながり、キューが一杯の場合は最も古い要素を捨てる。
+    そのため書き込みが遅くても測定は止まらず、書き込む値は常に最新の測定に基づく。
+    いずれかの段で例外が発生した場合は、残りの段を取り消してから例外を送出する。
+    """
+
+    def __init__(self, config: Optional[BrightnessConfig] = None,
+                 sensor: Optional[AmbientLightSensor] = None,
+                 actuator: Optional[BrightnessActuator] = None,
+                 interval: float = 0.0,
+                 queue_size: int = DEFAULT_QUEUE_SIZE):
+        """
+        AsyncBrightnessAdjusterを初期化
+
+        Args:
+            config (BrightnessConfig, optional): 使用する設定
+            sensor (AmbientLightSensor, optional): 使い回すセンサー
+            actuator (BrightnessActuator, optional): 輝度の書き込みに使うアクチュエーター
+                指定しない場合は、設定から create_actuator() で作成する
+            interval (float): 測定を開始する間隔（秒）
+            queue_size (int): 段の間のキューに保持する要素数
+        """
+        super().__init__(config, sensor=sensor)
+        self.actuator = actuator or create_actuator(self.config)
+        self.interval = max(0.0, interval)
+        self.queue_size = max(1, queue_size)
+        self.stats = PipelineStats()
+        self._stop_event: Optional[asyncio.Event] = None
+        self._actuation_executor: Optional[ThreadPoolExecutor] = None
+
+    def stop(self):
+        """実行中のパイプラインに停止を要求する（イベントループのスレッドから呼ぶ）"""
+        if self._stop_event is not None:
+            self._stop_event.set()
+
+    async def run(self, max_samples: Optional[int] = None) -> PipelineStats:
+        """
+        停止が要求されるか、max_samples 回測定するまでパイプラインを実行する
+
+        測定が終わった後も、キューに残っている最新の値は書き込んでから終了する。
+
+        Args:
+            max_samples (int, optional): 測定する回数。指定しない場合は停止まで繰り返す
+
+        Returns:
+            PipelineStats: 処理件数と破棄件数
+
+        Raises:
+            Exception: いずれかの段で発生した例外（残りの段は取り消し、リソースは解放する）
+        """
+        self._stop_event = asyncio.Event()
+        # 要素数の上限は _put_latest() で守る（終了の合図は上限に関係なく追加できる）
+        samples: asyncio.Queue = asyncio.Queue()
+        targets: asyncio.Queue = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+
+        # カメラとディスプレイ制御は、それぞれ常に同じスレッドから操作する
+        with concurrent_futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="camera") as executor, \
+                concurrent_futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="actuation") as actuation:
+            self._actuation_executor = actuation
+            tasks = [
+                asyncio.ensure_future(self._capture_stage(executor, samples, max_samples)),
+                asyncio.ensure_future(self._estimate_stage(samples, targets)),
+                asyncio.ensure_future(self._actuate_stage(targets)),
+            ]
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                # 1つの段が失敗した場合も残りの段を止め、実行中の読み取り・書き込みが終わってから解放する
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                if self.sensor is not None:
+                    await loop.run_in_executor(executor, self.sensor.close)
+                await loop.run_in_executor(actuation, self.actuator.close)
+                self._actuation_executor = None
+
+        return self.stats
+
+    async def estimate(self, ambient_brightness: float) -> Dict[Optional[str], float]:
+        """
+        環境光の輝度をディスプレイごとの目標輝度にマッピングする
+
+        Args:
+            ambient_brightness (float): 環境光の輝度（0-255の範囲）
+
+        Returns:
+            Dict[Optional[str], float]: ディスプレイごとの目標輝度（Noneは既定のディスプレイ）
+        """
+        if self.config.displays:
+            return self.map_displays(ambient_brightness)
+        return {None: self.map_brightness(ambient_brightness)}
+
+    async def actuate(self, levels: Dict[Optional[str], float]) -> bool:
+        """
+        目標輝度をアクチュエーターで適用する（不感帯・書き込み間隔の制限は同期の経路と同じ）
+
+        Args:
+            levels (Dict[Optional[str], float]): ディスプレイごとの目標輝度
+
+        Returns:
+            bool: 書き込みに失敗したディスプレイがないかどうか（省略・保留した場合もTrue）
+        """
+        loop = asyncio.get_running_loop()
+        results = await loop.run_in_executor(self._actuation_executor, self.actuator.apply_many, levels)
+        return all(results.values())
+
+    async def flush(self) -> bool:
+        """
+        書き込み間隔の制限で保留した目標値を、制限が解除されるまで待ってから書き込む
+
+        Returns:
+            bool: 書き込みに失敗しなかったかどうか
+        """
+        delay = self.actuator.flush_delay()
+        if delay is None:
+            return True
+        await asyncio.sleep(delay)
+        return await asyncio.get_running_loop().run_in_executor(self._actuation_executor, self.actuator.flush)
+
+    async def _capture_stage(self, executor: ThreadPoolExecutor,
+                             samples: asyncio.Queue, max_samples: Optional[int]):
+        """測定を繰り返し、測定値を次の段に渡す"""
+        loop = asyncio.get_running_loop()
+        count = 0
+
+        try:
+            while not self._stop_event.is_set() and (max_samples is None or count < max_samples):
+                cycle_start = loop.time()
+                ambient_brightness = await loop.run_in_executor(executor, self.measure)
+                count += 1
+
+                if ambient_brightness is None:
+                    logger.error("環境光の測定に失敗したため、この測定値をスキップします。")
+                    self.stats.failed_samples += 1
+                else:
+                    self.stats.samples += 1
+                    if _put_latest(samples, ambient_brightness, self.queue_size):
+                        self.stats.dropped_samples += 1
+
+                remaining = cycle_start + self.interval - loop.time()
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), timeout=max(0.0, remaining))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            samples.put_nowait(_END_OF_STREAM)
+
+    async def _estimate_stage(self, samples: asyncio.Queue, targets: asyncio.Queue):
+        """測定値を目標輝度に変換し、次の段に渡す"""
+        try:
+            while True:
+                ambient_brightness = await samples.get()
+                if ambient_brightness is _END_OF_STREAM:
+                    return
+
+                levels = await self.estimate(ambient_brightness)
+                logger.debug("環境光の輝度: %.2f -> ディスプレイ輝度: %s", ambient_brightness, levels)
+                if _put_latest(targets, levels, self.queue_size):
+                    self.stats.dropped_targets += 1
+        finally:
+            targets.put_nowait(_END_OF_STREAM)
+
+    async def _actuate_stage(self, targets: asyncio.Queue):
+        """目標輝度を書き込む（次の目標値が届く前に保留が解除された場合は、保留中の値を書き込む）"""
+        while True:
+            try:
+                levels = await asyncio.wait_for(targets.get(), timeout=self.actuator.flush_delay())
+            except asyncio.TimeoutError:
+                await self.flush()
+                continue
+            if levels is _END_OF_STREAM:
+                await self.flush()
+                return
+            await self.actuate(levels)
+
+
+def _put_latest(queue: asyncio.Queue, item, limit: int) -> bool:
+    """
+    キューに要素を追加する（limit 個に達している場合は最も古い要素を捨てる）
+
+    Args:
+        queue (asyncio.Queue): 追加するキュー
+        item: 追加する要素
+        limit (int): キューに保持する要素数の上限
+
+    Returns:
+        bool: 要素を捨てたかどうか
+    """
+    dropped = False
+    while queue.qsize() >= limit:
+        queue.get_nowait()
+        dropped = True
+    queue.put_nowait(item)
+    return dropped
+
+
+def controller_settings(config: BrightnessConfig) -> Tuple[str, int, float]:
+    """
+    ディスプレイ制御のコントローラーの作成に使う設定値の組（変わった場合はアクチュエーターを作り直す）
+    
+    Args:
+        config (BrightnessConfig): 使用する設定
+        
+    Returns:
+        Tuple[str, int, float]: (バックエンド, 段階的な変化量, 1秒あたりのステップ数)
+    """
+    return config.display_backend, config.transition_step, config.transition_rate
+
+
+def create_actuator(config: BrightnessConfig) -> BrightnessActuator:
+    """
+    設定に応じたバックエンド・段階的な変化・書き込みの間引きを持つアクチュエーターを作成する
+    
+    Args:
+        config (BrightnessConfig): 使用する設定
+        
+    Returns:
+        BrightnessActuator: 作成したアクチュエーター
+    """
+    controller = create_display_controller(config.display_backend)
+    if config.transition_step > 0:
+        # 目標値まで別スレッドで段階的に変化させる
+        controller = BrightnessTransition(
+            controller, step=config.transition_step, rate=config.transition_rate
+        )
+        controller.start()
+    
+    return BrightnessActuator(
+        controller=controller,
+        hysteresis=config.hysteresis,
+        min_interval=config.min_write_interval
+    )
+
+
+def create_sensor(config: BrightnessConfig) -> AmbientLightSensor:
+    """
+    設定に応じたセンサーを作成する
+    
+    sensor_socket を指定した場合は、カメラを保持しているサーバー（serve サブコマンド）から
+    測定値を受け取るクライアントを返す。測定時間の STALE_READING_FACTOR 倍より古い測定値
+    （サーバーの測定の開始間隔の分は除く）は測定の失敗として扱う。
+    
+    Args:
+        config (BrightnessConfig): 使用する設定
+        
+    Returns:
+        AmbientLightSensor: センサー（または同じメソッドを持つクライアント）
+    """
+    if config.sensor_socket:
+        from .service import STALE_READING_FACTOR, RemoteSensor
+        return RemoteSensor(
+            config.sensor_socket, max_age=STALE_READING_FACTOR * config.capture_duration
+        )
+    return AmbientLightSensor.from_config(config)
+
+
+def main(daemon: bool = False, interval: float = DEFAULT_INTERVAL,
+         config_path: Optional[str] = None):
+    """
+    アプリケーションのメインエントリーポイント
+    
+    Args:
+        daemon (bool): Trueの場合、カメラを開いたまま定期的に輝度調整を繰り返す
+        interval (float): デーモンモードでの調整間隔（秒）
+        config_path (str, optional): 設定ファイルへのパス
+            デーモンモードでは、このファイルの変更をサイクルごとに反映する
+    """
     logger.info("Lunar Brightness Adjuster を開始します...")
     
-    # 設定を読み込む
-    config = load_config()
+    if daemon:
+        config_watcher = ConfigWatcher(config_path)
+        config = config_watcher.load()
+        # 出力先が指定されている場合のみ計測する（デーモンがサイクルごとに書き出す）
+        metrics.enabled = bool(config.metrics_file)
+        
+        adjuster = BrightnessAdjuster(
+            config, sensor=create_sensor(config), actuator=create_actuator(config)
+        )
+        brightness_daemon = BrightnessDaemon(
+            adjuster, interval=interval, config_watcher=config_watcher,
+            scheduler=AdaptiveScheduler.from_config(config, interval)
+        )
+        brightness_daemon.install_signal_handlers()
+        result = brightness_daemon.run()
+        logger.info("Lunar Brightness Adjuster を終了します。")
+        return result
     
-    # 輝度調整を実行
-    adjuster = BrightnessAdjuster(config)
-    result = adjuster.adjust()
+    # 設定を読み込んで輝度調整を実行
+    config = load_config(config_path)
+    metrics.enabled = bool(config.metrics_file)
+    # サーバーから測定値を受け取る場合以外は、測定のたびにカメラを開閉する
+    adjuster = BrightnessAdjuster(config, sensor=create_sensor(config) if config.sensor_socket else None)
+    try:
+        result = adjuster.adjust()
+    finally:
+        if adjuster.sensor is not None:
+            adjuster.sensor.close()
+    export_metrics(config.metrics_file)
     
     if result:
         logger.info("輝度調整が正常に完了しました。")
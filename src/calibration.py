@@ -0,0 +1,380 @@
+"""
+記録した（環境光, ユーザーが手動で選んだ輝度）の組から応答カーブを推定する校正モジュール
+
+トレースファイルの場合は、ユーザーが手動で輝度を変更したサイクル（override 列）のみを使う。
+自動で設定した輝度（applied 列）は現在のカーブの出力そのものであり、当てはめても
+現在のカーブが再現されるだけのため使わない。
+
+どちらのカーブも、サンプルを環境光ごとの集計値（件数・合計・二乗和）にまとめてから
+NumPyで最小二乗法を解くため、数十万件のサンプルでも短時間で推定できる。
+"""
+from __future__ import annotations
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from .config import resolve_config_path
+from .lazy import LazyModule
+from .logger import logger
+from .mapping import CURVE_GAMMA, CURVE_LINEAR, CURVE_PIECEWISE, DEFAULT_LUT_SIZE, MAX_AMBIENT, ResponseCurve
+from .trace import TRACE_MAGIC, read_traces
+
+np = LazyModule('numpy')
+
+# 推定するカーブの指定（auto は両方を推定して選ぶ）
+CALIBRATION_AUTO = 'auto'
+CALIBRATION_CURVES = (CALIBRATION_AUTO, CURVE_PIECEWISE, CURVE_GAMMA)
+
+# 折れ線カーブの点の数（環境光 0-255 を等間隔に区切る）
+DEFAULT_KNOTS = 9
+
+# ガンマの探索範囲と、粗い探索・細かい探索の分割数
+GAMMA_RANGE = (0.2, 5.0)
+GAMMA_GRID_SIZE = 64
+
+# 折れ線の点の間をなめらかにつなぐ正則化の強さ（データのない区間の値を補間するため）
+SMOOTHING = 1e-3
+
+# auto の場合、折れ線カーブの誤差がガンマカーブのこの割合未満なら折れ線を選ぶ
+AUTO_IMPROVEMENT = 0.95
+
+@dataclass
+class CalibrationResult:
+    """推定した応答カーブと輝度範囲"""
+    curve: str
+    min_brightness: int
+    max_brightness: int
+    gamma: Optional[float] = None
+    points: List[Tuple[float, float]] = field(default_factory=list)
+    rmse: float = 0.0
+    samples: int = 0
+
+    def config_values(self) -> Dict[str, Any]:
+        """設定ファイルに書き込む値"""
+        values: Dict[str, Any] = {
+            'min_brightness': self.min_brightness,
+            'max_brightness': self.max_brightness,
+            'curve': self.curve,
+        }
+        if self.curve == CURVE_GAMMA:
+            values['curve_gamma'] = self.gamma
+        elif self.curve == CURVE_PIECEWISE:
+            values['curve_points'] = [list(point) for point in self.points]
+        return values
+
+    def response_curve(self) -> ResponseCurve:
+        """推定結果のカーブ（輝度調整で実際に使われるもの）"""
+        if self.curve == CURVE_GAMMA:
+            return ResponseCurve(CURVE_GAMMA, gamma=self.gamma)
+        if self.curve == CURVE_PIECEWISE:
+            return ResponseCurve(CURVE_PIECEWISE, points=self.points)
+        return ResponseCurve(CURVE_LINEAR)
+
+
+class _Bins:
+    """環境光を細かい区間に分け、区間ごとの件数・輝度の合計・二乗和を集計したもの"""
+
+    def __init__(self, ambient: np.ndarray, brightness: np.ndarray, size: int = DEFAULT_LUT_SIZE):
+        scale = (size - 1) / MAX_AMBIENT
+        index = np.rint(np.clip(ambient, 0, MAX_AMBIENT) * scale).astype(np.intp)
+        counts = np.bincount(index, minlength=size).astype(np.float64)
+        used = counts > 0
+        # 空の区間は除いておく（以降の計算は使われた区間の数に比例する）
+        self.ambient = np.flatnonzero(used) / scale
+        self.counts = counts[used]
+        self.sums = np.bincount(index, brightness, minlength=size)[used]
+        self.squares = np.bincount(index, brightness * brightness, minlength=size)[used]
+        self.total = float(self.counts.sum())
+
+    def rss(self, predictions: np.ndarray) -> np.ndarray:
+        """区間ごとの予測値（最後の軸）に対する残差平方和"""
+        return (
+            self.squares.sum()
+            - 2 * (predictions * self.sums).sum(axis=-1)
+            + (predictions * predictions * self.counts).sum(axis=-1)
+        )
+
+
+def load_samples(path: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    校正用のサンプルを読み込む
+
+    トレースファイル（src.trace）の場合は、ユーザーが手動で輝度を変更したサイクルの
+    環境光と手動で設定された輝度を読み込む。それ以外は1列目が環境光（0-255）、
+    2列目が輝度（%）のCSVとして読み込む（1行目の見出しは省略可）。
+
+    Args:
+        path (str): サンプルのファイル
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (環境光, 輝度)（値が欠けているサンプルは除く）
+
+    Raises:
+        ValueError: トレースファイルに手動で変更した輝度の記録がない場合
+    """
+    with open(path, 'rb') as f:
+        head = f.read(len(TRACE_MAGIC))
+
+    if head == TRACE_MAGIC:
+        trace = read_traces(path)
+        brightness = np.asarray(trace['override'], dtype=np.float64)
+        manual = np.isfinite(brightness)
+        if not manual.any():
+            raise ValueError(
+                f"'{path}' に手動で変更した輝度の記録がありません"
+                "（trace_file を設定したデーモンの実行中に輝度を手動で変更すると記録されます）。"
+            )
+        ambient = np.asarray(trace['ambient'], dtype=np.float64)[manual]
+        brightness = brightness[manual]
+    else:
+        with open(path, encoding='utf-8') as f:
+            first_line = f.readline()
+        try:
+            float(first_line.replace(',', ' ').split()[0])
+            skiprows = 0
+        except (ValueError, IndexError):
+            skiprows = 1
+        data = np.loadtxt(path, delimiter=',', usecols=(0, 1), ndmin=2, skiprows=skiprows)
+        ambient, brightness = data[:, 0], data[:, 1]
+
+    valid = np.isfinite(ambient) & np.isfinite(brightness)
+    return np.clip(ambient[valid], 0, MAX_AMBIENT), np.clip(brightness[valid], 0, 100)
+
+
+def fit_piecewise(ambient: np.ndarray, brightness: np.ndarray,
+                  knots: int = DEFAULT_KNOTS) -> CalibrationResult:
+    """
+    単調増加の折れ線カーブを推定する
+
+    環境光を等間隔に区切った点の輝度を、線形補間の最小二乗法（正規方程式）で求め、
+    隣り合う点の逆転は Pool Adjacent Violators で解消する。
+
+    Args:
+        ambient (np.ndarray): 環境光（0-255）
+        brightness (np.ndarray): ユーザーが選んだ輝度（%）
+        knots (int): 折れ線の点の数
+
+    Returns:
+        CalibrationResult: 推定結果
+    """
+    knots = max(2, knots)
+    bins = _Bins(ambient, brightness)
+    position = bins.ambient / MAX_AMBIENT * (knots - 1)
+    left = np.minimum(position.astype(np.intp), knots - 2)
+    right_weight = position - left
+    left_weight = 1.0 - right_weight
+
+    # 正規方程式（各サンプルは隣り合う2点のみに重みを持つため、三重対角になる）
+    normal = np.zeros((knots, knots))
+    diagonal = (
+        np.bincount(left, left_weight ** 2 * bins.counts, knots)
+        + np.bincount(left + 1, right_weight ** 2 * bins.counts, knots)
+    )
+    off_diagonal = np.bincount(left, left_weight * right_weight * bins.counts, knots - 1)
+    normal[np.arange(knots), np.arange(knots)] = diagonal
+    normal[np.arange(knots - 1), np.arange(1, knots)] = off_diagonal
+    normal[np.arange(1, knots), np.arange(knots - 1)] = off_diagonal
+    rhs = np.bincount(left, left_weight * bins.sums, knots) + \
+        np.bincount(left + 1, right_weight * bins.sums, knots)
+
+    # 2階差分の罰則項（データのない点を前後の点から補間し、行列を正則にする）
+    second_difference = np.diff(np.eye(knots), n=2, axis=0)
+    penalty = SMOOTHING * max(float(diagonal.mean()), 1.0)
+    levels = np.linalg.solve(normal + penalty * second_difference.T @ second_difference, rhs)
+
+    levels = np.clip(_isotonic(levels, diagonal + 1e-9), 0, 100)
+    min_brightness = int(round(levels[0]))
+    max_brightness = int(round(levels[-1]))
+    xs = np.linspace(0, MAX_AMBIENT, knots)
+
+    if max_brightness <= min_brightness:
+        # 輝度が環境光によらず一定の場合
+        result = CalibrationResult(CURVE_LINEAR, min_brightness, min_brightness)
+    else:
+        fractions = np.clip((levels - min_brightness) / (max_brightness - min_brightness), 0, 1)
+        points = [(round(float(x), 2), round(float(y), 4)) for x, y in zip(xs, fractions)]
+        result = CalibrationResult(CURVE_PIECEWISE, min_brightness, max_brightness, points=points)
+    return _evaluate(result, bins)
+
+
+def fit_gamma(ambient: np.ndarray, brightness: np.ndarray) -> CalibrationResult:
+    """
+    ガンマカーブ（輝度 = 最小 + (最大 - 最小) × (環境光/255)^γ）を推定する
+
+    γの候補ごとに最小・最大輝度を線形の最小二乗法で求め（全候補をまとめて計算する）、
+    誤差が最小の候補の周辺をもう一度細かく探索する。
+
+    Args:
+        ambient (np.ndarray): 環境光（0-255）
+        brightness (np.ndarray): ユーザーが選んだ輝度（%）
+
+    Returns:
+        CalibrationResult: 推定結果
+    """
+    bins = _Bins(ambient, brightness)
+    log_t = np.log(np.maximum(bins.ambient / MAX_AMBIENT, 1e-12))
+
+    grid = np.geomspace(*GAMMA_RANGE, GAMMA_GRID_SIZE)
+    best = _best_gamma(grid, log_t, bins)
+    step = grid[1] / grid[0]
+    fine_grid = np.geomspace(best[0] / step, best[0] * step, GAMMA_GRID_SIZE)
+    gamma, offset, scale = _best_gamma(fine_grid, log_t, bins)
+
+    min_brightness = int(round(min(max(offset, 0.0), 100.0)))
+    max_brightness = int(round(min(max(offset + scale, 0.0), 100.0)))
+    if max_brightness <= min_brightness:
+        result = CalibrationResult(CURVE_LINEAR, min_brightness, min_brightness)
+    else:
+        result = CalibrationResult(CURVE_GAMMA, min_brightness, max_brightness, gamma=round(gamma, 4))
+    return _evaluate(result, bins)
+
+
+def _best_gamma(gammas: np.ndarray, log_t: np.ndarray, bins: _Bins) -> Tuple[float, float, float]:
+    """
+    γの候補ごとに (最小輝度, 輝度の幅) を重み付き最小二乗法で求め、誤差が最小のものを返す
+
+    Returns:
+        Tuple[float, float, float]: (γ, 最小輝度, 輝度の幅)
+    """
+    # 候補 × 区間の基底 (環境光/255)^γ
+    basis = np.exp(gammas[:, np.newaxis] * log_t[np.newaxis, :])
+    weights = bins.counts / bins.total
+    mean_basis = basis @ weights
+    mean_brightness = bins.sums.sum() / bins.total
+    covariance = basis @ (bins.sums / bins.total) - mean_basis * mean_brightness
+    variance = (basis * basis) @ weights - mean_basis ** 2
+    # 単調増加になるよう、輝度の幅は0以上に制限する
+    scales = np.maximum(covariance / np.maximum(variance, 1e-12), 0.0)
+    offsets = mean_brightness - scales * mean_basis
+
+    predictions = offsets[:, np.newaxis] + scales[:, np.newaxis] * basis
+    index = int(np.argmin(bins.rss(predictions)))
+    return float(gammas[index]), float(offsets[index]), float(scales[index])
+
+
+def _isotonic(values: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """重み付きの Pool Adjacent Violators で単調非減少な列に直す"""
+    blocks: List[List[float]] = []  # [重み付き平均, 重み, 要素数]
+    for value, weight in zip(values.tolist(), weights.tolist()):
+        blocks.append([value, weight, 1])
+        while len(blocks) > 1 and blocks[-2][0] > blocks[-1][0]:
+            value2, weight2, size2 = blocks.pop()
+            value1, weight1, size1 = blocks[-1]
+            total = weight1 + weight2
+            blocks[-1] = [(value1 * weight1 + value2 * weight2) / total, total, size1 + size2]
+    return np.concatenate([np.full(size, value) for value, _, size in blocks])
+
+
+def _evaluate(result: CalibrationResult, bins: _Bins) -> CalibrationResult:
+    """輝度調整で実際に使われるカーブ（整数の輝度範囲、ルックアップテーブル）で誤差を計算する"""
+    predictions = result.response_curve().map_many(
+        bins.ambient, result.min_brightness, result.max_brightness
+    )
+    result.rmse = float(np.sqrt(max(float(bins.rss(predictions)), 0.0) / bins.total))
+    result.samples = int(bins.total)
+    return result
+
+
+def calibrate(ambient: np.ndarray, brightness: np.ndarray, curve: str = CALIBRATION_AUTO,
+              knots: int = DEFAULT_KNOTS) -> CalibrationResult:
+    """
+    応答カーブを推定する
+
+    Args:
+        ambient (np.ndarray): 環境光（0-255）
+        brightness (np.ndarray): ユーザーが選んだ輝度（%）
+        curve (str): 推定するカーブ（'auto', 'piecewise', 'gamma'）
+            auto の場合は、折れ線カーブの誤差が十分に小さい場合のみ折れ線を選ぶ
+        knots (int): 折れ線カーブの点の数
+
+    Returns:
+        CalibrationResult: 推定結果
+
+    Raises:
+        ValueError: サンプルがない場合
+    """
+    ambient = np.asarray(ambient, dtype=np.float64)
+    brightness = np.asarray(brightness, dtype=np.float64)
+    if ambient.size == 0:
+        raise ValueError("校正に使えるサンプルがありません。")
+
+    if curve == CURVE_PIECEWISE:
+        return fit_piecewise(ambient, brightness, knots)
+    if curve == CURVE_GAMMA:
+        return fit_gamma(ambient, brightness)
+
+    gamma_result = fit_gamma(ambient, brightness)
+    piecewise_result = fit_piecewise(ambient, brightness, knots)
+    if piecewise_result.rmse < gamma_result.rmse * AUTO_IMPROVEMENT:
+        return piecewise_result
+    return gamma_result
+
+
+def write_calibration(result: CalibrationResult, path: str):
+    """
+    推定結果を設定ファイルに書き込む（他の設定値はそのまま残す）
+
+    デーモンが設定ファイルの変更を監視していても書きかけの内容を読まないよう、
+    一時ファイルに書いてから置き換える。
+
+    Args:
+        result (CalibrationResult): 推定結果
+        path (str): 設定ファイルのパス
+    """
+    config: Dict[str, Any] = {}
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            config = json.load(f)
+
+    # 以前の校正で書き込んだ、今回のカーブでは使わない値は削除する
+    for key in ('curve_gamma', 'curve_points'):
+        config.pop(key, None)
+    config.update(result.config_values())
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    os.replace(temp_path, path)
+
+
+def main(samples_path: str, curve: str = CALIBRATION_AUTO, knots: int = DEFAULT_KNOTS,
+         config_path: Optional[str] = None, dry_run: bool = False) -> int:
+    """
+    calibrate サブコマンドのエントリーポイント
+
+    Args:
+        samples_path (str): サンプルのファイル（CSVまたはトレースファイル）
+        curve (str): 推定するカーブ（'auto', 'piecewise', 'gamma'）
+        knots (int): 折れ線カーブの点の数
+        config_path (str, optional): 書き込む設定ファイルのパス（省略時は config.json）
+        dry_run (bool): Trueの場合、推定結果を表示するのみで設定ファイルに書き込まない
+
+    Returns:
+        int: 終了コード（0=成功）
+    """
+    try:
+        ambient, brightness = load_samples(samples_path)
+        result = calibrate(ambient, brightness, curve=curve, knots=knots)
+    except (OSError, ValueError) as e:
+        logger.error(f"校正に失敗しました: {e}")
+        return 1
+
+    logger.info(
+        f"校正結果: カーブ={result.curve}, 最小輝度={result.min_brightness}, "
+        f"最大輝度={result.max_brightness}, 誤差(RMSE)={result.rmse:.2f}% "
+        f"(サンプル数: {result.samples})"
+    )
+    values = json.dumps(result.config_values(), ensure_ascii=False)
+    if dry_run:
+        logger.info(f"設定値: {values}")
+        return 0
+
+    path = resolve_config_path(config_path)
+    try:
+        write_calibration(result, path)
+    except (OSError, ValueError) as e:
+        logger.error(f"設定ファイル '{path}' に書き込めませんでした: {e}")
+        return 1
+    logger.info(f"設定ファイル '{path}' に書き込みました: {values}")
+    return 0
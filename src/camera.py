@@ -1,24 +1,218 @@
 """
 Webカメラを使用して周囲の輝度を計測するモジュール
 """
+from __future__ import annotations
+import logging
+import math
 import time
-import cv2
-import numpy as np
-from typing import Optional, List, Tuple
+from typing import Any, Dict, Optional, List, Sequence, Tuple
+from .config import BrightnessConfig
+from .lazy import LazyModule
 from .logger import logger
+from .metrics import metrics
+from .roi import DEFAULT_VIGNETTE_STRENGTH, WEIGHT_NONE, FrameRegions, Region
+from .sources import FrameSource, create_frame_source
+
+# OpenCVとnumpyは読み込みに時間がかかるため、カメラを使う時点で読み込む
+cv2 = LazyModule('cv2')
+np = LazyModule('numpy')
+
+# CAP_PROP_FPS が取得できない場合に仮定するフレームレート
+DEFAULT_CAMERA_FPS = 30.0
+
+# CAP_PROP_AUTO_EXPOSURE で手動露出/自動露出を指定する値（V4L2, DirectShowの順に試す）
+MANUAL_EXPOSURE_MODES = (1, 0.25)
+AUTO_EXPOSURE_MODES = (3, 0.75)
+
+# 読み戻した値と設定値の比がこの倍率以内なら、実際の値で設定値での輝度に換算する
+# （これを超える場合は単位が異なる、またはバックエンドが値を無視したとみなす）
+EXPOSURE_MAX_RATIO = 4.0
+
+# 輝度のみを読み取る場合に要求する画素形式（Y0 U Y1 V の順に並ぶ YUV 4:2:2）
+RAW_LUMA_FOURCC = 'YUYV'
+
+# YUYVのY（限定範囲16-235）を、BGRに変換してからグレースケールにした場合の値（0-255）に合わせる係数
+LIMITED_RANGE_OFFSET = 16.0
+LIMITED_RANGE_SCALE = 255.0 / 219.0
+
+# ITU-R BT.601 の輝度係数（cv2.COLOR_BGR2GRAY と同じ重み、BGRの順）
+LUMA_WEIGHTS = (0.114, 0.587, 0.299)
+
+# サムネイルに縮小する前に、幅がサムネイルのこの倍数程度になるまで間引く
+# （INTER_AREA の処理量を元の解像度ではなくサムネイルの大きさに比例させる）
+THUMBNAIL_DECIMATION_FACTOR = 2
+
+# 測定の早期終了に使う信頼区間の係数（正規分布の95%）
+EARLY_STOP_Z = 1.96
+
+# CPU時間の予算を設定した場合に、解像度・フレームレートの指定がなければ要求する値
+BUDGET_CAPTURE_SIZE = (320, 240)
+BUDGET_CAPTURE_FPS = 15.0
+
+# CPU時間の予算を設定した場合の、OpenCVが内部で使うスレッド数の上限
+BUDGET_OPENCV_THREADS = 1
+
+class RunningStats:
+    """
+    輝度の平均と分散を、値を保持せずに逐次計算するクラス（Welfordのアルゴリズム）
+    """
+    
+    __slots__ = ('count', 'mean', '_m2', 'minimum', 'maximum')
+    
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        # 平均からの偏差の二乗和
+        self._m2 = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+    
+    def add(self, value: float):
+        """値を1つ追加する"""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+    
+    @property
+    def variance(self) -> float:
+        """標本分散（2つ未満の場合は0）"""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+    
+    @property
+    def std(self) -> float:
+        """標準偏差（母分散から計算、np.std と同じ）"""
+        return math.sqrt(self._m2 / self.count) if self.count else 0.0
+    
+    def half_width(self, z: float = EARLY_STOP_Z) -> float:
+        """
+        平均の信頼区間の半幅
+        
+        Args:
+            z (float): 信頼区間の係数
+            
+        Returns:
+            float: 半幅（2つ未満の場合は無限大）
+        """
+        if self.count < 2:
+            return math.inf
+        return z * math.sqrt(self.variance / self.count)
 
 class AmbientLightSensor:
     """Webカメラを使用して周囲の輝度を検出するクラス"""
     
-    def __init__(self, camera_index: int = 0):
+    def __init__(self, camera_index: int = 0, sample_stride: int = 1,
+                 thumbnail_size: int = 0, luma_weighted: bool = False,
+                 max_drain_frames: int = 4, warmup_timeout: float = 2.0,
+                 warmup_tolerance: float = 1.0, warmup_stable_frames: int = 3,
+                 exposure_lock: bool = False, exposure_value: float = 156.0,
+                 gain_value: float = 64.0, frame_source: str = '',
+                 source: Optional[FrameSource] = None, early_stop_tolerance: float = 0.0,
+                 early_stop_min_samples: int = 5, roi: Sequence[Region] = (),
+                 weight_map: str = WEIGHT_NONE,
+                 vignette_strength: float = DEFAULT_VIGNETTE_STRENGTH,
+                 raw_luma: bool = False, cpu_budget_ms: float = 0.0,
+                 cpu_duty_cycle: float = 0.0, capture_width: int = 0,
+                 capture_height: int = 0, capture_fps: float = 0.0):
         """
         AmbientLightSensorを初期化
         
         Args:
             camera_index (int): 使用するカメラのインデックス（デフォルト=0）
+            sample_stride (int): 輝度計算時に縦横何画素ごとに1画素を使うか（1=全画素）
+            thumbnail_size (int): 0より大きい場合、輝度計算前にこの幅のサムネイルへ
+                INTER_AREAで縮小する（sample_strideより優先）
+            luma_weighted (bool): Trueの場合、グレースケール変換を行わず
+                BGR各チャンネルの平均から輝度を直接計算する
+            max_drain_frames (int): サンプル取得前にgrab()で読み捨てる
+                バッファ済みフレームの最大数
+            warmup_timeout (float): カメラを開いた後の露出安定待ちの最大時間（秒）
+            warmup_tolerance (float): 連続するフレームの輝度差がこの値未満なら安定とみなす
+            warmup_stable_frames (int): 安定とみなすのに必要な連続フレーム数
+            exposure_lock (bool): Trueの場合、カメラを開いた後に自動露出を無効にし、
+                露出とゲインを固定する
+            exposure_value (float): 固定する露出値（CAP_PROP_EXPOSURE、バックエンド依存の単位）
+            gain_value (float): 固定するゲイン値（CAP_PROP_GAIN）
+            frame_source (str): フレームの取得元の指定（create_frame_source を参照、''=カメラ）
+            source (FrameSource, optional): 使用するフレームの取得元
+                指定した場合は camera_index と frame_source より優先する
+            early_stop_tolerance (float): 0より大きい場合、平均輝度の95%信頼区間の半幅が
+                この値以下になった時点で測定を終了する（0=測定時間の間すべてサンプリングする）
+            early_stop_min_samples (int): 早期終了する前に必要な最小サンプル数
+            roi (Sequence[Region]): 輝度の推定に使う領域（(左端, 上端, 幅, 高さ) の割合、空=フレーム全体）
+            weight_map (str): 画素の重み（''=均等、'center'=中央重視、'vignette'=周辺減光の補正）
+            vignette_strength (float): 周辺減光の強さ（'vignette' の場合のみ使用）
+            raw_luma (bool): Trueの場合、カメラにYUYV形式を要求してBGRへの変換を無効にし、
+                Y（輝度）の値を直接平均する（対応していないカメラでは通常の読み取りに戻す）
+            cpu_budget_ms (float): 0より大きい場合、1回の測定で使うCPU時間の上限（ミリ秒）
+                次のフレームを処理すると超える時点でサンプリングを終了する
+            cpu_duty_cycle (float): 0より大きい場合、前回の測定の開始からの経過時間に対する
+                測定のCPU時間の割合の上限（cpu_budget_ms と両方指定した場合は厳しい方を使う）
+            capture_width (int): カメラに要求するフレームの幅（0=カメラの既定値、
+                CPU時間の予算を設定した場合は BUDGET_CAPTURE_SIZE）
+            capture_height (int): カメラに要求するフレームの高さ（capture_width と同様）
+            capture_fps (float): カメラに要求するフレームレート（0=カメラの既定値、
+                CPU時間の予算を設定した場合は BUDGET_CAPTURE_FPS）
         """
         self.camera_index = camera_index
+        self.sample_stride = max(1, int(sample_stride))
+        self.thumbnail_size = max(0, int(thumbnail_size))
+        self.luma_weighted = luma_weighted
+        self.max_drain_frames = max(0, int(max_drain_frames))
+        self.warmup_timeout = max(0.0, warmup_timeout)
+        self.warmup_tolerance = max(0.0, warmup_tolerance)
+        self.warmup_stable_frames = max(1, int(warmup_stable_frames))
+        self.last_warmup_duration: Optional[float] = None
+        # 領域も重みも指定しない場合は、従来どおりフレーム全体の平均を使う
+        self.regions: Optional[FrameRegions] = None
+        if roi or weight_map != WEIGHT_NONE:
+            self.regions = FrameRegions(roi, weight_map, vignette_strength)
+        self.early_stop_tolerance = max(0.0, early_stop_tolerance)
+        self.early_stop_min_samples = max(2, int(early_stop_min_samples))
+        self.cpu_budget_ms = max(0.0, cpu_budget_ms)
+        self.cpu_duty_cycle = max(0.0, min(1.0, cpu_duty_cycle))
+        self.capture_width = max(0, int(capture_width))
+        self.capture_height = max(0, int(capture_height))
+        self.capture_fps = max(0.0, capture_fps)
+        # 最後の測定で平均に使ったフレーム数と、測定に要した時間・CPU時間（秒）
+        self.last_sample_count = 0
+        self.last_measure_duration: Optional[float] = None
+        self.last_cpu_time: Optional[float] = None
+        # CPU時間の割合の予算を求めるための、前回の測定の開始時刻
+        self._last_measure_start: Optional[float] = None
+        self.exposure_lock = exposure_lock
+        self.exposure_value = exposure_value
+        self.gain_value = gain_value
+        self.exposure_locked = False
+        # 実際の露出・ゲインを設定値に換算するための係数
+        self._exposure_scale = 1.0
+        self.raw_luma = raw_luma
+        self.raw_luma_active = False
+        # YUYVのフレームが1行のバッファとして返される場合に使う (高さ, 幅)
+        self._raw_frame_size: Tuple[int, int] = (0, 0)
+        self.frame_source = frame_source
+        self.source = source
         self.camera = None
+        self.camera_fps = DEFAULT_CAMERA_FPS
+        # ファイルなどの取得元で、1サンプルごとに進めるフレーム数
+        self._replay_stride = 1
+        # この時間より早く返ったgrab()はドライバーのバッファ済みフレームとみなす
+        self._fresh_grab_threshold = 0.5 / DEFAULT_CAMERA_FPS
+    
+    @classmethod
+    def from_config(cls, config: BrightnessConfig) -> 'AmbientLightSensor':
+        """
+        設定からAmbientLightSensorを作成する
+        
+        Args:
+            config (BrightnessConfig): 使用する設定
+            
+        Returns:
+            AmbientLightSensor: 設定を反映したセンサー
+        """
+        return cls(**sensor_settings(config))
     
     def __enter__(self):
         """コンテキストマネージャーの開始（カメラを開く）"""
@@ -31,37 +225,307 @@ class AmbientLightSensor:
     
     def open(self) -> bool:
         """
-        カメラデバイスを開く
+        カメラデバイス（またはフレームの取得元）を開く
         
         Returns:
             bool: カメラが正常に開かれたかどうか
         """
         try:
-            self.camera = cv2.VideoCapture(self.camera_index)
+            source = self.source
+            if source is None:
+                source = create_frame_source(self.frame_source, self.camera_index)
+            
+            with metrics.time('camera_open'):
+                opened = source.open()
+            self.camera = source
             
-            if not self.camera.isOpened():
-                logger.error(f"カメラ（インデックス:{self.camera_index}）を開けませんでした。")
+            if not opened:
+                logger.error(f"フレームの取得元（{self._source_label()}）を開けませんでした。")
                 return False
                 
-            logger.debug(f"カメラ（インデックス:{self.camera_index}）を開きました。")
-            # カメラの準備時間を少し待つ
-            time.sleep(2)
+            logger.debug("フレームの取得元（%s）を開きました。", self._source_label())
+            
+            if self.live:
+                # フレームレートを読み取る前に、要求する解像度・フレームレートを設定する
+                self.configure_capture()
+            
+            fps = float(self.camera.get(cv2.CAP_PROP_FPS))
+            if fps <= 0:
+                fps = DEFAULT_CAMERA_FPS
+            self.camera_fps = fps
+            self._fresh_grab_threshold = 0.5 / fps
+            
+            if not self.live:
+                # 録画・合成フレームは露出が変化しないため、ウォームアップしない
+                return True
+            
+            if self.exposure_lock:
+                self.lock_exposure()
+            
+            if self.raw_luma:
+                self.enable_raw_luma()
+            
+            # 自動露出（または固定後の露出）が安定するまで待つ
+            self.warm_up()
             return True
             
         except Exception as e:
             logger.error(f"カメラ初期化中にエラーが発生しました: {e}")
             return False
     
+    @property
+    def budgeted(self) -> bool:
+        """CPU時間の予算が設定されているかどうか"""
+        return self.cpu_budget_ms > 0 or self.cpu_duty_cycle > 0
+    
+    def configure_capture(self):
+        """
+        要求する解像度・フレームレートをカメラに設定し、CPU時間の予算がある場合は
+        OpenCVのスレッド数を制限する
+        
+        バックエンドが値を無視する場合もあるため、実際の値を読み戻してログに記録する。
+        """
+        width, height, fps = self.capture_width, self.capture_height, self.capture_fps
+        if self.budgeted:
+            width = width or BUDGET_CAPTURE_SIZE[0]
+            height = height or BUDGET_CAPTURE_SIZE[1]
+            fps = fps or BUDGET_CAPTURE_FPS
+            # デコードや縮小のためのスレッドプールを起動させない（プロセス全体の設定）
+            cv2.setNumThreads(BUDGET_OPENCV_THREADS)
+        
+        requested = [
+            (prop_id, value) for prop_id, value in (
+                (cv2.CAP_PROP_FRAME_WIDTH, width),
+                (cv2.CAP_PROP_FRAME_HEIGHT, height),
+                (cv2.CAP_PROP_FPS, fps),
+            ) if value > 0
+        ]
+        if not requested:
+            return
+        for prop_id, value in requested:
+            self.camera.set(prop_id, value)
+        
+        logger.info(
+            "カメラの解像度 %dx%d・フレームレート %.1f を要求しました（実際の値: %dx%d・%.1f）。",
+            width, height, fps,
+            int(self.camera.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            int(self.camera.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            float(self.camera.get(cv2.CAP_PROP_FPS))
+        )
+    
+    @property
+    def live(self) -> bool:
+        """開いている取得元がフレームの到着を待つ（実時間で動く）ものかどうか"""
+        return getattr(self.camera, 'live', True)
+    
+    def _source_label(self) -> str:
+        """ログに表示する取得元の名前"""
+        if self.source is not None:
+            return type(self.source).__name__
+        return self.frame_source or f"インデックス:{self.camera_index}"
+    
+    def lock_exposure(self) -> bool:
+        """
+        自動露出を無効にし、露出とゲインを設定値に固定する
+        
+        バックエンドが値を丸めた場合は、読み戻した実際の露出・ゲインから換算係数を求め、
+        測定値を設定値で撮影した場合の輝度に換算する。バックエンドが露出を無視する場合
+        （set()が失敗する、または読み戻した値から換算できない場合）は自動露出に戻し、
+        通常の測定にフォールバックする。
+        
+        Returns:
+            bool: 露出を固定できたかどうか
+        """
+        self.exposure_locked = False
+        self._exposure_scale = 1.0
+        
+        if not any(self.camera.set(cv2.CAP_PROP_AUTO_EXPOSURE, mode)
+                   for mode in MANUAL_EXPOSURE_MODES):
+            logger.warning("カメラが手動露出に対応していないため、自動露出で測定します。")
+            return False
+        
+        exposure_applied = self.camera.set(cv2.CAP_PROP_EXPOSURE, self.exposure_value)
+        actual_exposure = float(self.camera.get(cv2.CAP_PROP_EXPOSURE))
+        
+        exposure_scale = _exposure_ratio(self.exposure_value, actual_exposure)
+        
+        if not exposure_applied or exposure_scale is None:
+            logger.warning(
+                f"露出値 {self.exposure_value} を設定できませんでした（実際の値: {actual_exposure}）。"
+                "自動露出で測定します。"
+            )
+            self.unlock_exposure()
+            return False
+        
+        # ゲインは固定できなくても露出の固定は有効とする（読み戻せれば実際の値で換算する）
+        gain_applied = self.camera.set(cv2.CAP_PROP_GAIN, self.gain_value)
+        actual_gain = float(self.camera.get(cv2.CAP_PROP_GAIN))
+        gain_scale = _exposure_ratio(self.gain_value, actual_gain)
+        
+        if not gain_applied:
+            logger.warning(f"ゲイン値 {self.gain_value} を設定できませんでした（実際の値: {actual_gain}）。")
+        if gain_scale is None:
+            logger.warning(f"実際のゲイン値 {actual_gain} からは換算できないため、ゲインは換算しません。")
+            gain_scale = 1.0
+        
+        self._exposure_scale = exposure_scale * gain_scale
+        self.exposure_locked = True
+        logger.info(
+            f"露出を固定しました: 露出={actual_exposure}, ゲイン={actual_gain}"
+            f"（設定値での輝度への換算係数: {self._exposure_scale:.3f}）"
+        )
+        return True
+    
+    def unlock_exposure(self):
+        """自動露出に戻す"""
+        self.exposure_locked = False
+        self._exposure_scale = 1.0
+        if self.camera is not None:
+            any(self.camera.set(cv2.CAP_PROP_AUTO_EXPOSURE, mode) for mode in AUTO_EXPOSURE_MODES)
+    
+    def enable_raw_luma(self) -> bool:
+        """
+        カメラにYUYV形式を要求し、BGRへの変換を無効にする
+        
+        バックエンドが画素形式の指定や変換の無効化に対応していない場合は、通常の読み取りに戻す。
+        
+        Returns:
+            bool: 輝度のみの読み取りを有効にできたかどうか
+        """
+        self.raw_luma_active = False
+        fourcc = cv2.VideoWriter_fourcc(*RAW_LUMA_FOURCC)
+        
+        self.camera.set(cv2.CAP_PROP_FOURCC, fourcc)
+        if int(self.camera.get(cv2.CAP_PROP_FOURCC)) != fourcc:
+            logger.warning(f"カメラが {RAW_LUMA_FOURCC} 形式に対応していないため、BGRに変換して測定します。")
+            return False
+        
+        if not self.camera.set(cv2.CAP_PROP_CONVERT_RGB, 0) or \
+                self.camera.get(cv2.CAP_PROP_CONVERT_RGB) != 0:
+            logger.warning("カメラがBGRへの変換の無効化に対応していないため、BGRに変換して測定します。")
+            self.camera.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+            return False
+        
+        self._raw_frame_size = (
+            int(self.camera.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            int(self.camera.get(cv2.CAP_PROP_FRAME_WIDTH))
+        )
+        self.raw_luma_active = True
+        logger.info(f"{RAW_LUMA_FOURCC} 形式の輝度を直接読み取ります。")
+        return True
+    
+    def disable_raw_luma(self):
+        """BGRへの変換を有効に戻す"""
+        self.raw_luma_active = False
+        if self.camera is not None:
+            self.camera.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+    
+    def _as_yuyv(self, frame: np.ndarray) -> Optional[np.ndarray]:
+        """
+        変換せずに読み取ったフレームを (高さ, 幅, 2) のYUYVの配列として参照する（コピーなし）
+        
+        Returns:
+            Optional[np.ndarray]: YUYVの配列、解釈できない形式（MJPEGなど）の場合はNone
+        """
+        if frame.ndim == 3 and frame.shape[2] == 2:
+            return frame
+        height, width = self._raw_frame_size
+        if height > 0 and width > 0 and frame.size == height * width * 2 and frame.flags.c_contiguous:
+            return frame.reshape(height, width, 2)
+        return None
+    
+    def warm_up(self) -> float:
+        """
+        自動露出が安定するまでフレームを読み続ける
+        
+        連続するフレームの平均輝度の変化が warmup_tolerance 未満の状態が
+        warmup_stable_frames 回続いた時点、または warmup_timeout 経過時点で終了する。
+        
+        Returns:
+            float: ウォームアップに要した時間（秒）
+        """
+        start_time = time.monotonic()
+        previous_brightness: Optional[float] = None
+        stable_count = 0
+        frame_count = 0
+        settled = False
+        
+        while time.monotonic() - start_time < self.warmup_timeout:
+            frame = self.capture_frame()
+            
+            if frame is None:
+                # 次のフレームが届くまで少し待つ
+                time.sleep(self._fresh_grab_threshold)
+                continue
+            
+            frame_count += 1
+            brightness = self.get_frame_brightness(frame)
+            
+            if previous_brightness is not None and \
+                    abs(brightness - previous_brightness) < self.warmup_tolerance:
+                stable_count += 1
+            else:
+                stable_count = 0
+            previous_brightness = brightness
+            
+            if stable_count >= self.warmup_stable_frames:
+                settled = True
+                break
+        
+        elapsed = time.monotonic() - start_time
+        self.last_warmup_duration = elapsed
+        metrics.observe('warmup', elapsed)
+        
+        if settled:
+            logger.info(f"カメラのウォームアップが完了しました: {elapsed:.2f}秒 ({frame_count}フレーム)")
+        else:
+            logger.info(
+                f"カメラのウォームアップがタイムアウトしました: {elapsed:.2f}秒 ({frame_count}フレーム)"
+            )
+        
+        return elapsed
+    
     def close(self):
         """カメラリソースを解放する"""
         if self.camera is not None:
             self.camera.release()
             self.camera = None
+            self.raw_luma_active = False
             logger.debug("カメラリソースを解放しました。")
     
+    def grab_latest(self) -> bool:
+        """
+        ドライバーにバッファされた古いフレームをデコードせずに読み捨て、
+        最新のフレームをgrab()した状態にする
+        
+        grab()がすぐに返った場合はバッファ済みの古いフレームとみなして
+        max_drain_frames 枚まで読み捨てを続け、新しいフレームの到着を待って
+        返った時点で終了する。
+        
+        ファイルなどの取得元の場合は、実時間のサンプリング間隔に相当するフレーム数だけ進める。
+        
+        Returns:
+            bool: フレームをgrab()できたかどうか
+        """
+        if not self.live:
+            return all(self.camera.grab() for _ in range(self._replay_stride))
+        
+        for _ in range(self.max_drain_frames + 1):
+            grab_start = time.monotonic()
+            
+            if not self.camera.grab():
+                return False
+            
+            if time.monotonic() - grab_start >= self._fresh_grab_threshold:
+                break
+        
+        return True
+    
     def capture_frame(self) -> Optional[np.ndarray]:
         """
-        1フレームをキャプチャする
+        最新の1フレームをキャプチャする
+        
+        デコード（retrieve()）は実際に使用するフレームに対してのみ行う。
         
         Returns:
             Optional[np.ndarray]: キャプチャされたフレーム、またはエラー時にNone
@@ -70,39 +534,152 @@ class AmbientLightSensor:
             logger.error("カメラが開かれていないため、フレームをキャプチャできません。")
             return None
         
-        ret, frame = self.camera.read()
+        with metrics.time('frame_read'):
+            if not self.grab_latest():
+                metrics.increment('failed_reads')
+                logger.warning("フレームを取得できませんでした。")
+                return None
+            
+            ret, frame = self.camera.retrieve()
         
         if not ret:
+            metrics.increment('failed_reads')
             logger.warning("フレームを読み取れませんでした。")
             return None
         
+        if self.raw_luma_active:
+            yuyv = self._as_yuyv(frame)
+            if yuyv is None:
+                logger.warning(
+                    f"カメラから {RAW_LUMA_FOURCC} 形式ではないフレーム（{frame.shape}）が返されたため、"
+                    "BGRに変換して測定します。"
+                )
+                self.disable_raw_luma()
+                metrics.increment('failed_reads')
+                return None
+            frame = yuyv
+        
+        metrics.increment('frames_captured')
+        return frame
+    
+    def reduce_frame(self, frame: np.ndarray) -> np.ndarray:
+        """
+        輝度計算に使う画素数を減らしたフレームを返す
+        
+        ストライドの場合は、frame[::sample_stride, ::sample_stride] と同じ大きさに
+        INTER_NEAREST で縮小する（OpenCVは連続していない配列を画素ごとにコピーするため、
+        スライスのビューより速い）。取り出す画素は、縦横が sample_stride で割り切れる場合は
+        スライスと同じだが、割り切れない場合は最近傍の補間で選ばれるため一部が異なる。
+        サムネイルの場合は、先に同じ方法でサムネイルの THUMBNAIL_DECIMATION_FACTOR 倍程度の
+        幅まで間引いてから INTER_AREA で縮小する。
+        
+        Args:
+            frame (np.ndarray): 元のフレーム
+            
+        Returns:
+            np.ndarray: 縮小（または間引き）されたフレーム
+        """
+        if self.thumbnail_size > 0:
+            height, width = frame.shape[:2]
+            if width > self.thumbnail_size:
+                thumbnail_height = max(1, round(height * self.thumbnail_size / width))
+                step = width // (self.thumbnail_size * THUMBNAIL_DECIMATION_FACTOR)
+                if step > 1:
+                    frame = _decimate(frame, step)
+                return cv2.resize(
+                    frame,
+                    (self.thumbnail_size, thumbnail_height),
+                    interpolation=cv2.INTER_AREA
+                )
+            return frame
+        
+        if self.sample_stride > 1:
+            return _decimate(frame, self.sample_stride)
+        
         return frame
     
     def get_frame_brightness(self, frame: np.ndarray) -> float:
         """
         フレームの平均輝度を計算
         
+        露出を固定している場合は、設定した露出・ゲインで撮影した場合の輝度に換算する。
+        
         Args:
             frame (np.ndarray): 分析するフレーム
             
         Returns:
             float: 平均輝度（0-255の範囲）
         """
+        with metrics.time('frame_brightness'):
+            return self._frame_brightness(frame)
+    
+    def _frame_brightness(self, frame: np.ndarray) -> float:
+        """フレームの平均輝度を計算する（get_frame_brightness の本体）"""
+        if self.regions is None:
+            avg_brightness = self._mean_brightness(self.reduce_frame(frame))
+        else:
+            avg_brightness = self._region_brightness(frame)
+        
+        if self.exposure_locked:
+            avg_brightness *= self._exposure_scale
+        
+        # 露出の換算や周辺減光の補正で上限を超えた場合も0-255に収める
+        return min(255.0, avg_brightness)
+    
+    def _mean_brightness(self, frame: np.ndarray) -> float:
+        """フレーム（または領域）の画素の平均輝度"""
+        if _is_yuyv(frame):
+            # Y と U/V が交互に並ぶ2チャンネルの画像として扱い、Yのチャンネルの平均を使う
+            return _expand_limited_range(cv2.mean(frame)[0])
+        
+        if self.luma_weighted:
+            # 輝度は各チャンネルの線形和なので、チャンネル平均の重み付き和と一致する
+            channel_means = cv2.mean(frame)
+            return float(sum(w * m for w, m in zip(LUMA_WEIGHTS, channel_means)))
+        
         # フレームをグレースケールに変換
         gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
         
         # 平均輝度を計算 (0-255)
-        avg_brightness = float(np.mean(gray_frame))
+        return float(cv2.mean(gray_frame)[0])
+    
+    def _region_brightness(self, frame: np.ndarray) -> float:
+        """
+        設定した領域の輝度を、領域の面積の割合で重み付けして平均する
         
-        return avg_brightness
+        領域はスライスしたビューとして参照するため、処理量は領域の面積に比例する。
+        """
+        height, width = frame.shape[:2]
+        brightness = 0.0
+        for index, (slices, share) in enumerate(self.regions.layout(height, width)):
+            region = self.reduce_frame(frame[slices])
+            weights = self.regions.weights(index, height, width, region.shape[:2])
+            if weights is None:
+                value = self._mean_brightness(region)
+            else:
+                if _is_yuyv(region):
+                    value = _expand_limited_range(np.dot(region[:, :, 0].reshape(-1), weights.reshape(-1)))
+                else:
+                    gray_region = cv2.cvtColor(region, cv2.COLOR_BGR2GRAY)
+                    value = float(np.dot(gray_region.reshape(-1), weights.reshape(-1)))
+            brightness += share * value
+        return brightness
     
     def measure_ambient_light(self, duration: float = 1.0, 
                              sample_interval: float = 0.1) -> Optional[float]:
         """
         指定された時間にわたって周囲の輝度を測定
         
+        early_stop_tolerance が設定されている場合は、early_stop_min_samples 以上の
+        サンプルを取得し、平均輝度の信頼区間が十分に狭くなった時点で測定時間の途中でも終了する。
+        CPU時間の予算が設定されている場合は、次のフレームを処理すると予算を超える時点で終了する
+        （少なくとも1フレームは処理する）。
+        
+        ファイルなどの取得元の場合は待機せず、測定時間とサンプリング間隔に相当する
+        フレームを読み取る（取得元の終わりに達した場合はそこまでのフレームで測定する）。
+        
         Args:
-            duration (float): 測定時間（秒）
+            duration (float): 測定時間（秒、早期終了する場合は上限）
             sample_interval (float): サンプリング間隔（秒）
             
         Returns:
@@ -112,47 +689,225 @@ class AmbientLightSensor:
             if not self.open():
                 return None
         
-        start_time = time.time()
-        brightness_readings: List[float] = []
+        start_time = time.monotonic()
+        cpu_start = time.process_time()
+        budget = self._cpu_budget(start_time, duration)
+        stats = RunningStats()
         
-        logger.debug(f"{duration}秒間の輝度測定を開始します...")
+        logger.debug("%s秒間の輝度測定を開始します...", duration)
         
         try:
-            while time.time() - start_time < duration:
-                frame = self.capture_frame()
-                
-                if frame is not None:
-                    brightness = self.get_frame_brightness(frame)
-                    brightness_readings.append(brightness)
-                    logger.debug(f"フレーム輝度: {brightness:.2f}")
-                
-                # 短い間隔でキャプチャ
-                time.sleep(sample_interval)
+            if not self.live:
+                self._replay(duration, sample_interval, stats, cpu_start, budget)
+            else:
+                while time.monotonic() - start_time < duration:
+                    frame = self.capture_frame()
+                    
+                    if frame is not None:
+                        stats.add(self.get_frame_brightness(frame))
+                        if self._converged(stats) or self._over_budget(stats, cpu_start, budget):
+                            break
+                    
+                    # 短い間隔でキャプチャ（この間に溜まったフレームは次回grab()で読み捨てる）
+                    time.sleep(sample_interval)
         
         except Exception as e:
             logger.error(f"輝度測定中にエラーが発生しました: {e}")
         
         # 測定結果の処理
-        if not brightness_readings:
+        elapsed = time.monotonic() - start_time
+        cpu_time = time.process_time() - cpu_start
+        self.last_sample_count = stats.count
+        self.last_measure_duration = elapsed
+        self.last_cpu_time = cpu_time
+        metrics.observe('measure_cpu', cpu_time)
+        if not stats.count:
             logger.error("有効な輝度データを取得できませんでした。")
             return None
         
-        # 平均輝度を計算
-        avg_brightness = float(np.mean(brightness_readings))
-        logger.info(f"測定結果: 平均輝度 = {avg_brightness:.2f} (サンプル数: {len(brightness_readings)})")
+        # フレームごとではなく、測定の終了時にまとめて記録する
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "フレーム輝度: 最小 %.2f / 最大 %.2f / 標準偏差 %.2f (フレーム数: %d)",
+                stats.minimum, stats.maximum, stats.std, stats.count
+            )
+        
+        logger.info(
+            f"測定結果: 平均輝度 = {stats.mean:.2f} "
+            f"(サンプル数: {stats.count}, 測定時間: {elapsed:.2f}秒, CPU時間: {cpu_time * 1e3:.1f}ミリ秒)"
+        )
+        
+        return stats.mean
+    
+    def _converged(self, stats: RunningStats) -> bool:
+        """
+        早期終了できるだけのサンプルが揃ったかどうか
         
-        return avg_brightness
+        Args:
+            stats (RunningStats): ここまでのサンプルの統計
+            
+        Returns:
+            bool: 平均輝度の信頼区間の半幅が許容値以下になったかどうか
+        """
+        if self.early_stop_tolerance <= 0 or stats.count < self.early_stop_min_samples:
+            return False
+        if stats.half_width() > self.early_stop_tolerance:
+            return False
+        metrics.increment('early_stops')
+        return True
+    
+    def _cpu_budget(self, now: float, duration: float) -> float:
+        """
+        今回の測定で使えるCPU時間（秒）を求め、測定の開始時刻を記録する
+        
+        Args:
+            now (float): 測定の開始時刻（time.monotonic()）
+            duration (float): 測定時間（秒、初回の割合の予算の基準にする）
+            
+        Returns:
+            float: CPU時間の上限（秒、予算がない場合は無限大）
+        """
+        previous, self._last_measure_start = self._last_measure_start, now
+        budget = math.inf
+        if self.cpu_budget_ms > 0:
+            budget = self.cpu_budget_ms / 1000.0
+        if self.cpu_duty_cycle > 0:
+            period = duration if previous is None else now - previous
+            budget = min(budget, self.cpu_duty_cycle * period)
+        return budget
+    
+    def _over_budget(self, stats: RunningStats, cpu_start: float, budget: float) -> bool:
+        """
+        次のフレームを処理するとCPU時間の予算を超えるかどうか
+        
+        Args:
+            stats (RunningStats): ここまでのサンプルの統計
+            cpu_start (float): 測定の開始時の time.process_time()
+            budget (float): CPU時間の上限（秒）
+            
+        Returns:
+            bool: ここまでの1フレームあたりのCPU時間で、もう1フレーム処理すると予算を超えるかどうか
+        """
+        if math.isinf(budget) or not stats.count:
+            return False
+        used = time.process_time() - cpu_start
+        if used * (stats.count + 1) / stats.count <= budget:
+            return False
+        metrics.increment('budget_stops')
+        return True
+    
+    def _replay(self, duration: float, sample_interval: float, stats: RunningStats,
+                cpu_start: float = 0.0, budget: float = math.inf):
+        """
+        ファイルなどの取得元から、実時間の測定と同じ間隔のフレームを待機せずに読み取る
+        
+        Args:
+            duration (float): 測定時間（秒）
+            sample_interval (float): サンプリング間隔（秒）
+            stats (RunningStats): 読み取った輝度を追加する統計
+            cpu_start (float): 測定の開始時の time.process_time()
+            budget (float): CPU時間の上限（秒）
+        """
+        frame_period = 1.0 / self.camera_fps
+        sample_period = max(sample_interval, frame_period)
+        self._replay_stride = max(1, round(sample_period / frame_period))
+        # 浮動小数点の誤差で1サンプル多くならないよう、わずかに差し引く
+        samples = max(1, math.ceil(duration / sample_period - 1e-9))
+        
+        for _ in range(samples):
+            frame = self.capture_frame()
+            if frame is None:
+                break
+            stats.add(self.get_frame_brightness(frame))
+            if self._converged(stats) or self._over_budget(stats, cpu_start, budget):
+                break
+
+
+def sensor_settings(config: BrightnessConfig) -> Dict[str, Any]:
+    """
+    設定のうちセンサーの動作に関係する値を取り出す
+    
+    Args:
+        config (BrightnessConfig): 使用する設定
+        
+    Returns:
+        Dict[str, Any]: AmbientLightSensorの引数
+    """
+    return dict(
+        sample_stride=config.sample_stride,
+        thumbnail_size=config.thumbnail_size,
+        luma_weighted=config.luma_weighted,
+        max_drain_frames=config.max_drain_frames,
+        warmup_timeout=config.warmup_timeout,
+        warmup_tolerance=config.warmup_tolerance,
+        warmup_stable_frames=config.warmup_stable_frames,
+        exposure_lock=config.exposure_lock,
+        exposure_value=config.exposure_value,
+        gain_value=config.gain_value,
+        frame_source=config.frame_source,
+        early_stop_tolerance=config.early_stop_tolerance,
+        early_stop_min_samples=config.early_stop_min_samples,
+        roi=tuple(config.roi),
+        weight_map=config.weight_map,
+        vignette_strength=config.vignette_strength,
+        raw_luma=config.raw_luma,
+        cpu_budget_ms=config.cpu_budget_ms,
+        cpu_duty_cycle=config.cpu_duty_cycle,
+        capture_width=config.capture_width,
+        capture_height=config.capture_height,
+        capture_fps=config.capture_fps
+    )
+
+
+def _decimate(frame: np.ndarray, step: int) -> np.ndarray:
+    """
+    frame[::step, ::step] と同じ大きさに最近傍の補間で縮小する
+
+    縦横が step で割り切れる場合はスライスと同じ画素になるが、割り切れない場合は
+    最近傍の補間が選ぶ画素のため、スライスとは一部の画素が異なる。
+    """
+    height, width = frame.shape[:2]
+    size = (-(-width // step), -(-height // step))
+    return cv2.resize(frame, size, interpolation=cv2.INTER_NEAREST)
+
+
+def _is_yuyv(frame: np.ndarray) -> bool:
+    """フレームが変換せずに読み取ったYUYV（2チャンネル）の画像かどうか"""
+    return frame.ndim == 3 and frame.shape[2] == 2
+
+
+def _expand_limited_range(luma: float) -> float:
+    """限定範囲のYの値を、BGRに変換した場合と同じ0-255の範囲に伸張する"""
+    return max(0.0, min(255.0, (float(luma) - LIMITED_RANGE_OFFSET) * LIMITED_RANGE_SCALE))
+
+
+def _exposure_ratio(expected: float, actual: float) -> Optional[float]:
+    """
+    設定値での輝度に換算する係数（設定値 / 実際の値）を返す
+
+    Returns:
+        Optional[float]: 一致する場合は1（単位によらない）、どちらかが正でない、
+            または比が EXPOSURE_MAX_RATIO を超えて換算できない場合はNone
+    """
+    if math.isclose(actual, expected):
+        return 1.0
+    if expected > 0 and actual > 0 and max(expected / actual, actual / expected) <= EXPOSURE_MAX_RATIO:
+        return expected / actual
+    return None
 
 
-def measure_ambient_brightness(capture_duration: float = 1.0) -> Optional[float]:
+def measure_ambient_brightness(capture_duration: float = 1.0,
+                               config: Optional[BrightnessConfig] = None) -> Optional[float]:
     """
     Webカメラを使用して周囲の平均輝度を測定する便利な関数
     
     Args:
         capture_duration (float): 測定時間（秒）
+        config (BrightnessConfig, optional): センサーの設定に使う設定
         
     Returns:
         Optional[float]: 平均輝度（0-255の範囲）、またはエラー時にNone
     """
-    with AmbientLightSensor() as sensor:
+    new_sensor = AmbientLightSensor.from_config(config) if config else AmbientLightSensor()
+    with new_sensor as sensor:
         return sensor.measure_ambient_light(duration=capture_duration)
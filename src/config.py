@@ -3,94 +3,518 @@
 """
 import os
 import json
-from dataclasses import dataclass
-from typing import Optional
+from types import MappingProxyType
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, Mapping, Optional, Tuple
 from .logger import logger
+from .lunar import BACKEND_CLI, DISPLAY_BACKENDS
+from .mapping import (
+    CURVE_LINEAR, CURVE_PIECEWISE, CURVES, DEFAULT_CURVE_GAMMA, DEFAULT_CURVE_LOG_FACTOR, MAX_AMBIENT
+)
+from .roi import (
+    DEFAULT_VIGNETTE_STRENGTH, WEIGHT_MAPS, WEIGHT_NONE, Region, clamp_region, parse_regions
+)
+from .scheduler import (
+    DEFAULT_CHANGE_THRESHOLD, DEFAULT_INTERVAL_BACKOFF, DEFAULT_MAX_INTERVAL, DEFAULT_MIN_INTERVAL,
+    QuietPeriod, parse_quiet_hours
+)
+from .trace import DEFAULT_TRACE_MAX_BYTES, MIN_TRACE_MAX_BYTES
 
 # --- デフォルト設定値 ---
 DEFAULT_MIN_BRIGHTNESS = 35
 DEFAULT_MAX_BRIGHTNESS = 80
 DEFAULT_CAPTURE_DURATION = 1
+DEFAULT_SAMPLE_STRIDE = 1
+DEFAULT_THUMBNAIL_SIZE = 0
+DEFAULT_MAX_DRAIN_FRAMES = 4
+DEFAULT_WARMUP_TIMEOUT = 2.0
+DEFAULT_WARMUP_TOLERANCE = 1.0
+DEFAULT_WARMUP_STABLE_FRAMES = 3
+DEFAULT_EXPOSURE_VALUE = 156.0
+DEFAULT_GAIN_VALUE = 64.0
+DEFAULT_EARLY_STOP_TOLERANCE = 0.0
+DEFAULT_EARLY_STOP_MIN_SAMPLES = 5
+DEFAULT_CPU_BUDGET_MS = 0.0
+DEFAULT_CPU_DUTY_CYCLE = 0.0
+DEFAULT_HYSTERESIS = 1.0
+DEFAULT_MIN_WRITE_INTERVAL = 0.0
+DEFAULT_TRANSITION_STEP = 0
+DEFAULT_TRANSITION_RATE = 10.0
 CONFIG_FILE = 'config.json'
 
-@dataclass
+def _validate_range(min_brightness: int, max_brightness: int,
+                    label: str = "設定") -> Tuple[int, int]:
+    """
+    輝度範囲を0-100にクランプし、min <= max を保証する
+    
+    Args:
+        min_brightness (int): 最小輝度
+        max_brightness (int): 最大輝度
+        label (str): 警告メッセージに使う設定の名前
+        
+    Returns:
+        Tuple[int, int]: 検証済みの (最小輝度, 最大輝度)
+    """
+    # 値の範囲を確認（0-100の間にクランプ）
+    min_brightness = max(0, min(100, min_brightness))
+    max_brightness = max(0, min(100, max_brightness))
+    
+    # min < maxを保証
+    if min_brightness > max_brightness:
+        logger.warning(
+            f"{label}の最小輝度({min_brightness})が最大輝度({max_brightness})より"
+            "大きいため、値を入れ替えます。"
+        )
+        min_brightness, max_brightness = max_brightness, min_brightness
+    
+    return min_brightness, max_brightness
+
+@dataclass(frozen=True)
+class DisplayRange:
+    """ディスプレイごとの輝度範囲を保持するデータクラス（変更不可）"""
+    min_brightness: int = DEFAULT_MIN_BRIGHTNESS
+    max_brightness: int = DEFAULT_MAX_BRIGHTNESS
+
+@dataclass(frozen=True)
 class BrightnessConfig:
-    """輝度設定を保持するデータクラス"""
+    """
+    輝度設定を保持するデータクラス
+    
+    変更できないため、値を変える場合は dataclasses.replace() で新しいオブジェクトを作る。
+    実行中の設定の再読み込みは参照の差し替えで行うため、途中まで反映された設定が見えることはない。
+    displays は渡された辞書のコピーを読み取り専用の MappingProxyType として保持する。
+    """
     min_brightness: int = DEFAULT_MIN_BRIGHTNESS
     max_brightness: int = DEFAULT_MAX_BRIGHTNESS
     capture_duration: float = DEFAULT_CAPTURE_DURATION
+    sample_stride: int = DEFAULT_SAMPLE_STRIDE
+    thumbnail_size: int = DEFAULT_THUMBNAIL_SIZE
+    luma_weighted: bool = False
+    max_drain_frames: int = DEFAULT_MAX_DRAIN_FRAMES
+    warmup_timeout: float = DEFAULT_WARMUP_TIMEOUT
+    warmup_tolerance: float = DEFAULT_WARMUP_TOLERANCE
+    warmup_stable_frames: int = DEFAULT_WARMUP_STABLE_FRAMES
+    exposure_lock: bool = False
+    exposure_value: float = DEFAULT_EXPOSURE_VALUE
+    gain_value: float = DEFAULT_GAIN_VALUE
+    early_stop_tolerance: float = DEFAULT_EARLY_STOP_TOLERANCE
+    early_stop_min_samples: int = DEFAULT_EARLY_STOP_MIN_SAMPLES
+    roi: Tuple[Region, ...] = ()
+    weight_map: str = WEIGHT_NONE
+    vignette_strength: float = DEFAULT_VIGNETTE_STRENGTH
+    raw_luma: bool = False
+    cpu_budget_ms: float = DEFAULT_CPU_BUDGET_MS
+    cpu_duty_cycle: float = DEFAULT_CPU_DUTY_CYCLE
+    capture_width: int = 0
+    capture_height: int = 0
+    capture_fps: float = 0.0
+    sensor_socket: str = ''
+    adaptive_interval: bool = False
+    min_interval: float = DEFAULT_MIN_INTERVAL
+    max_interval: float = DEFAULT_MAX_INTERVAL
+    interval_backoff: float = DEFAULT_INTERVAL_BACKOFF
+    change_threshold: float = DEFAULT_CHANGE_THRESHOLD
+    quiet_hours: Tuple[QuietPeriod, ...] = ()
+    hysteresis: float = DEFAULT_HYSTERESIS
+    min_write_interval: float = DEFAULT_MIN_WRITE_INTERVAL
+    display_backend: str = BACKEND_CLI
+    transition_step: int = DEFAULT_TRANSITION_STEP
+    transition_rate: float = DEFAULT_TRANSITION_RATE
+    curve: str = CURVE_LINEAR
+    curve_gamma: float = DEFAULT_CURVE_GAMMA
+    curve_log_factor: float = DEFAULT_CURVE_LOG_FACTOR
+    curve_points: Tuple[Tuple[float, float], ...] = ()
+    metrics_file: str = ''
+    frame_source: str = ''
+    trace_file: str = ''
+    trace_max_bytes: int = DEFAULT_TRACE_MAX_BYTES
+    # 読み取り専用の辞書はハッシュ値を持たないため、ハッシュ値の計算からは除く（比較には使う）
+    displays: Mapping[str, DisplayRange] = field(default_factory=dict, hash=False)
+    
+    def __post_init__(self):
+        """ディスプレイごとの輝度範囲を、呼び出し側の辞書と切り離した読み取り専用の辞書にする"""
+        object.__setattr__(self, 'displays', MappingProxyType(dict(self.displays)))
     
     def validate(self) -> 'BrightnessConfig':
         """
-        設定値の検証と修正を行う
+        設定値を検証し、修正した値を持つ新しい設定を返す（この設定は変更しない）
         
         Returns:
             BrightnessConfig: 検証済みの設定
         """
-        # 値の範囲を確認（0-100の間にクランプ）
-        self.min_brightness = max(0, min(100, self.min_brightness))
-        self.max_brightness = max(0, min(100, self.max_brightness))
+        # 輝度範囲の検証（0-100にクランプし、min <= max を保証）
+        min_brightness, max_brightness = _validate_range(self.min_brightness, self.max_brightness)
+        displays = {
+            display_id: DisplayRange(*_validate_range(
+                display_range.min_brightness, display_range.max_brightness,
+                label=f"ディスプレイ '{display_id}' "
+            ))
+            for display_id, display_range in self.displays.items()
+        }
         
-        # min < maxを保証
-        if self.min_brightness > self.max_brightness:
+        # 輝度を推定する領域の検証（フレームの内側に収め、面積のない領域は除く）
+        weight_map = self.weight_map
+        if weight_map not in WEIGHT_MAPS:
+            logger.warning(f"不明な画素の重み '{weight_map}' が指定されたため、均等な重みを使用します。")
+            weight_map = WEIGHT_NONE
+        
+        # ディスプレイ制御バックエンドの検証
+        display_backend = self.display_backend
+        if display_backend not in DISPLAY_BACKENDS:
             logger.warning(
-                f"設定の最小輝度({self.min_brightness})が最大輝度({self.max_brightness})より"
-                "大きいため、値を入れ替えます。"
+                f"不明なディスプレイ制御バックエンド '{display_backend}' が指定されたため、"
+                f"'{BACKEND_CLI}' を使用します。"
             )
-            self.min_brightness, self.max_brightness = self.max_brightness, self.min_brightness
-            
-        # キャプチャ時間の検証（最小値を保証）
-        self.capture_duration = max(0.1, self.capture_duration)
+            display_backend = BACKEND_CLI
+        
+        # 応答カーブの検証
+        curve = self.curve
+        if curve not in CURVES:
+            logger.warning(f"不明な応答カーブ '{curve}' が指定されたため、'{CURVE_LINEAR}' を使用します。")
+            curve = CURVE_LINEAR
+        # 折れ線の点は環境光（0-255）と範囲内の位置（0-1）にクランプし、環境光の順に並べる
+        curve_points = tuple(sorted(
+            (max(0.0, min(float(MAX_AMBIENT), float(x))), max(0.0, min(1.0, float(y))))
+            for x, y in self.curve_points
+        ))
+        if curve == CURVE_PIECEWISE and len(curve_points) < 2:
+            logger.warning(
+                f"折れ線の応答カーブには2つ以上の点が必要なため、'{CURVE_LINEAR}' を使用します。"
+            )
+            curve = CURVE_LINEAR
         
-        return self
+        min_interval = max(0.0, self.min_interval)
+        
+        return replace(
+            self,
+            min_brightness=min_brightness,
+            max_brightness=max_brightness,
+            displays=displays,
+            # キャプチャ時間の検証（最小値を保証）
+            capture_duration=max(0.1, self.capture_duration),
+            # 輝度計算の間引き設定の検証（1=全画素、0=サムネイル無効）
+            sample_stride=max(1, self.sample_stride),
+            thumbnail_size=max(0, self.thumbnail_size),
+            max_drain_frames=max(0, self.max_drain_frames),
+            # ウォームアップ設定の検証
+            warmup_timeout=max(0.0, self.warmup_timeout),
+            warmup_tolerance=max(0.0, self.warmup_tolerance),
+            warmup_stable_frames=max(1, self.warmup_stable_frames),
+            # 測定の早期終了の設定の検証（0=無効、分散の計算には2サンプル以上が必要）
+            early_stop_tolerance=max(0.0, self.early_stop_tolerance),
+            early_stop_min_samples=max(2, self.early_stop_min_samples),
+            roi=tuple(region for region in map(clamp_region, self.roi) if region is not None),
+            weight_map=weight_map,
+            vignette_strength=max(0.0, self.vignette_strength),
+            # CPU時間の予算とカメラに要求する解像度・フレームレートの検証（0=無効、またはカメラの既定値）
+            cpu_budget_ms=max(0.0, self.cpu_budget_ms),
+            cpu_duty_cycle=max(0.0, min(1.0, self.cpu_duty_cycle)),
+            capture_width=max(0, self.capture_width),
+            capture_height=max(0, self.capture_height),
+            capture_fps=max(0.0, self.capture_fps),
+            # 輝度書き込みの間引き設定の検証
+            hysteresis=max(0.0, self.hysteresis),
+            min_write_interval=max(0.0, self.min_write_interval),
+            display_backend=display_backend,
+            # 段階的な輝度変化の設定の検証（0=無効）
+            transition_step=max(0, self.transition_step),
+            transition_rate=self.transition_rate if self.transition_rate > 0 else DEFAULT_TRANSITION_RATE,
+            curve=curve,
+            curve_gamma=self.curve_gamma if self.curve_gamma > 0 else DEFAULT_CURVE_GAMMA,
+            curve_log_factor=self.curve_log_factor if self.curve_log_factor > 0 else DEFAULT_CURVE_LOG_FACTOR,
+            curve_points=curve_points,
+            # 調整間隔の設定の検証（最小 <= 最大、安定時に間隔を縮めない）
+            min_interval=min_interval,
+            max_interval=max(min_interval, self.max_interval),
+            interval_backoff=max(1.0, self.interval_backoff),
+            change_threshold=max(0.0, self.change_threshold),
+            quiet_hours=tuple(self.quiet_hours),
+            # トレースファイルの大きさの検証（ヘッダーと数レコード分は必要）
+            trace_max_bytes=max(MIN_TRACE_MAX_BYTES, self.trace_max_bytes),
+        )
 
-def load_config(config_path: Optional[str] = None) -> BrightnessConfig:
+def resolve_config_path(config_path: Optional[str] = None) -> str:
+    """
+    読み込む設定ファイルのパスを決定する
+    
+    Args:
+        config_path (str, optional): 設定ファイルへのパス
+        
+    Returns:
+        str: 指定されたパス、または既定の設定ファイルのパス
+    """
+    return config_path or os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 
+        CONFIG_FILE
+    )
+
+def load_config(config_path: Optional[str] = None, strict: bool = False) -> BrightnessConfig:
     """
     設定ファイルを読み込み、BrightnessConfigオブジェクトを返す
     
     Args:
         config_path (str, optional): 設定ファイルへのパス
+        strict (bool): Trueの場合、読み込みに失敗したらデフォルト設定を使わずに例外を送出する
         
     Returns:
         BrightnessConfig: 読み込まれた設定
+        
+    Raises:
+        ValueError: strict=Trueで、設定ファイルの形式が正しくない場合
+        OSError: strict=Trueで、設定ファイルを読み込めなかった場合
     """
-    # デフォルト設定オブジェクトを作成
-    config = BrightnessConfig()
+    # 設定ファイルで指定された値（指定されていない値はデフォルト値を使用する）
+    values: Dict[str, Any] = {}
     
     # 設定ファイルのパスを決定
-    config_file = config_path or os.path.join(
-        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 
-        CONFIG_FILE
-    )
+    config_file = resolve_config_path(config_path)
     
     if os.path.exists(config_file):
         try:
             with open(config_file, 'r', encoding='utf-8') as f:
                 user_config = json.load(f)
                 
-            # 設定ファイルの値でオブジェクトを更新
+            # 設定ファイルの値を取り出す
             if 'min_brightness' in user_config:
-                config.min_brightness = int(user_config['min_brightness'])
+                values['min_brightness'] = int(user_config['min_brightness'])
                 
             if 'max_brightness' in user_config:
-                config.max_brightness = int(user_config['max_brightness'])
+                values['max_brightness'] = int(user_config['max_brightness'])
                 
             if 'capture_duration' in user_config:
-                config.capture_duration = float(user_config['capture_duration'])
+                values['capture_duration'] = float(user_config['capture_duration'])
+                
+            if 'sample_stride' in user_config:
+                values['sample_stride'] = int(user_config['sample_stride'])
+                
+            if 'thumbnail_size' in user_config:
+                values['thumbnail_size'] = int(user_config['thumbnail_size'])
+                
+            if 'luma_weighted' in user_config:
+                values['luma_weighted'] = bool(user_config['luma_weighted'])
+                
+            if 'max_drain_frames' in user_config:
+                values['max_drain_frames'] = int(user_config['max_drain_frames'])
+                
+            if 'warmup_timeout' in user_config:
+                values['warmup_timeout'] = float(user_config['warmup_timeout'])
+                
+            if 'warmup_tolerance' in user_config:
+                values['warmup_tolerance'] = float(user_config['warmup_tolerance'])
+                
+            if 'warmup_stable_frames' in user_config:
+                values['warmup_stable_frames'] = int(user_config['warmup_stable_frames'])
+                
+            if 'exposure_lock' in user_config:
+                values['exposure_lock'] = bool(user_config['exposure_lock'])
+                
+            if 'exposure_value' in user_config:
+                values['exposure_value'] = float(user_config['exposure_value'])
+                
+            if 'gain_value' in user_config:
+                values['gain_value'] = float(user_config['gain_value'])
+                
+            if 'early_stop_tolerance' in user_config:
+                values['early_stop_tolerance'] = float(user_config['early_stop_tolerance'])
+                
+            if 'early_stop_min_samples' in user_config:
+                values['early_stop_min_samples'] = int(user_config['early_stop_min_samples'])
+                
+            if 'roi' in user_config:
+                values['roi'] = parse_regions(user_config['roi'])
+                
+            if 'weight_map' in user_config:
+                values['weight_map'] = str(user_config['weight_map'])
+                
+            if 'vignette_strength' in user_config:
+                values['vignette_strength'] = float(user_config['vignette_strength'])
+                
+            if 'raw_luma' in user_config:
+                values['raw_luma'] = bool(user_config['raw_luma'])
+                
+            if 'cpu_budget_ms' in user_config:
+                values['cpu_budget_ms'] = float(user_config['cpu_budget_ms'])
+                
+            if 'cpu_duty_cycle' in user_config:
+                values['cpu_duty_cycle'] = float(user_config['cpu_duty_cycle'])
+                
+            if 'capture_width' in user_config:
+                values['capture_width'] = int(user_config['capture_width'])
+                
+            if 'capture_height' in user_config:
+                values['capture_height'] = int(user_config['capture_height'])
+                
+            if 'capture_fps' in user_config:
+                values['capture_fps'] = float(user_config['capture_fps'])
+                
+            if 'sensor_socket' in user_config:
+                values['sensor_socket'] = os.path.expanduser(str(user_config['sensor_socket']))
+                
+            if 'adaptive_interval' in user_config:
+                values['adaptive_interval'] = bool(user_config['adaptive_interval'])
+                
+            if 'min_interval' in user_config:
+                values['min_interval'] = float(user_config['min_interval'])
+                
+            if 'max_interval' in user_config:
+                values['max_interval'] = float(user_config['max_interval'])
+                
+            if 'interval_backoff' in user_config:
+                values['interval_backoff'] = float(user_config['interval_backoff'])
+                
+            if 'change_threshold' in user_config:
+                values['change_threshold'] = float(user_config['change_threshold'])
+                
+            if 'quiet_hours' in user_config:
+                values['quiet_hours'] = parse_quiet_hours(user_config['quiet_hours'])
+                
+            if 'hysteresis' in user_config:
+                values['hysteresis'] = float(user_config['hysteresis'])
+                
+            if 'min_write_interval' in user_config:
+                values['min_write_interval'] = float(user_config['min_write_interval'])
+                
+            if 'display_backend' in user_config:
+                values['display_backend'] = str(user_config['display_backend'])
+                
+            if 'transition_step' in user_config:
+                values['transition_step'] = int(user_config['transition_step'])
+                
+            if 'transition_rate' in user_config:
+                values['transition_rate'] = float(user_config['transition_rate'])
+                
+            if 'curve' in user_config:
+                values['curve'] = str(user_config['curve'])
+                
+            if 'curve_gamma' in user_config:
+                values['curve_gamma'] = float(user_config['curve_gamma'])
+                
+            if 'curve_log_factor' in user_config:
+                values['curve_log_factor'] = float(user_config['curve_log_factor'])
+                
+            if 'curve_points' in user_config:
+                values['curve_points'] = [
+                    (float(x), float(y)) for x, y in user_config['curve_points']
+                ]
+                
+            if 'frame_source' in user_config:
+                values['frame_source'] = str(user_config['frame_source'])
+                
+            if 'trace_file' in user_config:
+                values['trace_file'] = os.path.expanduser(str(user_config['trace_file']))
+                
+            if 'trace_max_bytes' in user_config:
+                values['trace_max_bytes'] = int(user_config['trace_max_bytes'])
+                
+            if 'metrics_file' in user_config:
+                values['metrics_file'] = os.path.expanduser(str(user_config['metrics_file']))
+                
+            if 'displays' in user_config:
+                # ディスプレイごとの輝度範囲（省略した値は全体の設定を使用）
+                values['displays'] = {
+                    str(display_id): DisplayRange(
+                        min_brightness=int(display_values.get(
+                            'min_brightness', values.get('min_brightness', DEFAULT_MIN_BRIGHTNESS)
+                        )),
+                        max_brightness=int(display_values.get(
+                            'max_brightness', values.get('max_brightness', DEFAULT_MAX_BRIGHTNESS)
+                        ))
+                    )
+                    for display_id, display_values in user_config['displays'].items()
+                }
                 
             logger.info(f"設定ファイル '{config_file}' を読み込みました。")
             
         except json.JSONDecodeError:
+            if strict:
+                raise
             logger.warning(f"設定ファイル '{config_file}' の形式が正しくありません。デフォルト設定を使用します。")
         except Exception as e:
+            if strict:
+                raise
             logger.warning(f"設定ファイル '{config_file}' の読み込み中にエラーが発生しました: {e}")
     else:
         logger.info(f"設定ファイル '{config_file}' が見つかりません。デフォルト設定を使用します。")
     
-    # 設定値の検証
-    config.validate()
+    # 設定値の検証（読み込み途中でエラーになった場合も、それまでに取り出した値は使用する）
+    config = BrightnessConfig(**values).validate()
     
     logger.info(f"使用する設定: 最小輝度={config.min_brightness}, 最大輝度={config.max_brightness}, "
                f"キャプチャ時間={config.capture_duration}秒")
     
     return config
+
+
+class ConfigWatcher:
+    """
+    設定ファイルの変更を検出して読み込み直すクラス
+    
+    poll() は os.stat() を1回呼ぶだけで、更新時刻とサイズのどちらかが変わった場合のみ
+    JSONを解析し直して検証する。読み込み直した内容が現在の設定と同じ場合は変更なしとみなす。
+    設定は変更できないオブジェクトのため、変更があった場合は新しいオブジェクトとして返す。
+    読み込みに失敗した場合（編集途中のファイルなど）は現在の設定を使い続ける。
+    """
+    
+    def __init__(self, config_path: Optional[str] = None):
+        """
+        ConfigWatcherを初期化
+        
+        Args:
+            config_path (str, optional): 監視する設定ファイルへのパス
+        """
+        self.config_path = resolve_config_path(config_path)
+        self.config: Optional[BrightnessConfig] = None
+        self.reloads = 0
+        self._signature: Optional[Tuple[int, int]] = None
+    
+    def load(self) -> BrightnessConfig:
+        """
+        設定ファイルを読み込み、現在の設定とする
+        
+        Returns:
+            BrightnessConfig: 読み込まれた設定
+        """
+        # 読み込み中に書き換えられた場合に次回検出できるよう、先に状態を記録する
+        self._signature = self._stat()
+        self.config = load_config(self.config_path)
+        return self.config
+    
+    def poll(self) -> Optional[BrightnessConfig]:
+        """
+        設定ファイルが変更されていれば読み込み直す
+        
+        Returns:
+            Optional[BrightnessConfig]: 内容が変わった場合は新しい設定、それ以外はNone
+        """
+        if self.config is None:
+            return self.load()
+        
+        signature = self._stat()
+        if signature == self._signature:
+            return None
+        
+        logger.info(f"設定ファイル '{self.config_path}' の変更を検出しました。")
+        previous = self.config
+        self._signature = signature
+        try:
+            config = load_config(self.config_path, strict=True)
+        except (ValueError, TypeError, AttributeError, OSError) as e:
+            # 編集途中のファイルなどで読み込めない場合は、現在の設定を使い続ける
+            logger.warning(f"設定ファイルを読み込めないため、現在の設定を使い続けます: {e}")
+            return None
+        
+        self.config = config
+        if config == previous:
+            logger.debug("設定の内容に変更はありません。")
+            return None
+        
+        self.reloads += 1
+        return config
+    
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        """設定ファイルの (更新時刻, サイズ)、存在しない場合はNone"""
+        try:
+            stat = os.stat(self.config_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
@@ -0,0 +1,246 @@
+"""
+カメラを開いたまま一定間隔で輝度調整を繰り返すデーモンモードを提供するモジュール
+"""
+import signal
+import threading
+import time
+from typing import TYPE_CHECKING, Optional
+from .logger import logger
+from .metrics import export_metrics, metrics
+from .scheduler import AdaptiveScheduler
+from .trace import TraceRecorder
+
+if TYPE_CHECKING:
+    from .brightness_adjuster import BrightnessAdjuster
+    from .config import ConfigWatcher
+
+# デフォルトの調整間隔（秒）
+DEFAULT_INTERVAL = 60.0
+
+class BrightnessDaemon:
+    """
+    1つのAmbientLightSensorをプロセスの生存期間中保持し、
+    測定→マッピング→輝度設定を定期的に実行するクラス
+    """
+
+    def __init__(self, adjuster: 'BrightnessAdjuster', interval: float = DEFAULT_INTERVAL,
+                 config_watcher: Optional['ConfigWatcher'] = None,
+                 scheduler: Optional[AdaptiveScheduler] = None):
+        """
+        BrightnessDaemonを初期化
+
+        Args:
+            adjuster (BrightnessAdjuster): センサーを保持した輝度調整オブジェクト
+            interval (float): 調整サイクルの開始間隔（秒）
+            config_watcher (ConfigWatcher, optional): 設定ファイルの変更を検出するオブジェクト
+                指定した場合は、各サイクルの前に変更された設定を反映する
+            scheduler (AdaptiveScheduler, optional): 調整間隔と静音時間帯を決めるスケジューラー
+                指定しない場合は、常に interval の間隔で調整する
+        """
+        self.adjuster = adjuster
+        self.interval = max(0.0, interval)
+        self.config_watcher = config_watcher
+        self.scheduler = scheduler
+        self.cycles = 0
+        self.trace: Optional[TraceRecorder] = None
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        """実行中のループに停止を要求する"""
+        self._stop_event.set()
+
+    @property
+    def stopped(self) -> bool:
+        """停止が要求されているかどうか"""
+        return self._stop_event.is_set()
+
+    def install_signal_handlers(self):
+        """SIGTERM/SIGINTを受け取ったらループを停止するようにシグナルハンドラーを設定する"""
+        def handle_signal(signum, frame):
+            logger.info(f"シグナル {signum} を受信しました。デーモンを停止します...")
+            self.stop()
+
+        signal.signal(signal.SIGTERM, handle_signal)
+        signal.signal(signal.SIGINT, handle_signal)
+
+    def run_cycle(self) -> bool:
+        """
+        1サイクル分の輝度調整を実行する
+
+        例外が発生した場合はセンサーを解放し、次のサイクルでカメラを開き直す。
+
+        Returns:
+            bool: 調整が成功したかどうか
+        """
+        try:
+            self.reload_config()
+            return self.adjuster.adjust()
+        except Exception as e:
+            logger.error(f"輝度調整サイクル中にエラーが発生しました: {e}")
+            if self.adjuster.sensor is not None:
+                self.adjuster.sensor.close()
+            return False
+
+    def reload_config(self) -> bool:
+        """
+        設定ファイルが変更されていれば、新しい設定を輝度調整オブジェクトに反映する
+
+        Returns:
+            bool: 設定を差し替えたかどうか
+        """
+        if self.config_watcher is None:
+            return False
+
+        config = self.config_watcher.poll()
+        if config is None:
+            return False
+
+        self.adjuster.update_config(config)
+        if self.scheduler is not None:
+            self.scheduler.configure(config)
+        logger.info("変更された設定を反映しました。")
+        return True
+
+    def record_trace(self) -> bool:
+        """
+        設定でトレースファイルが指定されていれば、直前のサイクルの記録を追記する
+
+        設定の再読み込みでファイルが変わった場合は、新しいファイルに記録する。
+
+        Returns:
+            bool: 記録したかどうか
+        """
+        config = self.adjuster.config
+        report = self.adjuster.last_report
+        if self.trace is not None and self.trace.path != config.trace_file:
+            self.close_trace()
+        if not config.trace_file or report is None:
+            return False
+
+        try:
+            if self.trace is None:
+                self.trace = TraceRecorder(config.trace_file, max_bytes=config.trace_max_bytes)
+            self.trace.record(
+                report.timestamp, report.ambient, report.samples,
+                report.target, report.applied, report.durations,
+                override=report.override
+            )
+            return True
+        except (OSError, ValueError) as e:
+            logger.warning(f"トレースを '{config.trace_file}' に記録できませんでした: {e}")
+            self.close_trace()
+            return False
+
+    def close_trace(self):
+        """トレースファイルを閉じる"""
+        if self.trace is not None:
+            self.trace.close()
+            self.trace = None
+
+    def export_metrics(self) -> bool:
+        """
+        設定でメトリクスの出力先が指定されていれば、これまでの計測結果を書き出す
+
+        設定の再読み込みで出力先が指定された場合は、その時点から計測を始める。
+
+        Returns:
+            bool: 書き出したかどうか
+        """
+        path = self.adjuster.config.metrics_file
+        metrics.enabled = bool(path)
+        return export_metrics(path)
+
+    def run(self) -> int:
+        """
+        停止が要求されるまで輝度調整を繰り返す
+
+        Returns:
+            int: 終了コード（0=正常終了）
+        """
+        logger.info(f"デーモンモードで開始します（調整間隔: {self.interval}秒）")
+
+        try:
+            while not self.stopped:
+                cycle_start = time.monotonic()
+                quiet = self.scheduler.quiet_remaining() if self.scheduler is not None else 0.0
+                if quiet > 0:
+                    self._wait_quiet(cycle_start + quiet)
+                    continue
+
+                self.run_cycle()
+                self.cycles += 1
+                self.record_trace()
+                self.export_metrics()
+
+                elapsed = time.monotonic() - cycle_start
+                logger.debug(f"調整サイクル {self.cycles} が {elapsed:.3f}秒で完了しました。")
+
+                self._wait_until(cycle_start + self.next_interval())
+        finally:
+            # 終了時には必ずカメラとディスプレイ制御のリソースを解放する
+            if self.adjuster.sensor is not None:
+                self.adjuster.sensor.close()
+            if self.adjuster.actuator is not None:
+                self.adjuster.actuator.close()
+            self.close_trace()
+
+        logger.info(f"デーモンを停止しました（実行サイクル数: {self.cycles}）")
+
+        actuator = self.adjuster.actuator
+        if actuator is not None:
+            stats = actuator.stats
+            logger.info(
+                f"輝度の書き込み: {stats.writes}回（失敗: {stats.failed_writes}回）, "
+                f"省略: 不感帯 {stats.suppressed_deadband}回 / 間隔制限 {stats.suppressed_rate_limit}回"
+            )
+        return 0
+
+    def next_interval(self) -> float:
+        """
+        直前のサイクルの測定値から、次のサイクルまでの間隔を決める
+
+        Returns:
+            float: 次のサイクルまでの間隔（秒）
+        """
+        if self.scheduler is None:
+            return self.interval
+        report = self.adjuster.last_report
+        return self.scheduler.next_interval(report.ambient if report is not None else None)
+
+    def _wait_quiet(self, deadline: float):
+        """
+        静音時間帯の終了まで、カメラを解放して待機する
+
+        Args:
+            deadline (float): 静音時間帯の終了時刻（time.monotonic()基準）
+        """
+        logger.info(f"静音時間帯のため、{deadline - time.monotonic():.0f}秒間は輝度を調整しません。")
+        if self.adjuster.sensor is not None:
+            self.adjuster.sensor.close()
+        self._wait_until(deadline)
+        # 静音時間帯の前の測定値は古いため、最小間隔から始め直す
+        self.scheduler.reset()
+
+    def _wait_until(self, deadline: float):
+        """
+        次のサイクルの開始時刻まで待機する
+
+        待機中に保留中の輝度を書き込めるようになった場合は書き込む。
+        停止要求があれば即座に抜ける。
+
+        Args:
+            deadline (float): 次のサイクルの開始時刻（time.monotonic()基準）
+        """
+        actuator = self.adjuster.actuator
+
+        while not self.stopped:
+            remaining = deadline - time.monotonic()
+            flush_delay = actuator.flush_delay() if actuator is not None else None
+
+            if flush_delay is None or flush_delay >= remaining:
+                self._stop_event.wait(max(0.0, remaining))
+                return
+
+            self._stop_event.wait(flush_delay)
+            if not self.stopped:
+                actuator.flush()
@@ -0,0 +1,56 @@
+"""
+重いモジュールを最初に使われるまで読み込まないための遅延インポートモジュール
+"""
+import importlib
+from types import ModuleType
+from typing import Optional
+
+class LazyModule:
+    """
+    属性に最初にアクセスした時点でモジュールを読み込むプロキシ
+
+    `cv2 = LazyModule('cv2')` のように置き換えると、`--help` や設定の検証など
+    カメラを使わない処理では OpenCV の読み込みを省略できる。
+    属性の設定・削除（unittest.mock.patch など）は読み込んだモジュールに対して行う。
+    """
+
+    def __init__(self, name: str):
+        """
+        LazyModuleを初期化
+
+        Args:
+            name (str): 読み込むモジュールの名前
+        """
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_module', None)
+
+    @property
+    def loaded(self) -> bool:
+        """モジュールが読み込み済みかどうか"""
+        return self._module is not None
+
+    def load(self) -> ModuleType:
+        """
+        モジュールを読み込む（読み込み済みの場合はそれを返す）
+
+        Returns:
+            ModuleType: 読み込んだモジュール
+        """
+        module: Optional[ModuleType] = self._module
+        if module is None:
+            module = importlib.import_module(self._name)
+            object.__setattr__(self, '_module', module)
+        return module
+
+    def __getattr__(self, attribute: str):
+        return getattr(self.load(), attribute)
+
+    def __setattr__(self, attribute: str, value):
+        setattr(self.load(), attribute, value)
+
+    def __delattr__(self, attribute: str):
+        delattr(self.load(), attribute)
+
+    def __repr__(self) -> str:
+        state = "読み込み済み" if self.loaded else "未読み込み"
+        return f"<LazyModule '{self._name}' ({state})>"
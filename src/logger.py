@@ -3,13 +3,15 @@
 """
 import os
 import logging
-from logging.handlers import RotatingFileHandler
 import sys
 
 # ログ出力先ディレクトリ
 LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs')
 LOG_FILE = os.path.join(LOG_DIR, 'lunar_brightness.log')
 
+# キュー経由で出力する場合の、ロガー名ごとの出力スレッド
+_listeners = {}
+
 # ログレベルのマッピング
 LOG_LEVELS = {
     'DEBUG': logging.DEBUG,
@@ -19,13 +21,29 @@ LOG_LEVELS = {
     'CRITICAL': logging.CRITICAL
 }
 
-def setup_logger(name='lunar_brightness', level='INFO'):
+class _DeferredSetupHandler(logging.Handler):
+    """
+    最初のログ出力時にロガーをセットアップし、そのレコードを出力するハンドラー
+    
+    ログディレクトリの作成とログファイルのオープンを、実際にログを出力するまで遅らせる。
+    """
+    
+    def emit(self, record):
+        logger = setup_logger(self.name)
+        for handler in logger.handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+def setup_logger(name='lunar_brightness', level='INFO', use_queue=False):
     """
     ロガーをセットアップし、ファイルとコンソールに出力するよう設定
     
     Args:
         name (str): ロガーの名前
         level (str): ロギングレベル ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+        use_queue (bool): Trueの場合、ログを呼び出し元のスレッドではキューに入れるのみとし、
+            ファイルとコンソールへの書き込みはバックグラウンドのスレッドで行う
         
     Returns:
         logging.Logger: 設定されたロガーインスタンス
@@ -33,8 +51,8 @@ def setup_logger(name='lunar_brightness', level='INFO'):
     # ロガーの作成
     logger = logging.getLogger(name)
     
-    # すでにハンドラーが設定されている場合は何もしない
-    if logger.handlers:
+    # すでにハンドラーが設定されている場合は何もしない（遅延セットアップ用のハンドラーは除く）
+    if any(not isinstance(handler, _DeferredSetupHandler) for handler in logger.handlers):
         return logger
         
     # ログレベルの設定
@@ -45,6 +63,7 @@ def setup_logger(name='lunar_brightness', level='INFO'):
     os.makedirs(LOG_DIR, exist_ok=True)
     
     # ファイル出力用ハンドラー（ローテーション付き）
+    from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
     file_handler = RotatingFileHandler(
         LOG_FILE, 
         maxBytes=1024 * 1024,  # 1MB
@@ -67,11 +86,55 @@ def setup_logger(name='lunar_brightness', level='INFO'):
     file_handler.setFormatter(formatter)
     console_handler.setFormatter(formatter)
     
-    # ロガーにハンドラーを追加
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    # ロガーのハンドラーを差し替える
+    # （ログ出力中に呼ばれた場合でも同じレコードが二重に出力されないよう、リストごと置き換える）
+    if use_queue:
+        import atexit
+        import queue
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(
+            log_queue, file_handler, console_handler, respect_handler_level=True
+        )
+        listener.start()
+        _listeners[name] = listener
+        # 終了時にキューに残ったログを書き込んでからスレッドを止める
+        atexit.register(shutdown_logger, name)
+        logger.handlers = [QueueHandler(log_queue)]
+    else:
+        logger.handlers = [file_handler, console_handler]
+    
+    return logger
+
+def shutdown_logger(name='lunar_brightness'):
+    """
+    キュー経由の出力スレッドを、キューに残ったログを書き込んでから停止する
+    
+    キューを使わない設定の場合は何もしない。
     
+    Args:
+        name (str): ロガーの名前
+    """
+    listener = _listeners.pop(name, None)
+    if listener is not None:
+        listener.stop()
+
+def get_logger(name='lunar_brightness'):
+    """
+    セットアップを最初のログ出力時まで遅らせたロガーを取得する
+    
+    Args:
+        name (str): ロガーの名前
+        
+    Returns:
+        logging.Logger: ロガーインスタンス
+    """
+    logger = logging.getLogger(name)
+    if not logger.handlers:
+        logger.setLevel(logging.INFO)
+        deferred_handler = _DeferredSetupHandler()
+        deferred_handler.set_name(name)
+        logger.addHandler(deferred_handler)
     return logger
 
-# デフォルトロガーを作成
-logger = setup_logger()
+# デフォルトロガーを作成（ファイルは最初のログ出力時に開く）
+logger = get_logger()
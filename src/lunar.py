@@ -1,11 +1,95 @@
 """
 Lunar CLIを使用してディスプレイの輝度を制御するモジュール
 """
+import shlex
 import subprocess
+import threading
+import uuid
 from typing import Tuple, Optional, Dict, List, Any
+from .lazy import LazyModule
 from .logger import logger
+from .metrics import metrics
 
-class LunarController:
+# 並行書き込みを使う場合のみ読み込む
+concurrent_futures = LazyModule('concurrent.futures')
+
+# 利用可能なディスプレイ制御バックエンド
+BACKEND_CLI = 'cli'
+BACKEND_PERSISTENT = 'persistent'
+DISPLAY_BACKENDS = (BACKEND_CLI, BACKEND_PERSISTENT)
+
+# 常駐ヘルパーとして使用するシェル
+DEFAULT_HELPER_COMMAND = ('/bin/sh',)
+
+class DisplayController:
+    """ディスプレイの輝度を制御するバックエンドの基底クラス"""
+    
+    def set_brightness(self, brightness_level: float, display: Optional[str] = None) -> bool:
+        """
+        ディスプレイの輝度を設定する
+        
+        Args:
+            brightness_level (float): 設定する輝度レベル（0-100の範囲）
+            display (str, optional): 対象のディスプレイ。指定しない場合は既定のディスプレイ
+            
+        Returns:
+            bool: 操作が成功したかどうか
+        """
+        raise NotImplementedError
+    
+    def set_brightness_many(self, levels: Dict[Optional[str], float]) -> Dict[Optional[str], bool]:
+        """
+        複数のディスプレイの輝度を並行して設定する
+        
+        全体の所要時間は、最も遅いディスプレイの設定時間程度になる。
+        
+        Args:
+            levels (Dict[Optional[str], float]): ディスプレイごとの輝度レベル
+            
+        Returns:
+            Dict[Optional[str], bool]: ディスプレイごとの成否
+        """
+        if len(levels) <= 1:
+            return {display: self._set_one(level, display) for display, level in levels.items()}
+        
+        with concurrent_futures.ThreadPoolExecutor(max_workers=len(levels)) as executor:
+            futures = {
+                display: executor.submit(self._set_one, level, display)
+                for display, level in levels.items()
+            }
+            return {display: future.result() for display, future in futures.items()}
+    
+    def get_current_brightness(self) -> Optional[float]:
+        """
+        現在のディスプレイの輝度を取得する
+        
+        Returns:
+            Optional[float]: 現在の輝度レベル（0-100の範囲）、またはエラー時にNone
+        """
+        raise NotImplementedError
+    
+    def is_idle(self) -> bool:
+        """
+        設定した輝度がディスプレイに反映し終わっているかどうか
+        
+        段階的に輝度を変化させるコントローラーでは、変化の途中はFalseを返す。
+        
+        Returns:
+            bool: 反映し終わっているかどうか（このクラスは書き込みが完了してから返るため常にTrue）
+        """
+        return True
+    
+    def close(self):
+        """バックエンドが保持しているリソースを解放する"""
+    
+    def _set_one(self, brightness_level: float, display: Optional[str]) -> bool:
+        """既定のディスプレイの場合はdisplay引数を省略してset_brightnessを呼び出す"""
+        if display is None:
+            return self.set_brightness(brightness_level)
+        return self.set_brightness(brightness_level, display=display)
+
+
+class LunarController(DisplayController):
     """Lunar CLIを使用してディスプレイの輝度を制御するクラス"""
     
     def __init__(self, command_path: str = 'lunar'):
@@ -17,36 +101,36 @@ class LunarController:
         """
         self.command_path = command_path
     
-    def set_brightness(self, brightness_level: float) -> bool:
+    def set_brightness(self, brightness_level: float, display: Optional[str] = None) -> bool:
         """
         ディスプレイの輝度を設定する
         
         Args:
             brightness_level (float): 設定する輝度レベル（0-100の範囲）
+            display (str, optional): 対象のディスプレイ。指定しない場合は既定のディスプレイ
             
         Returns:
             bool: 操作が成功したかどうか
         """
         # 輝度レベルを 0-100 の整数値にクランプする
         brightness = max(0, min(100, int(brightness_level)))
+        target = _display_label(display)
         
-        logger.info(f"ディスプレイの輝度を {brightness}% に設定します...")
+        logger.info(f"{target}の輝度を {brightness}% に設定します...")
         
         try:
             # Lunar CLI コマンドを実行
-            command = [self.command_path, 'set', 'brightness', str(brightness)]
-            result = subprocess.run(
-                command, 
-                check=True, 
-                capture_output=True, 
-                text=True
-            )
+            command = self._set_command(brightness, display)
+            metrics.increment('backend_calls')
+            with metrics.time('lunar_call'):
+                result = self._run(command)
             
             logger.debug(f"Lunar CLI の出力: {result.stdout.strip()}")
-            logger.info(f"ディスプレイの輝度を {brightness}% に正常に設定しました。")
+            logger.info(f"{target}の輝度を {brightness}% に正常に設定しました。")
             return True
             
         except FileNotFoundError:
+            metrics.increment('backend_failures')
             logger.error(
                 f"'{self.command_path}' コマンドが見つかりません。" 
                 "Lunar CLIがインストールされているか、またはPATHが正しく設定されているか確認してください。"
@@ -54,6 +138,7 @@ class LunarController:
             return False
             
         except subprocess.CalledProcessError as e:
+            metrics.increment('backend_failures')
             logger.error(f"Lunar CLI の実行に失敗しました。コマンド: {' '.join(e.cmd)}")
             logger.error(f"リターンコード: {e.returncode}")
             if e.stderr:
@@ -61,8 +146,24 @@ class LunarController:
             return False
             
         except Exception as e:
+            metrics.increment('backend_failures')
             logger.error(f"予期せぬエラーが発生しました: {e}")
             return False
+
+    def _set_command(self, brightness: int, display: Optional[str] = None) -> List[str]:
+        """
+        輝度を設定する Lunar CLI コマンドを組み立てる
+        
+        Args:
+            brightness (int): 設定する輝度（0-100）
+            display (str, optional): 対象のディスプレイ
+            
+        Returns:
+            List[str]: 実行するコマンド
+        """
+        if display is None:
+            return [self.command_path, 'set', 'brightness', str(brightness)]
+        return [self.command_path, 'displays', display, 'brightness', str(brightness)]
     
     def get_current_brightness(self) -> Optional[float]:
         """
@@ -73,12 +174,9 @@ class LunarController:
         """
         try:
             command = [self.command_path, 'get', 'brightness']
-            result = subprocess.run(
-                command, 
-                check=True, 
-                capture_output=True, 
-                text=True
-            )
+            metrics.increment('backend_calls')
+            with metrics.time('lunar_call'):
+                result = self._run(command)
             
             brightness_str = result.stdout.strip()
             
@@ -95,6 +193,276 @@ class LunarController:
         except Exception as e:
             logger.error(f"現在の輝度を取得する際にエラーが発生しました: {e}")
             return None
+    
+    def _run(self, command: List[str]) -> subprocess.CompletedProcess:
+        """
+        Lunar CLI コマンドを新しいプロセスで実行する
+        
+        Args:
+            command (List[str]): 実行するコマンド
+            
+        Returns:
+            subprocess.CompletedProcess: 実行結果
+            
+        Raises:
+            FileNotFoundError: コマンドが見つからない場合
+            subprocess.CalledProcessError: コマンドが失敗した場合
+        """
+        return subprocess.run(
+            command, 
+            check=True, 
+            capture_output=True, 
+            text=True
+        )
+
+
+class PersistentLunarController(LunarController):
+    """
+    常駐させたヘルパープロセス（シェル）に lunar コマンドを送り続けるコントローラー
+    
+    lunar CLI には接続を保持して書き込むモードがないため、lunar 自体は書き込みごとに
+    ヘルパーのシェルから起動される。省けるのはPython側のプロセス起動とパイプの準備のみで
+    （tests/fake_lunar での計測では1回あたり約0.1ミリ秒）、書き込みごとのプロセス生成は
+    なくならない。複数のディスプレイへの書き込みは1行にまとめて送り、シェル上で並行して実行する。
+    
+    ヘルパーが終了していた場合は再起動し、ヘルパーを利用できない場合は
+    通常のCLI実行にフォールバックする。
+    """
+    
+    def __init__(self, command_path: str = 'lunar',
+                 helper_command: Tuple[str, ...] = DEFAULT_HELPER_COMMAND):
+        """
+        PersistentLunarControllerを初期化
+        
+        Args:
+            command_path (str): lunar コマンドのパス
+            helper_command (Tuple[str, ...]): 常駐させるヘルパー（POSIXシェル）のコマンド
+        """
+        super().__init__(command_path)
+        self.helper_command = tuple(helper_command)
+        self.helper_starts = 0
+        self._helper: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+        # コマンドの終了を示す行の目印（出力と衝突しないようにセッションごとに生成）
+        session_id = uuid.uuid4().hex
+        self._marker = f"__LUNAR_DONE_{session_id}__"
+        self._item_marker = f"__LUNAR_ITEM_{session_id}__"
+    
+    def close(self):
+        """ヘルパープロセスを終了する"""
+        with self._lock:
+            self._stop_helper()
+    
+    def set_brightness_many(self, levels: Dict[Optional[str], float]) -> Dict[Optional[str], bool]:
+        """
+        複数のディスプレイの輝度を1回のバッチコマンドで並行して設定する
+        
+        ヘルパーのシェル上で各コマンドをバックグラウンドジョブとして同時に実行する。
+        
+        Args:
+            levels (Dict[Optional[str], float]): ディスプレイごとの輝度レベル
+            
+        Returns:
+            Dict[Optional[str], bool]: ディスプレイごとの成否
+        """
+        if len(levels) <= 1:
+            return super().set_brightness_many(levels)
+        
+        displays = list(levels)
+        brightness = {display: max(0, min(100, int(levels[display]))) for display in displays}
+        commands = [self._set_command(brightness[display], display) for display in displays]
+        
+        jobs = ' '.join(
+            f"( {shlex.join(command)} >/dev/null 2>&1; "
+            f"printf '%s %s %s\\n' {self._item_marker} {index} \"$?\" ) &"
+            for index, command in enumerate(commands)
+        )
+        line = f"{jobs} wait; printf '\\n%s %s\\n' {self._marker} 0\n"
+        
+        logger.info(
+            "ディスプレイの輝度を一括で設定します: "
+            + ", ".join(f"{_display_label(d)}={brightness[d]}%" for d in displays)
+        )
+        
+        try:
+            metrics.increment('backend_calls')
+            with metrics.time('lunar_call'), self._lock:
+                _, output = self._execute_line(line)
+        except OSError as e:
+            logger.warning(f"ヘルパープロセスを利用できないため、ディスプレイごとに設定します: {e}")
+            return super().set_brightness_many(levels)
+        
+        returncodes = {}
+        for output_line in output.splitlines():
+            if output_line.startswith(self._item_marker):
+                index, returncode = output_line[len(self._item_marker):].split()
+                returncodes[int(index)] = int(returncode)
+        
+        results = {}
+        for index, display in enumerate(displays):
+            returncode = returncodes.get(index)
+            results[display] = returncode == 0
+            if returncode == 0:
+                logger.info(f"{_display_label(display)}の輝度を {brightness[display]}% に正常に設定しました。")
+            else:
+                metrics.increment('backend_failures')
+                logger.error(
+                    f"{_display_label(display)}の輝度設定に失敗しました（リターンコード: {returncode}）"
+                )
+        return results
+    
+    def _run(self, command: List[str]) -> subprocess.CompletedProcess:
+        """
+        Lunar CLI コマンドを常駐ヘルパー経由で実行する（lunar はヘルパーのシェルが起動する）
+        
+        Args:
+            command (List[str]): 実行するコマンド
+            
+        Returns:
+            subprocess.CompletedProcess: 実行結果
+            
+        Raises:
+            FileNotFoundError: コマンドが見つからない場合
+            subprocess.CalledProcessError: コマンドが失敗した場合
+        """
+        try:
+            with self._lock:
+                returncode, output = self._execute(command)
+        except OSError as e:
+            logger.warning(f"ヘルパープロセスを利用できないため、CLIを直接実行します: {e}")
+            return super()._run(command)
+        
+        # シェルはコマンドが見つからない場合に127を返す
+        if returncode == 127:
+            raise FileNotFoundError(command[0])
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, command, output=output, stderr=output)
+        
+        return subprocess.CompletedProcess(command, returncode, stdout=output, stderr='')
+    
+    def _execute(self, command: List[str]) -> Tuple[int, str]:
+        """
+        ヘルパーにコマンドを送信し、終了コードと出力を受け取る
+        
+        Raises:
+            OSError: ヘルパーを起動できない、または通信できない場合
+        """
+        line = f"{shlex.join(command)} 2>&1; printf '\\n%s %s\\n' {self._marker} \"$?\"\n"
+        return self._execute_line(line)
+    
+    def _execute_line(self, line: str) -> Tuple[int, str]:
+        """
+        ヘルパーに1行のシェルコマンドを送信し、終了コードと出力を受け取る
+        
+        ヘルパーが途中で終了した場合は1度だけ再起動して再送する。
+        
+        Raises:
+            OSError: ヘルパーを起動できない、または通信できない場合
+        """
+        try:
+            return self._send(line)
+        except (OSError, EOFError):
+            self._stop_helper()
+            logger.warning("ヘルパープロセスが終了していたため、再起動します。")
+        
+        try:
+            return self._send(line)
+        except (OSError, EOFError) as e:
+            self._stop_helper()
+            raise OSError(f"ヘルパープロセスとの通信に失敗しました: {e}") from e
+    
+    def _send(self, line: str) -> Tuple[int, str]:
+        """ヘルパーに1行のコマンドを書き込み、結果を読み取る"""
+        helper = self._ensure_helper()
+        helper.stdin.write(line)
+        helper.stdin.flush()
+        return self._read_result(helper)
+    
+    def _read_result(self, helper: subprocess.Popen) -> Tuple[int, str]:
+        """目印の行までの出力を読み取り、終了コードと出力を返す"""
+        output_lines = []
+        
+        while True:
+            output_line = helper.stdout.readline()
+            if not output_line:
+                raise EOFError("ヘルパープロセスが終了しました")
+            if output_line.startswith(self._marker):
+                returncode = int(output_line[len(self._marker):].strip())
+                return returncode, ''.join(output_lines).strip()
+            output_lines.append(output_line)
+    
+    def _ensure_helper(self) -> subprocess.Popen:
+        """ヘルパープロセスが動作していなければ起動する"""
+        if self._helper is None or self._helper.poll() is not None:
+            self._stop_helper()
+            self._helper = subprocess.Popen(
+                list(self.helper_command),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True
+            )
+            self.helper_starts += 1
+            logger.debug(f"ヘルパープロセスを起動しました（PID: {self._helper.pid}）")
+        return self._helper
+    
+    def _stop_helper(self):
+        """ヘルパープロセスを終了する"""
+        helper, self._helper = self._helper, None
+        if helper is None:
+            return
+        try:
+            helper.stdin.close()
+            helper.wait(timeout=1)
+        except (OSError, subprocess.TimeoutExpired):
+            helper.kill()
+            helper.wait()
+        helper.stdout.close()
+
+
+def _display_label(display: Optional[str]) -> str:
+    """ログ出力用のディスプレイ名"""
+    return "ディスプレイ" if display is None else f"ディスプレイ '{display}' "
+
+
+def create_display_controller(backend: str = BACKEND_CLI,
+                              command_path: str = 'lunar') -> DisplayController:
+    """
+    設定されたバックエンドのコントローラーを作成する
+    
+    Args:
+        backend (str): バックエンドの種類（'cli' または 'persistent'）
+        command_path (str): lunar コマンドのパス
+        
+    Returns:
+        DisplayController: 作成したコントローラー
+    """
+    if backend == BACKEND_PERSISTENT:
+        return PersistentLunarController(command_path)
+    return LunarController(command_path)
+
+
+def apply_levels(controller: DisplayController,
+                 levels: Dict[Optional[str], float]) -> Dict[Optional[str], bool]:
+    """
+    コントローラーでディスプレイごとの輝度を設定する
+    
+    1台のみの場合はset_brightnessを、複数台の場合はset_brightness_manyを使用する。
+    
+    Args:
+        controller (DisplayController): 使用するコントローラー
+        levels (Dict[Optional[str], float]): ディスプレイごとの輝度レベル
+        
+    Returns:
+        Dict[Optional[str], bool]: ディスプレイごとの成否
+    """
+    if len(levels) != 1:
+        return controller.set_brightness_many(levels)
+    
+    display, level = next(iter(levels.items()))
+    if display is None:
+        return {display: controller.set_brightness(level)}
+    return {display: controller.set_brightness(level, display=display)}
 
 
 def set_display_brightness(brightness_level: float) -> bool:
@@ -109,3 +477,17 @@ def set_display_brightness(brightness_level: float) -> bool:
     """
     controller = LunarController()
     return controller.set_brightness(brightness_level)
+
+
+def set_displays_brightness(levels: Dict[Optional[str], float]) -> Dict[Optional[str], bool]:
+    """
+    複数のディスプレイの輝度を並行して設定する便利な関数
+    
+    Args:
+        levels (Dict[Optional[str], float]): ディスプレイごとの輝度レベル（0-100の範囲）
+        
+    Returns:
+        Dict[Optional[str], bool]: ディスプレイごとの成否
+    """
+    controller = LunarController()
+    return controller.set_brightness_many(levels)
@@ -0,0 +1,191 @@
+"""
+環境光の輝度をディスプレイ輝度に変換する応答カーブ（ルックアップテーブル）モジュール
+"""
+from __future__ import annotations
+import math
+from typing import TYPE_CHECKING, List, Sequence, Tuple
+from .lazy import LazyModule
+
+if TYPE_CHECKING:
+    from .config import BrightnessConfig
+
+# numpyはテーブルを計算する時点で読み込む
+np = LazyModule('numpy')
+
+# 利用可能な応答カーブ
+CURVE_LINEAR = 'linear'
+CURVE_GAMMA = 'gamma'
+CURVE_LOG = 'log'
+CURVE_PIECEWISE = 'piecewise'
+CURVES = (CURVE_LINEAR, CURVE_GAMMA, CURVE_LOG, CURVE_PIECEWISE)
+
+# デフォルトのカーブのパラメーター
+DEFAULT_CURVE_GAMMA = 2.2
+DEFAULT_CURVE_LOG_FACTOR = 10.0
+
+# 環境光の最大値と、ルックアップテーブルの要素数（0-255を1/4刻み）
+MAX_AMBIENT = 255
+DEFAULT_LUT_SIZE = 1021
+
+class ResponseCurve:
+    """
+    環境光の輝度（0-255）を輝度範囲内の位置（0-1）に変換する応答カーブ
+
+    線形以外のカーブは作成時にルックアップテーブルを計算しておき、
+    変換時はテーブルの線形補間のみを行う。
+    線形カーブはテーブルを使わず、従来の計算式と同じ結果を返す。
+    """
+
+    def __init__(self, curve: str = CURVE_LINEAR,
+                 gamma: float = DEFAULT_CURVE_GAMMA,
+                 log_factor: float = DEFAULT_CURVE_LOG_FACTOR,
+                 points: Sequence[Tuple[float, float]] = (),
+                 lut_size: int = DEFAULT_LUT_SIZE):
+        """
+        ResponseCurveを初期化
+
+        Args:
+            curve (str): カーブの種類（'linear', 'gamma', 'log', 'piecewise'）
+            gamma (float): ガンマカーブの指数（1より大きいと暗い環境で低めになる）
+            log_factor (float): 対数カーブの強さ（大きいほど暗い環境での変化が大きい）
+            points (Sequence[Tuple[float, float]]): 折れ線カーブの (環境光, 位置0-1) の点
+            lut_size (int): ルックアップテーブルの要素数
+        """
+        self.curve = curve
+        self.gamma = gamma
+        self.log_factor = log_factor
+        self.points = tuple((float(x), float(y)) for x, y in points)
+        self.lut_size = max(2, lut_size)
+        self.lut = None if curve == CURVE_LINEAR else self._build_lut()
+        # スカラー変換用（numpyのスカラー演算より速い）
+        self._lut_list: List[float] = [] if self.lut is None else self.lut.tolist()
+        self._scale = (self.lut_size - 1) / MAX_AMBIENT
+
+    @classmethod
+    def from_config(cls, config: 'BrightnessConfig') -> 'ResponseCurve':
+        """
+        設定からカーブを作成する
+
+        Args:
+            config (BrightnessConfig): 使用する設定
+
+        Returns:
+            ResponseCurve: 作成したカーブ
+        """
+        return cls(*curve_key(config))
+
+    def fraction(self, ambient_brightness: float) -> float:
+        """
+        環境光の輝度を輝度範囲内の位置に変換する
+
+        Args:
+            ambient_brightness (float): 環境光の輝度（0-255の範囲）
+
+        Returns:
+            float: 輝度範囲内の位置（0-1）
+        """
+        if self.lut is None:
+            return ambient_brightness / MAX_AMBIENT
+
+        position = min(max(ambient_brightness, 0.0), MAX_AMBIENT) * self._scale
+        index = min(int(position), self.lut_size - 2)
+        weight = position - index
+        lut = self._lut_list
+        return lut[index] + (lut[index + 1] - lut[index]) * weight
+
+    def fractions(self, ambient_brightness: np.ndarray) -> np.ndarray:
+        """
+        複数の環境光の輝度をまとめて輝度範囲内の位置に変換する
+
+        Args:
+            ambient_brightness (np.ndarray): 環境光の輝度（0-255の範囲）
+
+        Returns:
+            np.ndarray: 輝度範囲内の位置（0-1）
+        """
+        ambient_brightness = np.asarray(ambient_brightness, dtype=np.float64)
+        if self.lut is None:
+            return ambient_brightness / MAX_AMBIENT
+
+        positions = np.clip(ambient_brightness, 0.0, MAX_AMBIENT) * self._scale
+        indices = np.minimum(positions.astype(np.intp), self.lut_size - 2)
+        weights = positions - indices
+        return self.lut[indices] + (self.lut[indices + 1] - self.lut[indices]) * weights
+
+    def map(self, ambient_brightness: float, min_brightness: float, max_brightness: float) -> float:
+        """
+        環境光の輝度を最小・最大輝度の範囲にマッピングする
+
+        Args:
+            ambient_brightness (float): 環境光の輝度（0-255の範囲）
+            min_brightness (float): 最小輝度
+            max_brightness (float): 最大輝度
+
+        Returns:
+            float: マッピングされたディスプレイ輝度（0-100の範囲）
+        """
+        if min_brightness == max_brightness:
+            return float(min_brightness)
+
+        target_brightness = (
+            min_brightness +
+            self.fraction(ambient_brightness) *
+            (max_brightness - min_brightness)
+        )
+        return max(min_brightness, min(max_brightness, target_brightness))
+
+    def map_many(self, ambient_brightness: np.ndarray,
+                 min_brightness: float, max_brightness: float) -> np.ndarray:
+        """
+        複数の環境光の輝度をまとめて最小・最大輝度の範囲にマッピングする
+
+        Args:
+            ambient_brightness (np.ndarray): 環境光の輝度（0-255の範囲）
+            min_brightness (float): 最小輝度
+            max_brightness (float): 最大輝度
+
+        Returns:
+            np.ndarray: マッピングされたディスプレイ輝度（0-100の範囲）
+        """
+        ambient_brightness = np.asarray(ambient_brightness, dtype=np.float64)
+        if min_brightness == max_brightness:
+            return np.full(ambient_brightness.shape, float(min_brightness))
+
+        target_brightness = (
+            min_brightness +
+            self.fractions(ambient_brightness) *
+            (max_brightness - min_brightness)
+        )
+        return np.clip(target_brightness, min_brightness, max_brightness)
+
+    def _build_lut(self) -> np.ndarray:
+        """カーブの種類に応じたルックアップテーブルを計算する"""
+        # テーブルの各要素に対応する範囲内の位置（0-1）
+        t = np.linspace(0.0, 1.0, self.lut_size)
+
+        if self.curve == CURVE_GAMMA:
+            return t ** self.gamma
+        if self.curve == CURVE_LOG:
+            return np.log1p(self.log_factor * t) / math.log1p(self.log_factor)
+        if self.curve == CURVE_PIECEWISE:
+            xs, ys = zip(*self.points)
+            return np.interp(t * MAX_AMBIENT, xs, ys)
+        raise ValueError(f"不明な応答カーブです: {self.curve}")
+
+
+def curve_key(config: 'BrightnessConfig') -> Tuple:
+    """
+    カーブの形を決める設定値の組（この値が変わった場合のみテーブルを作り直す）
+
+    Args:
+        config (BrightnessConfig): 使用する設定
+
+    Returns:
+        Tuple: (カーブの種類, ガンマ, 対数カーブの強さ, 折れ線の点)
+    """
+    return (
+        config.curve,
+        config.curve_gamma,
+        config.curve_log_factor,
+        tuple(tuple(point) for point in config.curve_points),
+    )
@@ -0,0 +1,259 @@
+"""
+処理段階ごとの所要時間と件数を記録し、ファイルに書き出すメトリクスモジュール
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from .logger import logger
+
+# 所要時間のヒストグラムの区切り（秒）
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0
+)
+
+# Prometheus形式で出力する際のメトリクス名の接頭辞
+METRIC_PREFIX = 'lunar_brightness'
+
+class Histogram:
+    """所要時間の分布（区切りごとの件数・合計・件数）を保持するクラス"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Histogramを初期化
+
+        Args:
+            buckets (Tuple[float, ...]): 区切りの上限（昇順）
+        """
+        self.buckets = buckets
+        # 最後の要素は最大の区切りを超えた件数
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        """値を1件記録する"""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self) -> List[Tuple[str, int]]:
+        """
+        区切りの上限ごとの累積件数（Prometheusのヒストグラム形式）
+
+        Returns:
+            List[Tuple[str, int]]: (上限, 累積件数) の一覧（最後は '+Inf'）
+        """
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            result.append(('+Inf' if bound == float('inf') else f"{bound:g}", total))
+        return result
+
+
+class _Timer:
+    """with 文のブロックの所要時間をヒストグラムに記録するタイマー"""
+
+    __slots__ = ('registry', 'stage', 'start')
+
+    def __init__(self, registry: 'MetricsRegistry', stage: str):
+        self.registry = registry
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.registry.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    """無効時に使う、何も記録しないタイマー"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    """
+    処理段階ごとの所要時間のヒストグラムと、件数のカウンターを保持するクラス
+
+    無効な場合（デフォルト）は、time() が共有の何もしないタイマーを返し、
+    increment() と observe() は即座に戻るため、計測処理への影響はほとんどない。
+    """
+
+    def __init__(self, enabled: bool = False):
+        """
+        MetricsRegistryを初期化
+
+        Args:
+            enabled (bool): 記録を有効にするかどうか
+        """
+        self.enabled = enabled
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def time(self, stage: str):
+        """
+        with 文のブロックの所要時間を記録するタイマーを返す
+
+        Args:
+            stage (str): 処理段階の名前
+
+        Returns:
+            with 文で使うタイマー
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, stage)
+
+    def observe(self, stage: str, seconds: float):
+        """
+        処理段階の所要時間を記録する
+
+        Args:
+            stage (str): 処理段階の名前
+            seconds (float): 所要時間（秒）
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def increment(self, name: str, amount: int = 1):
+        """
+        カウンターを増やす
+
+        Args:
+            name (str): カウンターの名前
+            amount (int): 増やす量
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def reset(self):
+        """記録した値をすべて消去する"""
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def snapshot(self) -> Dict:
+        """
+        記録した値をJSONに変換できる形式で返す
+
+        Returns:
+            Dict: 処理段階ごとの件数・合計・区切りごとの累積件数と、カウンターの値
+        """
+        with self._lock:
+            return {
+                'timestamp': time.time(),
+                'stages': {
+                    stage: {
+                        'count': histogram.count,
+                        'sum_seconds': histogram.sum,
+                        'buckets': dict(histogram.cumulative_counts()),
+                    }
+                    for stage, histogram in self.histograms.items()
+                },
+                'counters': dict(self.counters),
+            }
+
+    def to_prometheus(self) -> str:
+        """
+        記録した値をPrometheusのテキスト形式（node_exporter の textfile collector 用）で返す
+
+        Returns:
+            str: Prometheusのテキスト形式
+        """
+        histogram_name = f"{METRIC_PREFIX}_stage_duration_seconds"
+        lines = [
+            f"# HELP {histogram_name} 処理段階ごとの所要時間（_cpu で終わる段階はCPU時間）",
+            f"# TYPE {histogram_name} histogram",
+        ]
+
+        with self._lock:
+            for stage, histogram in sorted(self.histograms.items()):
+                for bound, count in histogram.cumulative_counts():
+                    lines.append(f'{histogram_name}_bucket{{stage="{stage}",le="{bound}"}} {count}')
+                lines.append(f'{histogram_name}_sum{{stage="{stage}"}} {histogram.sum:.9g}')
+                lines.append(f'{histogram_name}_count{{stage="{stage}"}} {histogram.count}')
+
+            for name, value in sorted(self.counters.items()):
+                counter_name = f"{METRIC_PREFIX}_{name}_total"
+                lines.append(f"# TYPE {counter_name} counter")
+                lines.append(f"{counter_name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """
+        記録した値をファイルに書き出す（読み取り側が書きかけの内容を見ないよう、置き換えで書き込む）
+
+        拡張子が .json の場合はJSON、それ以外はPrometheusのテキスト形式で出力する。
+
+        Args:
+            path (str): 出力先のパス
+        """
+        if path.endswith('.json'):
+            content = json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+        else:
+            content = self.to_prometheus()
+
+        import tempfile
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.metrics-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+            # mkstemp() は所有者のみ読み取り可能なファイルを作るため、他のユーザー（収集側）にも読めるようにする
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+
+# アプリケーション全体で共有するメトリクス（デフォルトは無効）
+metrics = MetricsRegistry()
+
+
+def export_metrics(path: Optional[str]) -> bool:
+    """
+    メトリクスが有効で出力先が指定されていれば、ファイルに書き出す
+
+    書き出せなかった場合は警告を記録し、輝度調整は続行する。
+
+    Args:
+        path (str, optional): 出力先のパス
+
+    Returns:
+        bool: 書き出したかどうか
+    """
+    if not path or not metrics.enabled:
+        return False
+    try:
+        metrics.write(path)
+    except OSError as e:
+        logger.warning(f"メトリクスを '{path}' に書き出せませんでした: {e}")
+        return False
+    return True
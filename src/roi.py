@@ -0,0 +1,177 @@
+"""
+輝度の推定に使うフレーム内の領域（ROI）と、画素ごとの重みを管理するモジュール
+
+ユーザーの顔やディスプレイの光が写る中央部分を除き、フレームの上端や四隅などの
+背景だけから環境光を推定するために使う。領域と重みはフレームの解像度ごとに
+一度だけ計算してキャッシュし、測定時はスライスしたビュー（コピーなし）だけを参照する。
+"""
+from __future__ import annotations
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from .lazy import LazyModule
+from .logger import logger
+
+np = LazyModule('numpy')
+
+# 領域は (左端, 上端, 幅, 高さ) をフレームの幅・高さに対する割合（0-1）で表す
+Region = Tuple[float, float, float, float]
+
+# 名前で指定できる領域
+ROI_PRESETS: Dict[str, Tuple[Region, ...]] = {
+    'full': (),
+    'top': ((0.0, 0.0, 1.0, 0.25),),
+    'corners': (
+        (0.0, 0.0, 0.2, 0.2), (0.8, 0.0, 0.2, 0.2),
+        (0.0, 0.8, 0.2, 0.2), (0.8, 0.8, 0.2, 0.2),
+    ),
+}
+
+# 画素の重み（''=均等、'center'=中央を重視、'vignette'=周辺減光の補正）
+WEIGHT_NONE = ''
+WEIGHT_CENTER = 'center'
+WEIGHT_VIGNETTE = 'vignette'
+WEIGHT_MAPS = (WEIGHT_NONE, WEIGHT_CENTER, WEIGHT_VIGNETTE)
+
+# 中央重視の重み（ガウス分布）の標準偏差（中心から角までの距離を1とする）
+CENTER_WEIGHT_SIGMA = 0.5
+
+# 周辺減光の強さ（cos^4則で、画角の半分をθとした tan²θ に相当）
+DEFAULT_VIGNETTE_STRENGTH = 0.6
+
+
+def parse_regions(value: Union[str, Sequence[Sequence[float]]]) -> List[Region]:
+    """
+    設定値から領域の一覧を作成する
+
+    Args:
+        value: プリセットの名前（'full', 'top', 'corners'）、または [左端, 上端, 幅, 高さ] の一覧
+
+    Returns:
+        List[Region]: 領域の一覧（空の場合はフレーム全体）
+    """
+    if isinstance(value, str):
+        if value not in ROI_PRESETS:
+            logger.warning(f"不明な領域 '{value}' が指定されたため、フレーム全体を使用します。")
+            return []
+        return list(ROI_PRESETS[value])
+    return [tuple(float(v) for v in region) for region in value]
+
+
+def clamp_region(region: Sequence[float]) -> Optional[Region]:
+    """
+    領域をフレームの内側に収める
+
+    Args:
+        region (Sequence[float]): (左端, 上端, 幅, 高さ)
+
+    Returns:
+        Optional[Region]: フレームの内側に収めた領域、面積がない場合はNone
+    """
+    x, y, width, height = (float(v) for v in region)
+    left, top = max(0.0, min(1.0, x)), max(0.0, min(1.0, y))
+    right, bottom = max(left, min(1.0, x + width)), max(top, min(1.0, y + height))
+    if right <= left or bottom <= top:
+        return None
+    return left, top, right - left, bottom - top
+
+
+class FrameRegions:
+    """
+    フレーム内の領域ごとの画素の範囲と重みを、解像度ごとに計算してキャッシュするクラス
+    """
+
+    def __init__(self, regions: Sequence[Region] = (), weight_map: str = WEIGHT_NONE,
+                 vignette_strength: float = DEFAULT_VIGNETTE_STRENGTH):
+        """
+        FrameRegionsを初期化
+
+        Args:
+            regions (Sequence[Region]): 使用する領域（空の場合はフレーム全体）
+            weight_map (str): 画素の重み（'', 'center', 'vignette'）
+            vignette_strength (float): 周辺減光の強さ（'vignette' の場合のみ使用）
+        """
+        self.regions = tuple(regions) or ((0.0, 0.0, 1.0, 1.0),)
+        self.weight_map = weight_map
+        self.vignette_strength = vignette_strength
+        self._layouts: Dict[Tuple[int, int], List[Tuple[Tuple[slice, slice], float]]] = {}
+        self._weights: Dict[Tuple[int, int, int, Tuple[int, int]], np.ndarray] = {}
+
+    def layout(self, height: int, width: int) -> List[Tuple[Tuple[slice, slice], float]]:
+        """
+        領域ごとの画素の範囲と、全体に占める面積の割合を返す
+
+        Args:
+            height (int): フレームの高さ
+            width (int): フレームの幅
+
+        Returns:
+            List[Tuple[Tuple[slice, slice], float]]: (frame[slices] で参照する範囲, 面積の割合) の一覧
+        """
+        key = (height, width)
+        layout = self._layouts.get(key)
+        if layout is None:
+            layout = self._layouts[key] = self._build_layout(height, width)
+        return layout
+
+    def weights(self, index: int, height: int, width: int,
+                shape: Tuple[int, int]) -> Optional[np.ndarray]:
+        """
+        領域の画素の重み（合計すると領域の重み付き平均になるよう正規化したもの）を返す
+
+        Args:
+            index (int): 領域の番号
+            height (int): フレームの高さ
+            width (int): フレームの幅
+            shape (Tuple[int, int]): 輝度計算に使う領域の画像の (高さ, 幅)（縮小後）
+
+        Returns:
+            Optional[np.ndarray]: 重み（float32）、重みを使わない場合はNone
+        """
+        if self.weight_map == WEIGHT_NONE:
+            return None
+        key = (index, height, width, shape)
+        weights = self._weights.get(key)
+        if weights is None:
+            weights = self._weights[key] = self._build_weights(index, height, width, shape)
+        return weights
+
+    def _build_layout(self, height: int, width: int) -> List[Tuple[Tuple[slice, slice], float]]:
+        """解像度に合わせて領域を画素の範囲に変換する"""
+        layout = []
+        for x, y, region_width, region_height in self.regions:
+            left, top = _pixel(x, width), _pixel(y, height)
+            right = max(left + 1, _pixel(x + region_width, width))
+            bottom = max(top + 1, _pixel(y + region_height, height))
+            right, bottom = min(right, width), min(bottom, height)
+            left, top = min(left, right - 1), min(top, bottom - 1)
+            layout.append(((slice(top, bottom), slice(left, right)), (bottom - top) * (right - left)))
+
+        total = sum(area for _, area in layout)
+        return [(slices, area / total) for slices, area in layout]
+
+    def _build_weights(self, index: int, height: int, width: int,
+                       shape: Tuple[int, int]) -> np.ndarray:
+        """領域の画素の重みを計算する"""
+        (rows, columns), _ = self.layout(height, width)[index]
+        # 縮小後の画素の中心を、フレーム全体での位置（中心が0、角までの距離が1）に換算する
+        y = np.linspace(rows.start, rows.stop, shape[0], endpoint=False, dtype=np.float64)
+        x = np.linspace(columns.start, columns.stop, shape[1], endpoint=False, dtype=np.float64)
+        y += (rows.stop - rows.start) / shape[0] / 2
+        x += (columns.stop - columns.start) / shape[1] / 2
+        half_diagonal_sq = (height / 2) ** 2 + (width / 2) ** 2
+        radius_sq = (
+            ((y - height / 2) ** 2)[:, np.newaxis] + ((x - width / 2) ** 2)[np.newaxis, :]
+        ) / half_diagonal_sq
+
+        if self.weight_map == WEIGHT_CENTER:
+            weights = np.exp(-radius_sq / (2 * CENTER_WEIGHT_SIGMA ** 2))
+            weights /= weights.sum()
+        else:
+            # cos^4則の減光を打ち消す係数で、平均は画素数で割る
+            weights = (1 + self.vignette_strength * radius_sq) ** 2
+            weights /= weights.size
+        return weights.astype(np.float32)
+
+
+def _pixel(fraction: float, size: int) -> int:
+    """割合を画素の位置に変換する"""
+    return int(round(fraction * size))
@@ -0,0 +1,226 @@
+"""
+環境光の変化の速さに応じて、デーモンモードの調整間隔を決めるスケジューラーモジュール
+
+明るさが変化している間は間隔を短くし、安定している間は最大間隔まで指数的に延ばす。
+静音時間帯（quiet_hours）の間は測定しない。時刻は差し替え可能な時計から取得するため、
+判断は決定的でテストしやすい。
+"""
+import math
+import time
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple
+from .logger import logger
+
+if TYPE_CHECKING:
+    from .config import BrightnessConfig
+
+# 1日の秒数
+SECONDS_PER_DAY = 24 * 60 * 60
+
+# デフォルトの最小・最大間隔（秒）、安定時の間隔の倍率、変化とみなす環境光の差（0-255）
+DEFAULT_MIN_INTERVAL = 5.0
+DEFAULT_MAX_INTERVAL = 300.0
+DEFAULT_INTERVAL_BACKOFF = 2.0
+DEFAULT_CHANGE_THRESHOLD = 5.0
+
+# 静音時間帯（1日の始まりからの秒数の (開始, 終了)、終了が開始より前なら日付をまたぐ）
+QuietPeriod = Tuple[int, int]
+
+
+class SystemClock:
+    """実際の時刻を返す時計"""
+
+    def monotonic(self) -> float:
+        """経過時間の計測に使う時刻（秒）"""
+        return time.monotonic()
+
+    def seconds_of_day(self) -> float:
+        """ローカル時刻の、その日の始まりからの秒数"""
+        now = time.time()
+        local = time.localtime(now)
+        return local.tm_hour * 3600 + local.tm_min * 60 + local.tm_sec + (now % 1)
+
+
+def parse_time_of_day(value: str) -> int:
+    """
+    'HH:MM'（または 'HH:MM:SS'）を1日の始まりからの秒数に変換する
+
+    Raises:
+        ValueError: 形式が正しくない場合
+    """
+    parts = [int(part) for part in str(value).split(':')]
+    if not 2 <= len(parts) <= 3:
+        raise ValueError(f"時刻は HH:MM の形式で指定してください: {value}")
+    hours, minutes, seconds = (parts + [0])[:3]
+    if not (0 <= hours <= 24 and 0 <= minutes < 60 and 0 <= seconds < 60) or \
+            hours * 3600 + minutes * 60 + seconds > SECONDS_PER_DAY:
+        raise ValueError(f"時刻の値が範囲外です: {value}")
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def parse_quiet_hours(periods: Sequence[Sequence[str]]) -> List[QuietPeriod]:
+    """
+    静音時間帯の設定値を (開始, 終了) の秒数の一覧に変換する（不正な値は警告して除く）
+
+    Args:
+        periods (Sequence[Sequence[str]]): ["23:00", "07:00"] のような (開始, 終了) の一覧
+
+    Returns:
+        List[QuietPeriod]: 静音時間帯の一覧
+    """
+    result = []
+    for period in periods:
+        try:
+            start, end = period
+            start_seconds, end_seconds = parse_time_of_day(start), parse_time_of_day(end)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"静音時間帯 {period} を解釈できないため、無視します: {e}")
+            continue
+        if start_seconds % SECONDS_PER_DAY != end_seconds % SECONDS_PER_DAY:
+            result.append((start_seconds % SECONDS_PER_DAY, end_seconds % SECONDS_PER_DAY))
+    return result
+
+
+class AdaptiveScheduler:
+    """
+    直前の測定値からの変化の速さに応じて、次の調整サイクルまでの間隔を決めるクラス
+
+    * 前回の測定から change_threshold 以上変化した場合は、同じ速さで変化が続いても
+      次の測定までの変化が change_threshold 程度に収まる間隔にする（min_interval 以上）
+    * 変化が小さい場合は、間隔を backoff 倍ずつ max_interval まで延ばす
+    * 測定に失敗した場合は間隔を変えない
+
+    adaptive が False の場合は、静音時間帯のみを扱い、間隔は常に interval とする。
+    """
+
+    def __init__(self, interval: float, adaptive: bool = False,
+                 min_interval: float = DEFAULT_MIN_INTERVAL,
+                 max_interval: float = DEFAULT_MAX_INTERVAL,
+                 backoff: float = DEFAULT_INTERVAL_BACKOFF,
+                 change_threshold: float = DEFAULT_CHANGE_THRESHOLD,
+                 quiet_hours: Sequence[QuietPeriod] = (), clock=None):
+        """
+        AdaptiveSchedulerを初期化
+
+        Args:
+            interval (float): 固定の調整間隔（秒、adaptive が False の場合と開始時の間隔）
+            adaptive (bool): 環境光の変化に応じて間隔を変えるかどうか
+            min_interval (float): 最小の間隔（秒）
+            max_interval (float): 最大の間隔（秒）
+            backoff (float): 安定している場合に間隔を延ばす倍率
+            change_threshold (float): 変化とみなす環境光の差（0-255）
+            quiet_hours (Sequence[QuietPeriod]): 静音時間帯
+            clock: monotonic() と seconds_of_day() を持つ時計（省略時は SystemClock）
+        """
+        self.base_interval = max(0.0, interval)
+        self.clock = clock or SystemClock()
+        self.adaptive = adaptive
+        self.min_interval = max(0.0, min_interval)
+        self.max_interval = max(self.min_interval, max_interval)
+        self.backoff = max(1.0, backoff)
+        self.change_threshold = max(0.0, change_threshold)
+        self.quiet_hours = list(quiet_hours)
+        self.interval = self._initial_interval()
+        self._previous: Optional[Tuple[float, float]] = None
+
+    @classmethod
+    def from_config(cls, config: 'BrightnessConfig', interval: float,
+                    clock=None) -> 'AdaptiveScheduler':
+        """
+        設定からスケジューラーを作成する
+
+        Args:
+            config (BrightnessConfig): 使用する設定
+            interval (float): 固定の調整間隔（秒）
+            clock: 時計（省略時は SystemClock）
+
+        Returns:
+            AdaptiveScheduler: 作成したスケジューラー
+        """
+        scheduler = cls(interval, clock=clock)
+        scheduler.configure(config)
+        return scheduler
+
+    def configure(self, config: 'BrightnessConfig'):
+        """
+        設定の値を反映する（設定の再読み込み時にも呼ばれる）
+
+        Args:
+            config (BrightnessConfig): 使用する設定
+        """
+        adaptive_changed = self.adaptive != config.adaptive_interval
+        self.adaptive = config.adaptive_interval
+        self.min_interval = config.min_interval
+        self.max_interval = max(config.min_interval, config.max_interval)
+        self.backoff = config.interval_backoff
+        self.change_threshold = config.change_threshold
+        self.quiet_hours = list(config.quiet_hours)
+        if adaptive_changed:
+            self.reset()
+        elif self.adaptive:
+            self.interval = min(self.max_interval, max(self.min_interval, self.interval))
+
+    def reset(self):
+        """直前の測定値を忘れ、開始時の間隔に戻す"""
+        self._previous = None
+        self.interval = self._initial_interval()
+
+    def quiet_remaining(self) -> float:
+        """
+        現在が静音時間帯であれば、その終了までの秒数を返す
+
+        Returns:
+            float: 静音時間帯の終了までの秒数（静音時間帯でなければ0）
+        """
+        now = self.clock.seconds_of_day()
+        remaining = 0.0
+        for start, end in self.quiet_hours:
+            if _in_period(now, start, end):
+                remaining = max(remaining, (end - now) % SECONDS_PER_DAY)
+        return remaining
+
+    def next_interval(self, ambient: Optional[float]) -> float:
+        """
+        測定値を記録し、次の調整サイクルまでの間隔を決める
+
+        Args:
+            ambient (float, optional): 今回の環境光の測定値（失敗した場合はNoneまたはNaN）
+
+        Returns:
+            float: 次のサイクルまでの間隔（秒）
+        """
+        if not self.adaptive:
+            return self.base_interval
+        if ambient is None or math.isnan(ambient):
+            return self.interval
+
+        now = self.clock.monotonic()
+        previous, self._previous = self._previous, (now, ambient)
+        if previous is None:
+            return self.interval
+
+        previous_time, previous_ambient = previous
+        change = abs(ambient - previous_ambient)
+        elapsed = now - previous_time
+
+        if change >= self.change_threshold and change > 0 and elapsed > 0:
+            # 同じ速さで変化が続いた場合に、次の測定までの変化が閾値程度になる間隔
+            rate = change / elapsed
+            self.interval = max(self.min_interval, min(self.max_interval, self.change_threshold / rate))
+            logger.debug(
+                "環境光が変化しています（%.1f/秒）。調整間隔を %.1f秒にします。", rate, self.interval
+            )
+        else:
+            self.interval = min(self.max_interval, max(self.min_interval, self.interval * self.backoff))
+            logger.debug("環境光は安定しています。調整間隔を %.1f秒にします。", self.interval)
+        return self.interval
+
+    def _initial_interval(self) -> float:
+        """開始時の間隔（可変の場合は最小間隔から始め、変化を早く捉える）"""
+        return self.min_interval if self.adaptive else self.base_interval
+
+
+def _in_period(now: float, start: int, end: int) -> bool:
+    """時刻が静音時間帯に含まれるかどうか（日付をまたぐ時間帯にも対応）"""
+    if start < end:
+        return start <= now < end
+    return now >= start or now < end
@@ -0,0 +1,530 @@
+"""
+カメラを1つのプロセスで保持して環境光を測定し続け、最新の測定値をUnixドメインソケットで配信するモジュール
+
+プロトコルは1行に1つのJSON（JSON Lines）:
+    {"command": "get"}        最新の測定値を1行で返す（リクエスト/レスポンス）
+    {"command": "subscribe"}  新しい測定値が得られるたびに1行ずつ送り続ける
+
+測定値の形式:
+    {"ambient": 123.45, "samples": 8, "timestamp": 1700000000.0, "duration": 0.57,
+     "interval": 0.0, "sequence": 12}
+
+測定に失敗している間（カメラが外された場合など）は、古い測定値の代わりにエラーを返す。
+
+RemoteSensor は AmbientLightSensor と同じ measure_ambient_light() を持つクライアントで、
+BrightnessAdjuster のセンサーとしてそのまま使える。
+"""
+from __future__ import annotations
+import json
+import os
+import signal
+import socket
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Optional, Set, Tuple
+from .logger import logger
+
+if TYPE_CHECKING:
+    from .camera import AmbientLightSensor
+
+# ソケットのファイル名（設定で指定しない場合は XDG_RUNTIME_DIR または /tmp に作る）
+DEFAULT_SOCKET_NAME = 'lunar-brightness.sock'
+
+# 最初の測定値が得られるまで get を待たせる最大時間（秒）
+FIRST_READING_TIMEOUT = 10.0
+
+# クライアントが応答を待つ最大時間（秒、カメラのウォームアップと最初の測定を含む）
+DEFAULT_CLIENT_TIMEOUT = 15.0
+
+# 測定に失敗した場合に、カメラを開き直すまで待つ時間（秒）
+RETRY_DELAY = 1.0
+
+# クライアントが受け入れる測定値の古さの上限を、測定時間の何倍とするか
+# （これにサーバーの測定の開始間隔を加えた時間より古い測定値は使わない）
+STALE_READING_FACTOR = 3.0
+
+# 停止要求を確認する間隔（秒）
+ACCEPT_POLL_INTERVAL = 0.5
+
+COMMAND_GET = 'get'
+COMMAND_SUBSCRIBE = 'subscribe'
+
+
+def default_socket_path() -> str:
+    """設定で指定しない場合のソケットのパス"""
+    directory = os.environ.get('XDG_RUNTIME_DIR') or '/tmp'
+    return os.path.join(directory, DEFAULT_SOCKET_NAME)
+
+
+class AmbientLightService:
+    """
+    センサーで環境光を測定し続け、最新の測定値を複数のクライアントに配信するサーバー
+
+    測定は専用のスレッドで行い、クライアントごとのスレッドは測定値を待って送るのみとする。
+    測定値はJSONの行に一度だけ変換し、すべてのクライアントに同じバイト列を送る。
+    """
+
+    def __init__(self, sensor: 'AmbientLightSensor', socket_path: str,
+                 duration: float = 1.0, interval: float = 0.0):
+        """
+        AmbientLightServiceを初期化
+
+        Args:
+            sensor (AmbientLightSensor): 測定に使うセンサー（サーバーが開閉する）
+            socket_path (str): 待ち受けるUnixドメインソケットのパス
+            duration (float): 1回の測定時間（秒）
+            interval (float): 測定の開始間隔（秒、0=連続して測定する）
+        """
+        self.sensor = sensor
+        self.socket_path = socket_path
+        self.duration = duration
+        self.interval = max(0.0, interval)
+        self.latest: Optional[Dict[str, Any]] = None
+        self.sequence = 0
+        self.requests = 0
+        self.failures = 0
+        self._line = b''
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._listener: Optional[socket.socket] = None
+        self._connections: Set[socket.socket] = set()
+        self._threads = []
+
+    @property
+    def stopped(self) -> bool:
+        """停止が要求されているかどうか"""
+        return self._stop_event.is_set()
+
+    def start(self):
+        """
+        ソケットで待ち受けを開始し、測定と接続受け付けのスレッドを起動する
+
+        Raises:
+            OSError: ソケットを作成できない場合（別のサーバーが実行中の場合を含む）
+        """
+        self._listener = self._bind()
+        for target, name in ((self._measure_loop, 'ambient-measure'),
+                             (self._accept_loop, 'ambient-accept')):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"環境光の配信を開始しました: {self.socket_path}")
+
+    def stop(self):
+        """待ち受けと測定を停止し、接続中のクライアントを切断してカメラを解放する"""
+        self._stop_event.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._listener is not None:
+            # accept() で待っているスレッドをすぐに起こすため、自分で接続する
+            _is_listening(self.socket_path)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+        with self._condition:
+            connections = list(self._connections)
+        for connection in connections:
+            _shutdown(connection)
+        self.sensor.close()
+
+    def run(self) -> int:
+        """
+        停止が要求されるまで配信する（SIGTERM/SIGINTで停止する）
+
+        Returns:
+            int: 終了コード（0=正常終了）
+        """
+        def handle_signal(signum, frame):
+            logger.info(f"シグナル {signum} を受信しました。配信を停止します...")
+            self._stop_event.set()
+
+        signal.signal(signal.SIGTERM, handle_signal)
+        signal.signal(signal.SIGINT, handle_signal)
+
+        try:
+            self.start()
+        except OSError as e:
+            logger.error(f"ソケット '{self.socket_path}' で待ち受けられませんでした: {e}")
+            return 1
+        try:
+            while not self._stop_event.wait(ACCEPT_POLL_INTERVAL):
+                pass
+        finally:
+            self.stop()
+        logger.info(f"環境光の配信を停止しました（測定回数: {self.sequence}, リクエスト数: {self.requests}）")
+        return 0
+
+    def publish(self, ambient: float, samples: int, duration: Optional[float] = None):
+        """
+        新しい測定値を最新の値とし、待っているクライアントに通知する
+
+        Args:
+            ambient (float): 環境光の平均輝度（0-255）
+            samples (int): 平均に使ったフレーム数
+            duration (float, optional): 測定に要した時間（秒）
+        """
+        with self._condition:
+            self.sequence += 1
+            self.latest = {
+                'ambient': ambient,
+                'samples': samples,
+                'timestamp': time.time(),
+                'duration': duration,
+                'interval': self.interval,
+                'sequence': self.sequence,
+            }
+            self._line = (json.dumps(self.latest) + '\n').encode('utf-8')
+            self._condition.notify_all()
+
+    def invalidate(self):
+        """測定に失敗したため、最新の測定値を破棄する（次の測定値が得られるまで get はエラーを返す）"""
+        with self._condition:
+            self.failures += 1
+            self.latest = None
+            self._line = b''
+
+    def current_reading(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        """
+        最新の測定値を返す（最初の測定値のみ、得られるまで待つ）
+
+        Args:
+            timeout (float, optional): 最初の測定値を待つ最大時間（秒）
+
+        Returns:
+            Optional[bytes]: 測定値のJSONの行、測定値がない（測定に失敗している）場合はNone
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self.sequence > 0 or self.stopped, timeout=timeout)
+            return self._line if self.latest is not None else None
+
+    def wait_for_reading(self, after: int = 0,
+                         timeout: Optional[float] = None) -> Optional[Tuple[int, bytes]]:
+        """
+        番号が after より新しい測定値を待つ
+
+        Args:
+            after (int): 既に受け取った測定値の番号
+            timeout (float, optional): 待つ最大時間（秒、Noneの場合は停止まで待つ）
+
+        Returns:
+            Optional[Tuple[int, bytes]]: (測定値の番号, JSONの行)、時間切れまたは停止した場合はNone
+        """
+        with self._condition:
+            if not self._condition.wait_for(
+                lambda: self.sequence > after or self.stopped, timeout=timeout
+            ) or self.sequence <= after:
+                return None
+            return self.sequence, self._line
+
+    def _bind(self) -> socket.socket:
+        """ソケットを作成する（応答のない古いソケットのファイルは置き換える）"""
+        if os.path.exists(self.socket_path):
+            if _is_listening(self.socket_path):
+                raise OSError(f"別のサーバーが '{self.socket_path}' で実行中です")
+            os.unlink(self.socket_path)
+
+        directory = os.path.dirname(os.path.abspath(self.socket_path))
+        os.makedirs(directory, exist_ok=True)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            # 測定値は同じユーザーのプロセスのみが読めるようにする
+            # （作成した時点から権限を絞るため、bind() の間だけ umask を変更する）
+            previous_umask = os.umask(0o077)
+            try:
+                listener.bind(self.socket_path)
+            finally:
+                os.umask(previous_umask)
+            os.chmod(self.socket_path, 0o600)
+            listener.listen()
+            listener.settimeout(ACCEPT_POLL_INTERVAL)
+        except OSError:
+            listener.close()
+            raise
+        return listener
+
+    def _measure_loop(self):
+        """停止が要求されるまで測定を繰り返し、測定値を配信する"""
+        while not self.stopped:
+            start = time.monotonic()
+            try:
+                ambient = self.sensor.measure_ambient_light(duration=self.duration)
+            except Exception as e:
+                logger.error(f"環境光の測定中にエラーが発生しました: {e}")
+                ambient = None
+
+            if ambient is None:
+                # 古い測定値を配信し続けないよう破棄し、次の測定でカメラを開き直す
+                self.invalidate()
+                self.sensor.close()
+                self._stop_event.wait(RETRY_DELAY)
+                continue
+
+            self.publish(
+                ambient, self.sensor.last_sample_count,
+                getattr(self.sensor, 'last_measure_duration', None)
+            )
+            self._stop_event.wait(max(0.0, start + self.interval - time.monotonic()))
+
+    def _accept_loop(self):
+        """クライアントの接続を受け付け、クライアントごとのスレッドで処理する"""
+        while not self.stopped:
+            try:
+                connection, _ = self._listener.accept()
+            except socket.timeout:
+                continue
+            except OSError as e:
+                if not self.stopped:
+                    logger.error(f"接続の受け付け中にエラーが発生しました: {e}")
+                return
+            if self.stopped:
+                connection.close()
+                return
+            connection.settimeout(None)
+            with self._condition:
+                self._connections.add(connection)
+            threading.Thread(
+                target=self._serve_client, args=(connection,), name='ambient-client', daemon=True
+            ).start()
+
+    def _serve_client(self, connection: socket.socket):
+        """1つのクライアントのリクエストを、切断されるまで処理する"""
+        try:
+            with connection, connection.makefile('rb') as reader:
+                for line in reader:
+                    if not line.strip():
+                        continue
+                    with self._condition:
+                        self.requests += 1
+                    command = _parse_command(line)
+                    if command == COMMAND_GET:
+                        reading = self.current_reading(timeout=FIRST_READING_TIMEOUT)
+                        connection.sendall(reading or _error("測定値がありません"))
+                    elif command == COMMAND_SUBSCRIBE:
+                        self._stream(connection)
+                        return
+                    else:
+                        connection.sendall(_error(f"不明なコマンドです: {command}"))
+        except OSError:
+            # クライアントが切断した場合
+            pass
+        finally:
+            with self._condition:
+                self._connections.discard(connection)
+
+    def _stream(self, connection: socket.socket):
+        """最新の測定値から順に、新しい測定値を送り続ける"""
+        sequence = max(0, self.sequence - 1)
+        while not self.stopped:
+            reading = self.wait_for_reading(sequence)
+            if reading is None:
+                return
+            sequence, line = reading
+            connection.sendall(line)
+
+
+class RemoteSensor:
+    """
+    AmbientLightService から測定値を受け取るクライアント
+
+    AmbientLightSensor と同じ measure_ambient_light()/close() を持つため、
+    BrightnessAdjuster のセンサーとして使える。接続は測定のたびに使い回す。
+    max_age とサーバーの測定の開始間隔の合計より古い測定値は、測定の失敗として扱う。
+    """
+
+    def __init__(self, socket_path: str, timeout: float = DEFAULT_CLIENT_TIMEOUT,
+                 max_age: float = STALE_READING_FACTOR):
+        """
+        RemoteSensorを初期化
+
+        Args:
+            socket_path (str): サーバーのソケットのパス
+            timeout (float): 応答を待つ最大時間（秒）
+            max_age (float): 受け入れる測定値の古さの上限（秒、サーバーの測定の開始間隔を除く）
+        """
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.max_age = max(0.0, max_age)
+        self.last_sample_count = 0
+        self.last_measure_duration: Optional[float] = None
+        self.last_reading: Optional[Dict[str, Any]] = None
+        self._socket: Optional[socket.socket] = None
+        self._reader = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def open(self) -> bool:
+        """
+        サーバーに接続する
+
+        Returns:
+            bool: 接続できたかどうか
+        """
+        self.close()
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.settimeout(self.timeout)
+        try:
+            connection.connect(self.socket_path)
+        except OSError as e:
+            connection.close()
+            logger.error(f"環境光のサーバー（{self.socket_path}）に接続できませんでした: {e}")
+            return False
+        self._socket = connection
+        self._reader = connection.makefile('rb')
+        return True
+
+    def close(self):
+        """接続を閉じる"""
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def measure_ambient_light(self, duration: float = 1.0,
+                              sample_interval: float = 0.1) -> Optional[float]:
+        """
+        サーバーが測定した最新の環境光の輝度を返す
+
+        測定時間とサンプリング間隔はサーバーの設定が使われるため、引数は無視する。
+
+        Returns:
+            Optional[float]: 平均輝度（0-255の範囲）、またはエラー時にNone
+        """
+        if self._socket is None and not self.open():
+            return None
+
+        try:
+            self._socket.sendall(_request(COMMAND_GET))
+            reading = self._read()
+        except (OSError, ValueError) as e:
+            logger.error(f"環境光のサーバーから測定値を受け取れませんでした: {e}")
+            self.close()
+            return None
+
+        if reading is None or 'ambient' not in reading:
+            error = reading.get('error') if reading else "接続が閉じられました"
+            logger.error(f"環境光のサーバーから測定値を受け取れませんでした: {error}")
+            self.close()
+            return None
+
+        age = time.time() - float(reading.get('timestamp', 0.0))
+        max_age = self.max_age + float(reading.get('interval') or 0.0)
+        if age > max_age:
+            logger.error(
+                f"環境光のサーバーの測定値が古いため使用しません（{age:.1f}秒前、上限 {max_age:.1f}秒）"
+            )
+            return None
+
+        self.last_reading = reading
+        self.last_sample_count = int(reading.get('samples', 0))
+        self.last_measure_duration = reading.get('duration')
+        return float(reading['ambient'])
+
+    def subscribe(self) -> Iterator[Dict[str, Any]]:
+        """
+        新しい測定値が得られるたびに返すイテレーター（接続が閉じられると終了する）
+
+        Yields:
+            Dict[str, Any]: 測定値
+        """
+        if self._socket is None and not self.open():
+            return
+        self._socket.settimeout(None)
+        self._socket.sendall(_request(COMMAND_SUBSCRIBE))
+        try:
+            while True:
+                reading = self._read()
+                if reading is None:
+                    return
+                self.last_reading = reading
+                yield reading
+        finally:
+            self.close()
+
+    def _read(self) -> Optional[Dict[str, Any]]:
+        """1行のJSONを読み取る（接続が閉じられた場合はNone）"""
+        line = self._reader.readline()
+        if not line:
+            return None
+        return json.loads(line)
+
+
+def _request(command: str) -> bytes:
+    """リクエストの行"""
+    return (json.dumps({'command': command}) + '\n').encode('utf-8')
+
+
+def _error(message: str) -> bytes:
+    """エラーの応答の行"""
+    return (json.dumps({'error': message}, ensure_ascii=False) + '\n').encode('utf-8')
+
+
+def _parse_command(line: bytes) -> Optional[str]:
+    """リクエストの行からコマンドを取り出す（JSONでない場合は行の文字列をコマンドとみなす）"""
+    try:
+        request = json.loads(line)
+    except ValueError:
+        return line.decode('utf-8', 'replace').strip()
+    if isinstance(request, dict):
+        return request.get('command')
+    return None
+
+
+def _is_listening(path: str) -> bool:
+    """ソケットのファイルで、実際にサーバーが待ち受けているかどうか"""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+def _shutdown(connection: socket.socket):
+    """読み取りを待っているスレッドを起こすため、接続を切断する"""
+    try:
+        connection.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+def main(socket_path: Optional[str] = None, interval: float = 0.0,
+         config_path: Optional[str] = None) -> int:
+    """
+    serve サブコマンドのエントリーポイント
+
+    Args:
+        socket_path (str, optional): 待ち受けるソケットのパス（省略時は設定の sensor_socket、
+            それも空の場合は default_socket_path()）
+        interval (float): 測定の開始間隔（秒、0=連続して測定する）
+        config_path (str, optional): 設定ファイルのパス
+
+    Returns:
+        int: 終了コード（0=正常終了）
+    """
+    from .camera import AmbientLightSensor
+    from .config import load_config
+
+    config = load_config(config_path)
+    path = socket_path or config.sensor_socket or default_socket_path()
+    service = AmbientLightService(
+        AmbientLightSensor.from_config(config), path,
+        duration=config.capture_duration, interval=interval
+    )
+    return service.run()
@@ -0,0 +1,289 @@
+"""
+輝度測定に使うフレームの取得元（カメラ・動画ファイル・画像ディレクトリ・合成フレーム）を提供するモジュール
+
+どの取得元も cv2.VideoCapture と同じ grab()/retrieve()/get()/set() を持つため、
+AmbientLightSensor はカメラと同じ処理でフレームを読み取れる。
+"""
+from __future__ import annotations
+import itertools
+import os
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+from .lazy import LazyModule
+
+try:
+    from typing import Protocol
+except ImportError:  # Python 3.7 以前
+    Protocol = object
+
+cv2 = LazyModule('cv2')
+np = LazyModule('numpy')
+
+# 画像ディレクトリから読み込むファイルの拡張子
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+
+# フレームレートが分からない取得元で仮定するフレームレート
+DEFAULT_SOURCE_FPS = 30.0
+
+# 合成フレームのデフォルトの大きさと明るさ
+DEFAULT_SYNTHETIC_SIZE = (320, 240)
+DEFAULT_SYNTHETIC_LEVELS = (40, 80, 120, 160)
+
+# frame_source の設定値
+SOURCE_CAMERA = 'camera'
+SOURCE_SYNTHETIC = 'synthetic'
+
+class FrameSource(Protocol):
+    """
+    フレームの取得元（cv2.VideoCapture のうち AmbientLightSensor が使う部分）
+
+    live が False の取得元（ファイルや合成フレーム）は、フレームの到着を待たずに
+    CPUが許す限りの速さで読み取られる。
+    """
+
+    live: bool
+
+    def open(self) -> bool:
+        """取得元を（最初から）開き、開けたかどうかを返す"""
+
+    def isOpened(self) -> bool:
+        """開いているかどうか"""
+
+    def grab(self) -> bool:
+        """次のフレームに進む（デコードは retrieve() で行う）"""
+
+    def retrieve(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """grab() したフレームを返す"""
+
+    def get(self, prop_id: int) -> float:
+        """プロパティの値を返す（未対応の場合は0）"""
+
+    def set(self, prop_id: int, value: float) -> bool:
+        """プロパティを設定する（未対応の場合はFalse）"""
+
+    def release(self):
+        """リソースを解放する"""
+
+
+class _CaptureSource:
+    """cv2.VideoCapture で開く取得元の共通部分"""
+
+    live = True
+
+    def __init__(self, target):
+        """
+        Args:
+            target: cv2.VideoCapture に渡すカメラのインデックスまたはファイルのパス
+        """
+        self.target = target
+        self.capture = None
+
+    def open(self) -> bool:
+        self.capture = cv2.VideoCapture(self.target)
+        return bool(self.capture.isOpened())
+
+    def isOpened(self) -> bool:
+        return self.capture is not None and self.capture.isOpened()
+
+    def grab(self) -> bool:
+        return self.capture.grab()
+
+    def retrieve(self) -> Tuple[bool, Optional[np.ndarray]]:
+        return self.capture.retrieve()
+
+    def get(self, prop_id: int) -> float:
+        return self.capture.get(prop_id)
+
+    def set(self, prop_id: int, value: float) -> bool:
+        return self.capture.set(prop_id, value)
+
+    def release(self):
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
+
+
+class CameraSource(_CaptureSource):
+    """カメラデバイス（V4L2 など、cv2.VideoCapture のインデックスで指定）"""
+
+    live = True
+
+    def __init__(self, camera_index: int = 0):
+        """
+        CameraSourceを初期化
+
+        Args:
+            camera_index (int): 使用するカメラのインデックス
+        """
+        super().__init__(camera_index)
+        self.camera_index = camera_index
+
+
+class VideoFileSource(_CaptureSource):
+    """録画した動画ファイル"""
+
+    live = False
+
+    def __init__(self, path: str):
+        """
+        VideoFileSourceを初期化
+
+        Args:
+            path (str): 動画ファイルのパス
+        """
+        super().__init__(path)
+        self.path = path
+
+
+class _OfflineSource:
+    """ファイル以外の、カメラのプロパティを持たない取得元の共通部分"""
+
+    live = False
+
+    def __init__(self, fps: float = DEFAULT_SOURCE_FPS):
+        self.fps = fps
+        self.opened = False
+        self.frame: Optional[np.ndarray] = None
+
+    def isOpened(self) -> bool:
+        return self.opened
+
+    def get(self, prop_id: int) -> float:
+        if prop_id == cv2.CAP_PROP_FPS:
+            return self.fps
+        return 0.0
+
+    def set(self, prop_id: int, value: float) -> bool:
+        return False
+
+    def release(self):
+        self.opened = False
+        self.frame = None
+
+
+class ImageDirectorySource(_OfflineSource):
+    """ディレクトリ内の画像ファイル（ファイル名順に1枚ずつフレームとして返す）"""
+
+    def __init__(self, path: str, fps: float = DEFAULT_SOURCE_FPS, loop: bool = False):
+        """
+        ImageDirectorySourceを初期化
+
+        Args:
+            path (str): 画像ファイルのあるディレクトリ
+            fps (float): 画像を撮影したときのフレームレートとみなす値
+            loop (bool): 最後の画像の後に最初の画像に戻るかどうか
+        """
+        super().__init__(fps)
+        self.path = path
+        self.loop = loop
+        self.files: List[str] = []
+        self._index = -1
+
+    def open(self) -> bool:
+        try:
+            names = sorted(os.listdir(self.path))
+        except OSError:
+            names = []
+        self.files = [
+            os.path.join(self.path, name) for name in names
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        ]
+        self._index = -1
+        self.opened = bool(self.files)
+        return self.opened
+
+    def grab(self) -> bool:
+        if not self.opened:
+            return False
+        self._index += 1
+        if self._index >= len(self.files):
+            if not self.loop:
+                return False
+            self._index = 0
+        return True
+
+    def retrieve(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if not 0 <= self._index < len(self.files):
+            return False, None
+        frame = cv2.imread(self.files[self._index], cv2.IMREAD_COLOR)
+        return frame is not None, frame
+
+
+class SyntheticSource(_OfflineSource):
+    """合成フレームを生成する取得元"""
+
+    def __init__(self, frames: Optional[Iterable[np.ndarray]] = None,
+                 count: Optional[int] = None, fps: float = DEFAULT_SOURCE_FPS,
+                 size: Tuple[int, int] = DEFAULT_SYNTHETIC_SIZE,
+                 levels: Sequence[int] = DEFAULT_SYNTHETIC_LEVELS):
+        """
+        SyntheticSourceを初期化
+
+        Args:
+            frames (Iterable[np.ndarray], optional): 返すフレーム（ジェネレーターも可）
+                省略した場合は、levels の明るさの一様なフレームを順に繰り返す
+            count (int, optional): 返すフレームの最大数（省略した場合は frames が尽きるまで）
+            fps (float): フレームレートとみなす値
+            size (Tuple[int, int]): frames を省略した場合のフレームの (幅, 高さ)
+            levels (Sequence[int]): frames を省略した場合のフレームごとの明るさ
+        """
+        super().__init__(fps)
+        self.frames = frames
+        self.count = count
+        self.size = size
+        self.levels = tuple(levels)
+        self.frames_read = 0
+        self._iterator: Optional[Iterator[np.ndarray]] = None
+
+    def open(self) -> bool:
+        frames = self.frames if self.frames is not None else self._uniform_frames()
+        self._iterator = iter(frames)
+        self.frames_read = 0
+        self.frame = None
+        self.opened = True
+        return True
+
+    def grab(self) -> bool:
+        if not self.opened or (self.count is not None and self.frames_read >= self.count):
+            return False
+        try:
+            self.frame = next(self._iterator)
+        except StopIteration:
+            self.frame = None
+            return False
+        self.frames_read += 1
+        return True
+
+    def retrieve(self) -> Tuple[bool, Optional[np.ndarray]]:
+        return self.frame is not None, self.frame
+
+    def _uniform_frames(self) -> Iterator[np.ndarray]:
+        """levels の明るさの一様なフレームを繰り返すイテレーター"""
+        width, height = self.size
+        frames = [np.full((height, width, 3), level, dtype=np.uint8) for level in self.levels]
+        return itertools.cycle(frames)
+
+
+def create_frame_source(spec: str = '', camera_index: int = 0) -> FrameSource:
+    """
+    設定値からフレームの取得元を作成する
+
+    Args:
+        spec (str): 取得元の指定
+            ''/'camera' はカメラ、'camera:N' はインデックスNのカメラ、'synthetic' は合成フレーム、
+            ディレクトリのパスは画像ディレクトリ、それ以外のパスは動画ファイル
+        camera_index (int): カメラを使う場合のデフォルトのインデックス
+
+    Returns:
+        FrameSource: 作成した取得元
+    """
+    if not spec or spec == SOURCE_CAMERA:
+        return CameraSource(camera_index)
+    if spec.startswith(SOURCE_CAMERA + ':'):
+        return CameraSource(int(spec.split(':', 1)[1]))
+    if spec == SOURCE_SYNTHETIC:
+        return SyntheticSource()
+
+    path = os.path.expanduser(spec)
+    if os.path.isdir(path):
+        return ImageDirectorySource(path)
+    return VideoFileSource(path)
@@ -0,0 +1,262 @@
+"""
+調整サイクルごとの環境光・目標輝度・設定した輝度・処理時間を、固定長のバイナリ形式で記録するモジュール
+
+ファイルはあらかじめ最大サイズまで確保してメモリーマップし、レコードを書き込むたびに
+ヘッダーのレコード数を更新する。読み取り側は read_trace() でファイルをコピーせずに
+NumPyの構造化配列として参照できる。
+"""
+from __future__ import annotations
+import math
+import mmap
+import os
+import struct
+from typing import Dict, List, Optional, Tuple
+from .lazy import LazyModule
+from .logger import logger
+
+# numpyは記録・読み取りを行う時点で読み込む
+np = LazyModule('numpy')
+
+# ファイルの先頭の識別子とヘッダー（識別子, レコードの大きさ, レコード数）
+TRACE_MAGIC = b'LBTRACE1'
+HEADER_FORMAT = '<8sIxxxxQ'
+HEADER_SIZE = 64
+
+# レコードのフィールド（リトルエンディアン、パディングなしの28バイト）
+# 輝度（%）と所要時間は有効数字3桁程度で十分なため半精度で記録する
+# （1秒ごとに記録しても1か月で約73MB）
+TRACE_FIELDS = [
+    ('timestamp', '<f8'),     # サイクルの終了時刻（UNIX時間、秒）
+    ('ambient', '<f4'),       # 環境光の平均輝度（0-255）
+    ('samples', '<u2'),       # 平均に使ったフレーム数
+    ('target', '<f2'),        # マッピングした目標輝度（%）
+    ('applied', '<f2'),       # ディスプレイに設定されている輝度（%）
+    ('override', '<f2'),      # 前回のサイクル以降にユーザーが手動で設定した輝度（%、なければNaN）
+    ('measure_ms', '<f2'),    # 測定の所要時間（ミリ秒）
+    ('mapping_ms', '<f2'),    # マッピングの所要時間（ミリ秒）
+    ('actuation_ms', '<f2'),  # 書き込みの所要時間（ミリ秒）
+    ('cycle_ms', '<f2'),      # サイクル全体の所要時間（ミリ秒）
+]
+
+# 処理段階の名前と、記録するフィールドの対応
+STAGE_FIELDS = {
+    'measure': 'measure_ms',
+    'mapping': 'mapping_ms',
+    'actuation': 'actuation_ms',
+    'cycle': 'cycle_ms',
+}
+
+# デフォルトの1ファイルの最大サイズと、残す古いファイルの数
+# （1秒ごとに記録しても1ファイルに約28日分、古いファイルと合わせて約3か月分を残す）
+DEFAULT_TRACE_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TRACE_BACKUP_COUNT = 3
+MIN_TRACE_MAX_BYTES = 4096
+
+def trace_dtype() -> np.dtype:
+    """レコードのNumPyの型"""
+    return np.dtype(TRACE_FIELDS)
+
+
+class TraceRecorder:
+    """
+    調整サイクルごとのレコードを、メモリーマップしたファイルに追記するクラス
+
+    ファイルが一杯になった場合は RotatingFileHandler と同様に
+    trace.bin → trace.bin.1 → trace.bin.2 ... と名前を変えて新しいファイルに切り替える。
+    """
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_TRACE_MAX_BYTES,
+                 backup_count: int = DEFAULT_TRACE_BACKUP_COUNT):
+        """
+        TraceRecorderを初期化
+
+        Args:
+            path (str): 記録するファイルのパス
+            max_bytes (int): 1ファイルの最大サイズ（バイト）
+            backup_count (int): 残す古いファイルの数
+        """
+        self.path = path
+        self.backup_count = max(0, backup_count)
+        self.dtype = trace_dtype()
+        self.capacity = max(1, (max_bytes - HEADER_SIZE) // self.dtype.itemsize)
+        self.count = 0
+        self._file = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._records = None
+
+    def record(self, timestamp: float, ambient: float, samples: int = 0,
+               target: float = math.nan, applied: float = math.nan,
+               durations: Optional[Dict[str, float]] = None,
+               override: float = math.nan):
+        """
+        1サイクル分のレコードを追記する
+
+        Args:
+            timestamp (float): サイクルの終了時刻（UNIX時間、秒）
+            ambient (float): 環境光の平均輝度（0-255）
+            samples (int): 平均に使ったフレーム数
+            target (float): マッピングした目標輝度（%）
+            applied (float): ディスプレイに設定されている輝度（%）
+            durations (Dict[str, float], optional): 処理段階ごとの所要時間（秒）
+            override (float): ユーザーが手動で設定した輝度（%）
+        """
+        if self._records is None:
+            self._open()
+        elif self.count >= self.capacity:
+            self._rollover()
+
+        durations = durations or {}
+        self._records[self.count] = (
+            timestamp, ambient, min(samples, 0xFFFF), target, applied, override,
+            *(durations.get(stage, math.nan) * 1e3 for stage in STAGE_FIELDS)
+        )
+        self.count += 1
+        # レコードを書き込んでからレコード数を更新する（読み取り側が書きかけのレコードを見ない）
+        self._write_header()
+
+    def close(self):
+        """ファイルを閉じる（未使用の領域はそのまま残し、読み取り時はレコード数までを参照する）"""
+        if self._mmap is not None:
+            self._records = None
+            self._mmap.flush()
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _open(self):
+        """
+        ファイルを開き（存在しない・形式が異なる場合は作成し）、続きから記録できるようにする
+
+        Raises:
+            ValueError: トレースファイルではない既存のファイルが指定された場合
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        size = HEADER_SIZE + self.capacity * self.dtype.itemsize
+
+        header = _read_header(self.path)
+        if header is None and os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            raise ValueError(f"'{self.path}' はトレースファイルではないため、記録に使用できません。")
+
+        record_size, count = header or (0, 0)
+        if record_size != self.dtype.itemsize or count > self.capacity or \
+                os.path.getsize(self.path) != size:
+            if header is not None:
+                logger.info(f"トレースファイル '{self.path}' の形式または大きさが異なるため、新しいファイルに切り替えます。")
+                self._rotate_files()
+            count = 0
+            with open(self.path, 'wb') as f:
+                # 最大サイズまで確保する（ファイルシステムが対応していれば実際の領域は書き込み時に割り当てられる）
+                f.truncate(size)
+
+        self._file = open(self.path, 'r+b')
+        self._mmap = mmap.mmap(self._file.fileno(), size)
+        self._records = np.frombuffer(
+            self._mmap, dtype=self.dtype, count=self.capacity, offset=HEADER_SIZE
+        )
+        self.count = count
+        self._write_header()
+
+    def _rollover(self):
+        """現在のファイルを古いファイルに回し、新しいファイルに切り替える"""
+        self.close()
+        self._rotate_files()
+        self._open()
+
+    def _rotate_files(self):
+        """trace.bin → trace.bin.1 → ... と名前を変える（backup_count を超える分は削除）"""
+        if self.backup_count == 0:
+            os.remove(self.path)
+            return
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def _write_header(self):
+        struct.pack_into(HEADER_FORMAT, self._mmap, 0, TRACE_MAGIC, self.dtype.itemsize, self.count)
+
+
+def _read_header(path: str) -> Optional[Tuple[int, int]]:
+    """
+    トレースファイルのヘッダーを読み取る
+
+    Returns:
+        Optional[Tuple[int, int]]: (レコードの大きさ, レコード数)、
+            ファイルがない・トレースファイルではない場合はNone
+    """
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(struct.calcsize(HEADER_FORMAT))
+    except OSError:
+        return None
+    if len(header) < struct.calcsize(HEADER_FORMAT):
+        return None
+    magic, record_size, count = struct.unpack(HEADER_FORMAT, header)
+    if magic != TRACE_MAGIC:
+        return None
+    return record_size, count
+
+
+def read_trace(path: str) -> np.ndarray:
+    """
+    トレースファイルのレコードを、コピーせずに構造化配列として参照する
+
+    記録中のファイルも読み取れる（呼び出した時点までのレコードを返す）。
+
+    Args:
+        path (str): トレースファイルのパス
+
+    Returns:
+        np.ndarray: フィールドごとに参照できる読み取り専用の配列（例: trace['ambient']）
+
+    Raises:
+        ValueError: トレースファイルの形式ではない場合
+    """
+    dtype = trace_dtype()
+    header = _read_header(path)
+    if header is None or header[0] != dtype.itemsize:
+        raise ValueError(f"'{path}' はこのバージョンのトレースファイルではありません。")
+    count = header[1]
+    if count == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', offset=HEADER_SIZE, shape=(count,))
+
+
+def trace_files(path: str) -> List[str]:
+    """
+    古いファイルを含むトレースファイルの一覧を、古い順に返す
+
+    Args:
+        path (str): 記録中のトレースファイルのパス
+
+    Returns:
+        List[str]: 存在するトレースファイルのパス
+    """
+    files = []
+    index = 1
+    while os.path.exists(f"{path}.{index}"):
+        files.insert(0, f"{path}.{index}")
+        index += 1
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+def read_traces(path: str) -> np.ndarray:
+    """
+    古いファイルを含むすべてのレコードを、古い順に1つの配列にまとめる（結合のためコピーする）
+
+    Args:
+        path (str): 記録中のトレースファイルのパス
+
+    Returns:
+        np.ndarray: すべてのレコード
+    """
+    segments = [read_trace(file_path) for file_path in trace_files(path)]
+    if not segments:
+        return np.empty(0, dtype=trace_dtype())
+    return np.concatenate(segments)
@@ -0,0 +1,181 @@
+"""
+ディスプレイ輝度を目標値まで段階的に変化させるトランジションモジュール
+"""
+import threading
+import time
+from typing import Dict, Optional
+from .lunar import DisplayController, apply_levels
+from .logger import logger
+
+# デフォルトの1ステップあたりの輝度変化量（%）と1秒あたりのステップ数
+DEFAULT_TRANSITION_STEP = 2
+DEFAULT_TRANSITION_RATE = 10.0
+
+class BrightnessTransition(DisplayController):
+    """
+    別スレッドで目標輝度に向けて段階的に輝度を変化させるコントローラー
+
+    set_brightness() は目標値を更新するだけで即座に返るため、測定処理を妨げない。
+    変化の途中で新しい目標値が届いた場合は、その時点の輝度から新しい目標値へ
+    向かい直し、古い目標値への中間ステップは書き込まない。
+    1回の変化で書き込む回数は ceil(|目標値 - 現在値| / step) 回以内に収まる。
+    """
+
+    def __init__(self, controller: DisplayController,
+                 step: int = DEFAULT_TRANSITION_STEP,
+                 rate: float = DEFAULT_TRANSITION_RATE):
+        """
+        BrightnessTransitionを初期化
+
+        Args:
+            controller (DisplayController): 実際に輝度を書き込むコントローラー
+            step (int): 1ステップあたりの輝度変化量（%）
+            rate (float): 1秒あたりのステップ数
+        """
+        self.controller = controller
+        self.step = max(1, int(step))
+        self.interval = 1.0 / max(0.1, rate)
+        self.writes = 0
+        # ディスプレイごとの現在値と目標値（Noneは既定のディスプレイ）
+        self._current: Dict[Optional[str], int] = {}
+        self._targets: Dict[Optional[str], int] = {}
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def start(self):
+        """段階的な書き込みを行うスレッドを開始する"""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="brightness-transition", daemon=True
+            )
+            self._thread.start()
+
+    def set_brightness(self, brightness_level: float, display: Optional[str] = None) -> bool:
+        """
+        目標輝度を更新する（書き込みはスレッドで段階的に行う）
+
+        Args:
+            brightness_level (float): 目標輝度（0-100の範囲）
+            display (str, optional): 対象のディスプレイ
+
+        Returns:
+            bool: 常にTrue
+        """
+        return self.set_brightness_many({display: brightness_level})[display]
+
+    def set_brightness_many(self, levels: Dict[Optional[str], float]) -> Dict[Optional[str], bool]:
+        """
+        ディスプレイごとの目標輝度を更新する
+
+        Args:
+            levels (Dict[Optional[str], float]): ディスプレイごとの目標輝度
+
+        Returns:
+            Dict[Optional[str], bool]: ディスプレイごとの結果（常にTrue）
+        """
+        with self._condition:
+            for display, level in levels.items():
+                self._targets[display] = max(0, min(100, int(level)))
+            self._condition.notify_all()
+        return {display: True for display in levels}
+
+    def get_current_brightness(self) -> Optional[float]:
+        """実際のコントローラーから現在の輝度を取得する"""
+        return self.controller.get_current_brightness()
+
+    def step_once(self) -> int:
+        """
+        すべてのディスプレイを目標値に向けて1ステップ進める
+
+        現在値が不明なディスプレイ（初回）は目標値を直接書き込む。
+
+        Returns:
+            int: 書き込んだディスプレイの数
+        """
+        with self._condition:
+            levels = {
+                display: self._next_level(display, target)
+                for display, target in self._targets.items()
+                if self._current.get(display) != target
+            }
+
+        if not levels:
+            return 0
+
+        results = apply_levels(self.controller, levels)
+
+        with self._condition:
+            self.writes += len(levels)
+            for display, success in results.items():
+                if success:
+                    self._current[display] = levels[display]
+                else:
+                    # 書き込みに失敗した場合は変化を中止し、次の目標値で直接設定し直す
+                    logger.error(f"輝度の段階的な変更に失敗したため中止します（ディスプレイ: {display}）")
+                    self._current.pop(display, None)
+                    self._targets.pop(display, None)
+            self._condition.notify_all()
+
+        return len(levels)
+
+    def is_idle(self) -> bool:
+        """すべてのディスプレイが目標値に到達しているかどうか"""
+        with self._condition:
+            return self._idle()
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """
+        すべてのディスプレイが目標値に到達するまで待つ
+
+        Args:
+            timeout (float, optional): 最大待ち時間（秒）
+
+        Returns:
+            bool: 目標値に到達したかどうか
+        """
+        with self._condition:
+            return self._condition.wait_for(self._idle, timeout=timeout)
+
+    def close(self):
+        """スレッドを停止し、コントローラーのリソースを解放する"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.controller.close()
+
+    def _idle(self) -> bool:
+        """目標値に到達していないディスプレイがないかどうか（ロック保持中に呼ぶ）"""
+        return all(self._current.get(display) == target for display, target in self._targets.items())
+
+    def _next_level(self, display: Optional[str], target: int) -> int:
+        """現在値から目標値に向けて1ステップ進めた輝度"""
+        current = self._current.get(display)
+        if current is None:
+            return target
+        if abs(target - current) <= self.step:
+            return target
+        return current + self.step if target > current else current - self.step
+
+    def _run(self):
+        """目標値との差がある間、一定間隔でステップを進めるスレッドの処理"""
+        next_step_time = time.monotonic()
+
+        while True:
+            with self._condition:
+                while not self._closed and self._idle():
+                    self._condition.wait()
+                if self._closed:
+                    return
+
+                # 書き込み間隔を守る（待機中に届いた目標値は次のステップで反映される）
+                delay = next_step_time - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(timeout=delay)
+                    continue
+
+            self.step_once()
+            next_step_time = time.monotonic() + self.interval
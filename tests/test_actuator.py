@@ -0,0 +1,176 @@
+"""
+アクチュエーターモジュールのテスト
+"""
+import unittest
+from unittest.mock import MagicMock
+from src.actuator import BrightnessActuator
+from src.transition import BrightnessTransition
+
+class FakeClock:
+    """現在時刻を手動で進める疑似時計"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestBrightnessActuator(unittest.TestCase):
+    """BrightnessActuatorクラスのテスト"""
+
+    def setUp(self):
+        """各テスト前の準備"""
+        self.controller = MagicMock()
+        self.controller.set_brightness.return_value = True
+        self.clock = FakeClock()
+
+    def test_skips_writes_inside_deadband(self):
+        """最後に設定した値との差が不感帯内の場合は書き込まないかテスト"""
+        actuator = BrightnessActuator(self.controller, hysteresis=3, clock=self.clock)
+
+        for level in [50, 50.7, 52, 48.2, 53, 60]:
+            self.assertTrue(actuator.apply(level))
+
+        # 50 → (50, 52, 48 は省略) → 53 → 60
+        self.assertEqual(
+            [c.args[0] for c in self.controller.set_brightness.call_args_list], [50, 53, 60]
+        )
+        self.assertEqual(actuator.stats.writes, 3)
+        self.assertEqual(actuator.stats.suppressed_deadband, 3)
+
+    def test_same_value_is_never_rewritten(self):
+        """不感帯が0でも同じ値は書き込まないかテスト"""
+        actuator = BrightnessActuator(self.controller, hysteresis=0, clock=self.clock)
+
+        actuator.apply(40.2)
+        actuator.apply(40.9)
+
+        self.controller.set_brightness.assert_called_once_with(40)
+
+    def test_rate_limit_coalesces_to_latest_target(self):
+        """書き込み間隔内の目標値は最新のもののみ保留し、後でまとめて書き込むかテスト"""
+        actuator = BrightnessActuator(self.controller, hysteresis=1, min_interval=10,
+                                      clock=self.clock)
+
+        actuator.apply(30)
+        self.clock.now = 2
+        actuator.apply(40)
+        self.clock.now = 4
+        actuator.apply(45)
+
+        self.controller.set_brightness.assert_called_once_with(30)
+        self.assertEqual(actuator.pending, 45)
+        self.assertAlmostEqual(actuator.flush_delay(), 6)
+        self.assertEqual(actuator.stats.suppressed_rate_limit, 2)
+
+        # 間隔経過前のflushでは書き込まない
+        actuator.flush()
+        self.assertEqual(self.controller.set_brightness.call_count, 1)
+
+        self.clock.now = 10
+        actuator.flush()
+        self.controller.set_brightness.assert_called_with(45)
+        self.assertIsNone(actuator.pending)
+        self.assertIsNone(actuator.flush_delay())
+
+    def test_deadband_discards_pending_target(self):
+        """現在値に戻った場合は保留中の目標値を破棄するかテスト"""
+        actuator = BrightnessActuator(self.controller, hysteresis=2, min_interval=10,
+                                      clock=self.clock)
+
+        actuator.apply(30)
+        self.clock.now = 1
+        actuator.apply(60)
+        self.clock.now = 2
+        actuator.apply(30.5)
+
+        self.assertIsNone(actuator.pending)
+        self.clock.now = 20
+        actuator.flush()
+        self.controller.set_brightness.assert_called_once_with(30)
+
+    def test_failed_write_is_retried(self):
+        """書き込みに失敗した場合は同じ値でも再度書き込むかテスト"""
+        self.controller.set_brightness.side_effect = [False, True]
+        actuator = BrightnessActuator(self.controller, clock=self.clock)
+
+        self.assertFalse(actuator.apply(70))
+        self.assertTrue(actuator.apply(70))
+
+        self.assertEqual(self.controller.set_brightness.call_count, 2)
+        self.assertEqual(actuator.last_applied, 70)
+        self.assertEqual(actuator.stats.failed_writes, 1)
+
+    def test_apply_many_writes_only_changed_displays(self):
+        """ディスプレイごとに不感帯を判定し、変化したディスプレイのみ書き込むかテスト"""
+        self.controller.set_brightness_many.side_effect = (
+            lambda levels: {display: True for display in levels}
+        )
+        actuator = BrightnessActuator(self.controller, hysteresis=2, clock=self.clock)
+
+        actuator.apply_many({'DELL': 40, 'LG': 50})
+        self.controller.set_brightness_many.assert_called_once_with({'DELL': 40, 'LG': 50})
+
+        # LGのみ不感帯を超えたので、1ディスプレイだけ書き込む
+        results = actuator.apply_many({'DELL': 41, 'LG': 55})
+        self.assertEqual(results, {'DELL': True, 'LG': True})
+        self.controller.set_brightness.assert_called_once_with(55, display='LG')
+        self.assertEqual(actuator.stats.writes, 3)
+        self.assertEqual(actuator.stats.suppressed_deadband, 1)
+
+    def test_apply_many_reports_failures_per_display(self):
+        """失敗したディスプレイのみ失敗として報告し、次回再度書き込むかテスト"""
+        self.controller.set_brightness_many.return_value = {'DELL': True, 'LG': False}
+        actuator = BrightnessActuator(self.controller, clock=self.clock)
+
+        results = actuator.apply_many({'DELL': 40, 'LG': 50})
+
+        self.assertEqual(results, {'DELL': True, 'LG': False})
+        self.assertEqual(actuator.stats.failed_writes, 1)
+
+        actuator.apply_many({'DELL': 40, 'LG': 50})
+        self.controller.set_brightness.assert_called_once_with(50, display='LG')
+
+    def test_manual_override(self):
+        """最後に設定した値から手動で変更された輝度のみを返すかテスト"""
+        actuator = BrightnessActuator(self.controller, hysteresis=1, clock=self.clock)
+        self.controller.get_current_brightness.return_value = 80.0
+
+        # まだ設定していない場合は比較できない
+        self.assertIsNone(actuator.manual_override())
+
+        actuator.apply(50)
+        self.assertEqual(actuator.manual_override(), 80.0)
+
+        # 許容範囲内の差や取得できない場合は変更とみなさない
+        self.controller.get_current_brightness.return_value = 51.0
+        self.assertIsNone(actuator.manual_override())
+        self.controller.get_current_brightness.return_value = None
+        self.assertIsNone(actuator.manual_override())
+
+    def test_manual_override_skipped_during_transition(self):
+        """段階的な変化の途中の輝度を、手動の変更とみなさないかテスト"""
+        controller = MagicMock()
+        controller.get_current_brightness.return_value = 30.0
+        transition = BrightnessTransition(controller, step=5)
+        actuator = BrightnessActuator(transition, hysteresis=1, clock=self.clock)
+
+        actuator.apply(30)
+        transition.step_once()
+        actuator.apply(60)
+        # 30 → 35 の途中（目標は60）
+        transition.step_once()
+        controller.get_current_brightness.return_value = 35.0
+        self.assertIsNone(actuator.manual_override())
+        controller.get_current_brightness.assert_not_called()
+
+        # 目標値に到達した後の変更は手動の変更とみなす
+        while transition.step_once():
+            pass
+        controller.get_current_brightness.return_value = 45.0
+        self.assertEqual(actuator.manual_override(), 45.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,16 @@
 """
 BrightnessAdjusterモジュールのテスト
 """
+import asyncio
+import math
+import time
 import unittest
+import numpy as np
+from dataclasses import replace
 from unittest.mock import patch, MagicMock
-from src.config import BrightnessConfig
-from src.brightness_adjuster import BrightnessAdjuster
+from src.actuator import BrightnessActuator
+from src.config import BrightnessConfig, DisplayRange
+from src.brightness_adjuster import AsyncBrightnessAdjuster, BrightnessAdjuster
 
 class TestBrightnessAdjuster(unittest.TestCase):
     """BrightnessAdjusterクラスのテスト"""
@@ -64,6 +70,67 @@ class TestBrightnessAdjuster(unittest.TestCase):
                 f"マッピング結果 {result} が範囲外です"
             )
     
+    def test_curve_rebuilt_only_on_change(self):
+        """応答カーブの設定が変わった場合のみテーブルを作り直すかテスト"""
+        curve = self.adjuster.curve
+        
+        # カーブに関係しない設定の変更では作り直さない
+        self.adjuster.config = replace(self.test_config, max_brightness=90)
+        self.assertIs(self.adjuster.curve, curve)
+        
+        self.adjuster.config = replace(self.test_config, curve='gamma')
+        rebuilt = self.adjuster.curve
+        self.assertIsNot(rebuilt, curve)
+        self.assertIs(self.adjuster.curve, rebuilt)
+        self.assertLess(self.adjuster.map_brightness(127.5), 60)
+    
+    def test_update_config(self):
+        """設定の差し替えで、変わった部分のみ作り直すかテスト"""
+        sensor = MagicMock()
+        actuator = MagicMock()
+        adjuster = BrightnessAdjuster(self.test_config, sensor=sensor, actuator=actuator)
+        curve = adjuster.curve
+        
+        # 輝度範囲と書き込み設定のみの変更ではカーブとセンサーはそのまま
+        adjuster.update_config(BrightnessConfig(min_brightness=10, max_brightness=90, hysteresis=3))
+        self.assertIs(adjuster.curve, curve)
+        self.assertIs(adjuster.sensor, sensor)
+        self.assertEqual(actuator.hysteresis, 3)
+        self.assertEqual(adjuster.map_brightness(255), 90)
+        
+        # センサーの設定が変わった場合はカメラを開き直す
+        adjuster.update_config(BrightnessConfig(sample_stride=4))
+        sensor.close.assert_called_once()
+        self.assertIsNot(adjuster.sensor, sensor)
+        self.assertEqual(adjuster.sensor.sample_stride, 4)
+        actuator.close.assert_not_called()
+    
+    @patch('src.brightness_adjuster.create_display_controller')
+    def test_update_config_rebuilds_actuator(self, mock_create):
+        """ディスプレイ制御の設定が変わった場合、アクチュエーターを作り直すかテスト"""
+        actuator = BrightnessActuator(MagicMock())
+        actuator.stats.writes = 5
+        adjuster = BrightnessAdjuster(self.test_config, actuator=actuator)
+        
+        adjuster.update_config(replace(self.test_config, display_backend='persistent', hysteresis=4))
+        
+        actuator.controller.close.assert_called_once()
+        mock_create.assert_called_once_with('persistent')
+        self.assertIsNot(adjuster.actuator, actuator)
+        self.assertIs(adjuster.actuator.controller, mock_create.return_value)
+        self.assertEqual(adjuster.actuator.hysteresis, 4)
+        # 統計は引き継ぐ
+        self.assertEqual(adjuster.actuator.stats.writes, 5)
+    
+    def test_map_many(self):
+        """複数の測定値をまとめてマッピングできるかテスト"""
+        ambient = np.array([0, 127.5, 255])
+        
+        np.testing.assert_allclose(self.adjuster.map_many(ambient), [30, 50, 70])
+        np.testing.assert_allclose(
+            self.adjuster.map_many(ambient, DisplayRange(10, 20)), [10, 15, 20]
+        )
+    
     @patch('src.brightness_adjuster.measure_ambient_brightness')
     @patch('src.brightness_adjuster.set_display_brightness')
     def test_adjust_success(self, mock_set_brightness, mock_measure_brightness):
@@ -77,7 +144,9 @@ class TestBrightnessAdjuster(unittest.TestCase):
         
         # 検証
         self.assertTrue(result)
-        mock_measure_brightness.assert_called_once_with(capture_duration=0.5)
+        mock_measure_brightness.assert_called_once_with(
+            capture_duration=0.5, config=self.test_config
+        )
         
         # マッピングされた輝度値（この場合は100.0の入力に対して計算される値）でset_brightness()が呼ばれること
         expected_brightness = self.adjuster.map_brightness(100.0)
@@ -114,7 +183,239 @@ class TestBrightnessAdjuster(unittest.TestCase):
         self.assertFalse(result)
         mock_measure_brightness.assert_called_once()
         mock_set_brightness.assert_called_once()
+    
+    @patch('src.brightness_adjuster.measure_ambient_brightness')
+    @patch('src.brightness_adjuster.set_display_brightness')
+    def test_adjust_reuses_sensor(self, mock_set_brightness, mock_measure_brightness):
+        """センサーを保持している場合はカメラを開いたまま再利用するかテスト"""
+        mock_sensor = MagicMock()
+        mock_sensor.measure_ambient_light.return_value = 100.0
+        mock_set_brightness.return_value = True
+        adjuster = BrightnessAdjuster(self.test_config, sensor=mock_sensor)
+        
+        self.assertTrue(adjuster.adjust())
+        self.assertTrue(adjuster.adjust())
+        
+        self.assertEqual(mock_sensor.measure_ambient_light.call_count, 2)
+        mock_sensor.measure_ambient_light.assert_called_with(duration=0.5)
+        mock_sensor.close.assert_not_called()
+        mock_measure_brightness.assert_not_called()
+    
+    @patch('src.brightness_adjuster.set_display_brightness')
+    def test_measure_failure_releases_sensor(self, mock_set_brightness):
+        """測定に失敗した場合、次回開き直せるようにセンサーを解放するかテスト"""
+        mock_sensor = MagicMock()
+        mock_sensor.measure_ambient_light.return_value = None
+        adjuster = BrightnessAdjuster(self.test_config, sensor=mock_sensor)
+        
+        self.assertFalse(adjuster.adjust())
+        
+        mock_sensor.close.assert_called_once()
+        mock_set_brightness.assert_not_called()
+
+    
+    @patch('src.brightness_adjuster.measure_ambient_brightness')
+    @patch('src.brightness_adjuster.set_display_brightness')
+    def test_adjust_uses_actuator(self, mock_set_brightness, mock_measure_brightness):
+        """アクチュエーターを保持している場合はそれを通して輝度を設定するかテスト"""
+        mock_measure_brightness.return_value = 100.0
+        mock_actuator = MagicMock()
+        mock_actuator.apply.return_value = True
+        adjuster = BrightnessAdjuster(self.test_config, actuator=mock_actuator)
+        
+        self.assertTrue(adjuster.adjust())
+        
+        mock_actuator.apply.assert_called_once_with(adjuster.map_brightness(100.0))
+        mock_set_brightness.assert_not_called()
+
+    
+    def test_adjust_records_cycle_report(self):
+        """調整サイクルの測定値・目標輝度・設定した輝度・所要時間を記録するかテスト"""
+        mock_sensor = MagicMock()
+        mock_sensor.measure_ambient_light.return_value = 127.5
+        mock_sensor.last_sample_count = 10
+        actuator = BrightnessActuator(MagicMock(), hysteresis=0)
+        adjuster = BrightnessAdjuster(self.test_config, sensor=mock_sensor, actuator=actuator)
+        
+        self.assertTrue(adjuster.adjust())
+        
+        report = adjuster.last_report
+        self.assertEqual(report.ambient, 127.5)
+        self.assertEqual(report.samples, 10)
+        self.assertAlmostEqual(report.target, 50.0)
+        self.assertEqual(report.applied, 50)
+        self.assertEqual(sorted(report.durations), ['actuation', 'cycle', 'mapping', 'measure'])
+        self.assertGreater(report.timestamp, 0)
+        # トレースを記録しない場合は現在の輝度を取得しない
+        self.assertTrue(math.isnan(report.override))
+        actuator.controller.get_current_brightness.assert_not_called()
+    
+    def test_adjust_records_manual_override(self):
+        """トレースを記録する場合、手動で変更された輝度を上書きする前に記録するかテスト"""
+        config = replace(self.test_config, trace_file='trace.bin')
+        mock_sensor = MagicMock()
+        mock_sensor.measure_ambient_light.return_value = 127.5
+        controller = MagicMock()
+        controller.get_current_brightness.return_value = 65.0
+        actuator = BrightnessActuator(controller, hysteresis=0)
+        adjuster = BrightnessAdjuster(config, sensor=mock_sensor, actuator=actuator)
+        
+        adjuster.adjust()
+        # 初回は比較する値がない
+        self.assertTrue(math.isnan(adjuster.last_report.override))
+        
+        adjuster.adjust()
+        self.assertEqual(adjuster.last_report.override, 65.0)
+        self.assertEqual(adjuster.last_report.applied, 50)
 
+    
+    @patch('src.brightness_adjuster.measure_ambient_brightness')
+    @patch('src.brightness_adjuster.set_displays_brightness')
+    def test_adjust_multiple_displays(self, mock_set_displays, mock_measure_brightness):
+        """ディスプレイごとの範囲にマッピングし、まとめて設定するかテスト"""
+        config = BrightnessConfig(displays={
+            'DELL': DisplayRange(min_brightness=20, max_brightness=60),
+            'LG': DisplayRange(min_brightness=50, max_brightness=100),
+        })
+        mock_measure_brightness.return_value = 127.5
+        mock_set_displays.return_value = {'DELL': True, 'LG': False}
+        adjuster = BrightnessAdjuster(config)
+        
+        result = adjuster.adjust()
+        
+        # 1つでも失敗したディスプレイがあれば失敗
+        self.assertFalse(result)
+        targets = mock_set_displays.call_args.args[0]
+        self.assertAlmostEqual(targets['DELL'], 40.0)
+        self.assertAlmostEqual(targets['LG'], 75.0)
+
+
+class SlowController:
+    """書き込みに時間がかかるコントローラーの代替"""
+    
+    def __init__(self, delay):
+        self.delay = delay
+        self.calls = []
+        self.closed = False
+    
+    def set_brightness(self, level, display=None):
+        return self.set_brightness_many({display: level})[display]
+    
+    def set_brightness_many(self, levels):
+        self.calls.append(dict(levels))
+        time.sleep(self.delay)
+        return {display: True for display in levels}
+    
+    def close(self):
+        self.closed = True
+
+
+class TestAsyncBrightnessAdjuster(unittest.TestCase):
+    """AsyncBrightnessAdjusterクラスのテスト"""
+    
+    def setUp(self):
+        """各テスト前の準備"""
+        self.config = BrightnessConfig(min_brightness=0, max_brightness=100, capture_duration=0.1)
+        self.sensor = MagicMock()
+    
+    def test_slow_actuation_does_not_stall_sampling(self):
+        """書き込みが遅くても測定が止まらず、最新の値が書き込まれるかテスト"""
+        # 測定値は 0, 25.5, 51, ... と増えていく
+        self.sensor.measure_ambient_light.side_effect = [i * 25.5 for i in range(10)]
+        controller = SlowController(delay=0.05)
+        actuator = BrightnessActuator(controller=controller)
+        adjuster = AsyncBrightnessAdjuster(self.config, sensor=self.sensor, actuator=actuator)
+        
+        stats = asyncio.run(adjuster.run(max_samples=10))
+        
+        self.assertEqual(stats.samples, 10)
+        # 書き込み中に届いた古い測定値は捨てられる
+        self.assertLess(actuator.stats.writes, 10)
+        self.assertGreater(stats.dropped_samples + stats.dropped_targets, 0)
+        # 最後の測定値（229.5 -> 90%）は必ず書き込まれる
+        self.assertEqual(controller.calls[-1], {None: 90})
+        self.sensor.close.assert_called_once()
+        self.assertTrue(controller.closed)
+    
+    def test_measurement_failure_is_skipped(self):
+        """測定に失敗した値は書き込まずに次の測定を続けるかテスト"""
+        self.sensor.measure_ambient_light.side_effect = [None, 127.5]
+        controller = SlowController(delay=0)
+        actuator = BrightnessActuator(controller=controller)
+        adjuster = AsyncBrightnessAdjuster(self.config, sensor=self.sensor, actuator=actuator)
+        
+        stats = asyncio.run(adjuster.run(max_samples=2))
+        
+        self.assertEqual(stats.failed_samples, 1)
+        self.assertEqual(controller.calls, [{None: 50}])
+    
+    def test_actuate_skips_deadband_per_display(self):
+        """ディスプレイごとに不感帯内の書き込みを省略するかテスト"""
+        config = BrightnessConfig(hysteresis=2, displays={
+            'DELL': DisplayRange(min_brightness=20, max_brightness=60),
+            'LG': DisplayRange(min_brightness=50, max_brightness=100),
+        })
+        controller = SlowController(delay=0)
+        actuator = BrightnessActuator(controller=controller, hysteresis=config.hysteresis)
+        adjuster = AsyncBrightnessAdjuster(config, sensor=self.sensor, actuator=actuator)
+        
+        async def scenario():
+            await adjuster.actuate(await adjuster.estimate(127.5))
+            await adjuster.actuate({'DELL': 41, 'LG': 80})
+        asyncio.run(scenario())
+        
+        self.assertEqual(controller.calls, [{'DELL': 40, 'LG': 75}, {'LG': 80}])
+        self.assertEqual(actuator.stats.suppressed_deadband, 1)
+    
+    def test_rate_limit_holds_and_flushes_latest_target(self):
+        """書き込み間隔の制限中の目標値を保留し、最後に最新の値を書き込むかテスト"""
+        self.sensor.measure_ambient_light.side_effect = [0, 127.5, 229.5]
+        controller = SlowController(delay=0)
+        actuator = BrightnessActuator(controller=controller, min_interval=0.2)
+        adjuster = AsyncBrightnessAdjuster(self.config, sensor=self.sensor, actuator=actuator)
+        
+        asyncio.run(adjuster.run(max_samples=3))
+        
+        # 2回目の値は制限中に上書きされ、最新の値だけが間隔を空けて書き込まれる
+        self.assertEqual(controller.calls, [{None: 0}, {None: 90}])
+        self.assertEqual(actuator.stats.suppressed_rate_limit, 2)
+    
+    def test_stage_failure_cancels_other_stages(self):
+        """1つの段で例外が発生した場合、残りの段を取り消してリソースを解放するかテスト"""
+        self.sensor.measure_ambient_light.return_value = 127.5
+        controller = SlowController(delay=0)
+        adjuster = AsyncBrightnessAdjuster(
+            self.config, sensor=self.sensor, actuator=BrightnessActuator(controller=controller),
+            queue_size=1
+        )
+        
+        async def failing_estimate(ambient_brightness):
+            raise RuntimeError("estimate failed")
+        adjuster.estimate = failing_estimate
+        
+        async def scenario():
+            # 停止を要求しなくても、測定の段が取り消されて終了する
+            with self.assertRaises(RuntimeError):
+                await asyncio.wait_for(adjuster.run(), timeout=2.0)
+            return [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        remaining = asyncio.run(scenario())
+        
+        self.assertEqual(remaining, [])
+        self.sensor.close.assert_called_once()
+        self.assertTrue(controller.closed)
+        self.assertEqual(controller.calls, [])
+    
+    @patch('src.brightness_adjuster.create_display_controller')
+    def test_default_actuator_follows_config(self, mock_create):
+        """既定のアクチュエーターが同期の経路と同じ設定で作成されるかテスト"""
+        config = BrightnessConfig(display_backend='persistent', hysteresis=3, min_write_interval=5)
+        
+        adjuster = AsyncBrightnessAdjuster(config, sensor=self.sensor)
+        
+        mock_create.assert_called_once_with('persistent')
+        self.assertIs(adjuster.actuator.controller, mock_create.return_value)
+        self.assertEqual(adjuster.actuator.hysteresis, 3)
+        self.assertEqual(adjuster.actuator.min_interval, 5)
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,156 @@
+"""
+校正モジュールのテスト
+"""
+import json
+import os
+import tempfile
+import time
+import unittest
+import numpy as np
+from src.calibration import calibrate, fit_gamma, fit_piecewise, load_samples, main, write_calibration
+from src.config import load_config
+from src.trace import TraceRecorder
+
+
+def gamma_samples(count=20000, gamma=1.8, noise=2.0, seed=0):
+    """最小30%・最大80%のガンマカーブにノイズを加えたサンプル"""
+    rng = np.random.default_rng(seed)
+    ambient = rng.uniform(0, 255, count)
+    brightness = 30 + 50 * (ambient / 255) ** gamma + rng.normal(0, noise, count)
+    return ambient, brightness
+
+
+class TestCalibrate(unittest.TestCase):
+    """応答カーブの推定のテスト"""
+
+    def test_fit_gamma_recovers_parameters(self):
+        """ガンマカーブのパラメーターを推定できるかテスト"""
+        result = fit_gamma(*gamma_samples())
+
+        self.assertEqual(result.curve, 'gamma')
+        self.assertEqual((result.min_brightness, result.max_brightness), (30, 80))
+        self.assertAlmostEqual(result.gamma, 1.8, delta=0.05)
+        self.assertAlmostEqual(result.rmse, 2.0, delta=0.1)
+
+    def test_fit_piecewise_is_monotonic(self):
+        """ノイズで逆転するデータでも単調増加の折れ線になるかテスト"""
+        rng = np.random.default_rng(1)
+        ambient = rng.uniform(0, 255, 5000)
+        # 中間で一度下がるデータ
+        brightness = 40 + 20 * np.sin(ambient / 255 * 3 * np.pi) * 0.3 + ambient * 0.1
+
+        result = fit_piecewise(ambient, brightness, knots=9)
+
+        fractions = [y for _, y in result.points]
+        self.assertEqual(len(fractions), 9)
+        self.assertTrue(all(b >= a for a, b in zip(fractions, fractions[1:])))
+        # 最小・最大輝度は整数に丸めるため、両端はほぼ 0 と 1 になる
+        self.assertAlmostEqual(fractions[0], 0.0, delta=0.05)
+        self.assertAlmostEqual(fractions[-1], 1.0, delta=0.05)
+
+    def test_auto_prefers_piecewise_for_kinked_response(self):
+        """折れ曲がった応答の場合は auto で折れ線を選ぶかテスト"""
+        ambient = np.linspace(0, 255, 10000)
+        brightness = np.where(ambient < 128, 30.0, 30 + (ambient - 128) * 0.4)
+
+        self.assertEqual(calibrate(ambient, brightness).curve, 'piecewise')
+        self.assertEqual(calibrate(*gamma_samples()).curve, 'gamma')
+
+    def test_constant_brightness(self):
+        """輝度が一定の場合は最小・最大が同じ線形カーブになるかテスト"""
+        result = calibrate(np.linspace(0, 255, 100), np.full(100, 55.0), curve='piecewise')
+
+        self.assertEqual((result.curve, result.min_brightness, result.max_brightness), ('linear', 55, 55))
+
+    def test_no_samples(self):
+        """サンプルがない場合は ValueError を送出するかテスト"""
+        with self.assertRaises(ValueError):
+            calibrate(np.array([]), np.array([]))
+
+    def test_large_sample_is_fast(self):
+        """数十万件のサンプルを1秒未満で推定できるかテスト"""
+        ambient, brightness = gamma_samples(count=500000)
+
+        start = time.perf_counter()
+        calibrate(ambient, brightness)
+
+        self.assertLess(time.perf_counter() - start, 1.0)
+
+
+class TestCalibrationFiles(unittest.TestCase):
+    """サンプルの読み込みと設定ファイルへの書き込みのテスト"""
+
+    def setUp(self):
+        """各テスト前の準備"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.config_path = os.path.join(self.temp_dir.name, 'config.json')
+
+    def tearDown(self):
+        """各テスト後の後片付け"""
+        self.temp_dir.cleanup()
+
+    def test_load_csv_with_header(self):
+        """見出し付きのCSVを読み込み、範囲外の値をクランプするかテスト"""
+        path = os.path.join(self.temp_dir.name, 'samples.csv')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("ambient,brightness\n10,40\n300,120\n")
+
+        ambient, brightness = load_samples(path)
+
+        self.assertEqual(list(ambient), [10.0, 255.0])
+        self.assertEqual(list(brightness), [40.0, 100.0])
+
+    def test_load_trace_file(self):
+        """トレースファイルから手動で変更した輝度のみを読み込むかテスト（自動で設定した輝度は使わない）"""
+        path = os.path.join(self.temp_dir.name, 'trace.bin')
+        recorder = TraceRecorder(path, max_bytes=4096)
+        recorder.record(1.0, 100.0, applied=50.0)
+        recorder.record(2.0, 120.0, applied=55.0, override=70.0)
+        recorder.record(3.0, 140.0)
+        recorder.close()
+
+        ambient, brightness = load_samples(path)
+
+        self.assertEqual(list(ambient), [120.0])
+        self.assertEqual(list(brightness), [70.0])
+
+    def test_load_trace_without_overrides(self):
+        """手動で変更した記録がないトレースファイルはエラーになるかテスト"""
+        path = os.path.join(self.temp_dir.name, 'trace.bin')
+        recorder = TraceRecorder(path, max_bytes=4096)
+        recorder.record(1.0, 100.0, applied=50.0)
+        recorder.close()
+
+        with self.assertRaises(ValueError):
+            load_samples(path)
+
+    def test_written_config_is_loadable(self):
+        """推定結果を他の設定値を残して書き込み、設定として読み込めるかテスト"""
+        with open(self.config_path, 'w', encoding='utf-8') as f:
+            json.dump({'hysteresis': 2.0, 'curve_gamma': 3.0}, f)
+        result = fit_piecewise(*gamma_samples())
+
+        write_calibration(result, self.config_path)
+        config = load_config(self.config_path)
+
+        self.assertEqual(config.hysteresis, 2.0)
+        self.assertEqual(config.curve, 'piecewise')
+        self.assertEqual((config.min_brightness, config.max_brightness), (30, 80))
+        self.assertEqual(len(config.curve_points), 9)
+        with open(self.config_path, encoding='utf-8') as f:
+            self.assertNotIn('curve_gamma', json.load(f))
+
+    def test_main_dry_run_does_not_write(self):
+        """--dry-run では設定ファイルに書き込まないかテスト"""
+        path = os.path.join(self.temp_dir.name, 'samples.csv')
+        np.savetxt(path, np.column_stack(gamma_samples(count=1000)), delimiter=',')
+
+        self.assertEqual(main(path, config_path=self.config_path, dry_run=True), 0)
+        self.assertFalse(os.path.exists(self.config_path))
+
+        self.assertEqual(main(path, config_path=self.config_path), 0)
+        self.assertTrue(os.path.exists(self.config_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,102 @@
 """
 カメラモジュールのテスト
 """
+import time
 import unittest
 from unittest.mock import patch, MagicMock, call
 import numpy as np
 import cv2
-from src.camera import AmbientLightSensor, measure_ambient_brightness
+from src.camera import AmbientLightSensor, RunningStats, measure_ambient_brightness
+
+
+class FakeClock:
+    """time.monotonic・time.sleep・time.process_time を置き換える疑似時計"""
+    
+    def __init__(self):
+        self.now = 0.0
+        self.cpu = 0.0
+    
+    def monotonic(self):
+        return self.now
+    
+    def process_time(self):
+        return self.cpu
+    
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FakeCapture:
+    """grab()/retrieve()の呼び出し回数を記録する疑似VideoCapture"""
+    
+    def __init__(self, clock, levels, grab_delay=0.0, fps=30.0, writable_props=None,
+                 prop_filter=None, decode_cpu=0.0):
+        self.clock = clock
+        self.levels = list(levels)
+        self.grab_delay = grab_delay
+        self.fps = fps
+        # set()を受け付けるプロパティ（Noneの場合はすべて無視する）
+        self.writable_props = writable_props
+        # 設定値を実際に反映される値へ変換する関数（値の丸めを模擬）
+        self.prop_filter = prop_filter or (lambda prop_id, value: value)
+        # retrieve()（デコード）1回あたりに消費するCPU時間（秒）
+        self.decode_cpu = decode_cpu
+        self.props = {}
+        self.grab_count = 0
+        self.retrieve_count = 0
+        self.released = False
+    
+    def isOpened(self):
+        return not self.released
+    
+    def get(self, prop_id):
+        if prop_id == cv2.CAP_PROP_FPS:
+            return self.fps
+        return self.props.get(prop_id, 0.0)
+    
+    def set(self, prop_id, value):
+        if self.writable_props is None or prop_id not in self.writable_props:
+            return False
+        self.props[prop_id] = self.prop_filter(prop_id, value)
+        return True
+    
+    def grab(self):
+        self.clock.sleep(self.grab_delay)
+        self.grab_count += 1
+        return True
+    
+    def retrieve(self):
+        level = self.levels[min(self.retrieve_count, len(self.levels) - 1)]
+        self.retrieve_count += 1
+        self.clock.cpu += self.decode_cpu
+        return True, np.full((48, 64, 3), level, dtype=np.uint8)
+    
+    def read(self):
+        return self.retrieve() if self.grab() else (False, None)
+    
+    def release(self):
+        self.released = True
+
+
+class RawFakeCapture(FakeCapture):
+    """BGRへの変換を無効にすると、YUYVのバッファを1行の配列として返す疑似VideoCapture"""
+    
+    def __init__(self, clock, levels, raw_shape=None, **kwargs):
+        super().__init__(clock, levels, **kwargs)
+        self.props.update({cv2.CAP_PROP_FRAME_WIDTH: 64, cv2.CAP_PROP_FRAME_HEIGHT: 48,
+                           cv2.CAP_PROP_CONVERT_RGB: 1})
+        # 変換を無効にした場合に返すバッファの形（MJPEGなどを模擬する場合に変える）
+        self.raw_shape = raw_shape or (1, 48 * 64 * 2)
+    
+    def retrieve(self):
+        if self.props[cv2.CAP_PROP_CONVERT_RGB]:
+            return super().retrieve()
+        level = self.levels[min(self.retrieve_count, len(self.levels) - 1)]
+        self.retrieve_count += 1
+        yuyv = np.full((48, 64, 2), 128, dtype=np.uint8)
+        yuyv[:, :, 0] = level
+        return True, yuyv.reshape(-1)[:int(np.prod(self.raw_shape))].reshape(self.raw_shape)
+
 
 class TestAmbientLightSensor(unittest.TestCase):
     """AmbientLightSensorクラスのテスト"""
@@ -19,7 +110,7 @@ class TestAmbientLightSensor(unittest.TestCase):
         mock_video_capture.return_value = mock_camera
         
         # センサーのインスタンス化とメソッド呼び出し
-        sensor = AmbientLightSensor(camera_index=0)
+        sensor = AmbientLightSensor(camera_index=0, warmup_timeout=0)
         result = sensor.open()
         
         # 検証
@@ -82,17 +173,18 @@ class TestAmbientLightSensor(unittest.TestCase):
         # モックの設定
         mock_camera = MagicMock()
         mock_camera.isOpened.return_value = True
-        mock_camera.read.return_value = (True, np.zeros((480, 640, 3), dtype=np.uint8))
+        mock_camera.grab.return_value = True
+        mock_camera.retrieve.return_value = (True, np.zeros((480, 640, 3), dtype=np.uint8))
         mock_video_capture.return_value = mock_camera
         
         # センサーでフレームをキャプチャ
-        sensor = AmbientLightSensor()
+        sensor = AmbientLightSensor(warmup_timeout=0)
         sensor.open()
         frame = sensor.capture_frame()
         
         # 検証
         self.assertIsNotNone(frame)
-        mock_camera.read.assert_called_once()
+        mock_camera.retrieve.assert_called_once()
     
     @patch('cv2.VideoCapture')
     def test_capture_frame_failure(self, mock_video_capture):
@@ -100,17 +192,32 @@ class TestAmbientLightSensor(unittest.TestCase):
         # モックの設定
         mock_camera = MagicMock()
         mock_camera.isOpened.return_value = True
-        mock_camera.read.return_value = (False, None)
+        mock_camera.grab.return_value = True
+        mock_camera.retrieve.return_value = (False, None)
         mock_video_capture.return_value = mock_camera
         
         # センサーでフレームをキャプチャ
-        sensor = AmbientLightSensor()
+        sensor = AmbientLightSensor(warmup_timeout=0)
         sensor.open()
         frame = sensor.capture_frame()
         
         # 検証
         self.assertIsNone(frame)
-        mock_camera.read.assert_called_once()
+        mock_camera.retrieve.assert_called_once()
+    
+    @patch('cv2.VideoCapture')
+    def test_capture_frame_grab_failure(self, mock_video_capture):
+        """grab()に失敗した場合はデコードせずにNoneを返すかテスト"""
+        mock_camera = MagicMock()
+        mock_camera.isOpened.return_value = True
+        mock_camera.grab.return_value = False
+        mock_video_capture.return_value = mock_camera
+        
+        sensor = AmbientLightSensor()
+        sensor.open()
+        
+        self.assertIsNone(sensor.capture_frame())
+        mock_camera.retrieve.assert_not_called()
     
     @patch('cv2.VideoCapture')
     @patch('cv2.cvtColor')
@@ -135,64 +242,496 @@ class TestAmbientLightSensor(unittest.TestCase):
         self.assertEqual(brightness, 128.0)
         mock_cvtcolor.assert_called_once_with(test_frame, cv2.COLOR_BGR2GRAY)
     
+    def test_reduced_brightness_accuracy(self):
+        """間引き・縮小・輝度直接計算の誤差が許容範囲内に収まるかテスト"""
+        rng = np.random.default_rng(0)
+        height, width = 720, 1280
+        # 横方向のグラデーション + 縦方向の色かぶり + ノイズを持つ合成フレーム
+        x = np.tile(np.linspace(0, 200, width, dtype=np.float32), (height, 1))
+        y = np.linspace(0, 40, height, dtype=np.float32)[:, None]
+        base = np.stack([x + y, x, 0.5 * x + y], axis=-1) + 10
+        noise = rng.normal(0, 8, size=(height, width, 3))
+        frames = [np.clip(base + noise, 0, 255).astype(np.uint8),
+                  rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)]
+        
+        modes = {
+            'stride': (AmbientLightSensor(sample_stride=4), 1.0),
+            'thumbnail': (AmbientLightSensor(thumbnail_size=64), 0.5),
+            'luma': (AmbientLightSensor(luma_weighted=True), 0.5),
+            'stride+luma': (AmbientLightSensor(sample_stride=4, luma_weighted=True), 1.0),
+        }
+        
+        reference_sensor = AmbientLightSensor()
+        for frame in frames:
+            reference = reference_sensor.get_frame_brightness(frame)
+            for name, (sensor, bound) in modes.items():
+                error = abs(sensor.get_frame_brightness(frame) - reference)
+                self.assertLess(error, bound, msg=f"{name} の誤差 {error:.3f} が大きすぎます")
+    
+    def test_reduced_brightness_cost(self):
+        """
+        間引き・縮小した輝度計算が、フレーム全体の計算より十分に速いかテスト
+
+        負荷の高い環境でも失敗しないよう上限は緩くしている。
+        実際の比率は python benchmarks/suite.py --scenarios frame で確認する
+        （FHDで thumbnail64 は約0.02倍、stride4 は約0.2倍）。
+        """
+        frame = np.random.default_rng(0).integers(0, 256, size=(1080, 1920, 3), dtype=np.uint8)
+        
+        def cost(sensor):
+            sensor.get_frame_brightness(frame)
+            timings = []
+            for _ in range(5):
+                start = time.perf_counter()
+                sensor.get_frame_brightness(frame)
+                timings.append(time.perf_counter() - start)
+            return min(timings)
+        
+        full = cost(AmbientLightSensor())
+        for options in ({'sample_stride': 4}, {'thumbnail_size': 64}):
+            reduced = cost(AmbientLightSensor(**options))
+            self.assertLess(reduced, full * 0.5, msg=f"{options} の計算が全体の半分より遅い")
+    
+    def test_reduce_frame_stride_samples_every_nth_pixel(self):
+        """ストライド指定時に、縦横が割り切れる場合は sample_stride 画素ごとの画素を取り出すかテスト"""
+        frame = np.random.default_rng(0).integers(0, 256, size=(480, 640, 3), dtype=np.uint8)
+        reduced = AmbientLightSensor(sample_stride=8).reduce_frame(frame)
+        
+        np.testing.assert_array_equal(reduced, frame[::8, ::8])
+        # 割り切れない大きさでもスライスと同じ大きさになる（画素は最近傍の補間で選ばれる）
+        uneven = frame[:475, :633]
+        self.assertEqual(AmbientLightSensor(sample_stride=8).reduce_frame(uneven).shape, (60, 80, 3))
+    
+    def test_reduce_frame_thumbnail_decimates_before_area_resize(self):
+        """サムネイル縮小時に、INTER_AREA には間引いた小さいフレームだけを渡すかテスト"""
+        frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        resized_shapes = []
+        resize = cv2.resize
+        
+        def record(src, size, interpolation=None):
+            if interpolation == cv2.INTER_AREA:
+                resized_shapes.append(src.shape)
+            return resize(src, size, interpolation=interpolation)
+        
+        with patch('src.camera.cv2.resize', side_effect=record):
+            reduced = AmbientLightSensor(thumbnail_size=64).reduce_frame(frame)
+        
+        self.assertEqual(reduced.shape, (36, 64, 3))
+        self.assertEqual(len(resized_shapes), 1)
+        self.assertLessEqual(resized_shapes[0][1], 64 * 4)
+    
+    def test_reduce_frame_thumbnail_keeps_aspect(self):
+        """サムネイル縮小時に縦横比が維持されるかテスト"""
+        frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+        reduced = AmbientLightSensor(thumbnail_size=64).reduce_frame(frame)
+        
+        self.assertEqual(reduced.shape, (36, 64, 3))
+    
+    def test_roi_ignores_bright_center(self):
+        """領域を指定した場合は、領域外（中央の顔やディスプレイの光）を無視するかテスト"""
+        frame = np.full((480, 640, 3), 50, dtype=np.uint8)
+        frame[160:, 160:480] = 250
+        
+        for options in ({}, {'luma_weighted': True}, {'sample_stride': 4}, {'thumbnail_size': 64}):
+            sensor = AmbientLightSensor(roi=[(0.0, 0.0, 1.0, 0.25)], **options)
+            self.assertAlmostEqual(sensor.get_frame_brightness(frame), 50.0, places=3)
+        
+        corners = AmbientLightSensor(roi=[(0.0, 0.0, 0.2, 0.2), (0.8, 0.8, 0.2, 0.2)])
+        self.assertAlmostEqual(corners.get_frame_brightness(frame), 50.0, places=3)
+    
+    def test_center_weight_map(self):
+        """中央重視の重みでは、中央の明るさが平均より強く反映されるかテスト"""
+        frame = np.full((48, 64, 3), 50, dtype=np.uint8)
+        frame[16:32, 21:43] = 200
+        
+        uniform = AmbientLightSensor().get_frame_brightness(frame)
+        weighted = AmbientLightSensor(weight_map='center').get_frame_brightness(frame)
+        
+        self.assertGreater(weighted, uniform + 10)
+        self.assertLess(weighted, 200)
+    
+    def test_raw_luma_averages_y_plane_without_conversion(self):
+        """YUYV形式で読み取る場合は、色変換を行わずにYの値を平均するかテスト"""
+        camera = RawFakeCapture(FakeClock(), [90],
+                                writable_props={cv2.CAP_PROP_FOURCC, cv2.CAP_PROP_CONVERT_RGB})
+        sensor = AmbientLightSensor(raw_luma=True)
+        sensor.camera = camera
+        
+        self.assertTrue(sensor.enable_raw_luma())
+        frame = sensor.capture_frame()
+        
+        self.assertEqual(frame.shape, (48, 64, 2))
+        with patch('cv2.cvtColor') as mock_cvtcolor:
+            self.assertAlmostEqual(sensor.get_frame_brightness(frame), (90 - 16) * 255 / 219)
+        mock_cvtcolor.assert_not_called()
+    
+    def test_raw_luma_matches_converted_frame(self):
+        """Yの平均が、BGRに変換してからグレースケールにした場合の平均とほぼ一致するかテスト"""
+        rng = np.random.default_rng(0)
+        yuyv = rng.integers(16, 236, size=(48, 64, 2), dtype=np.uint8)
+        # 色差はBGRへの変換でチャンネルが飽和しない程度にする
+        yuyv[:, :, 1] = rng.integers(112, 144, size=(48, 64), dtype=np.uint8)
+        bgr = cv2.cvtColor(yuyv, cv2.COLOR_YUV2BGR_YUYV)
+        
+        for options in ({}, {'sample_stride': 2}, {'roi': [(0.0, 0.0, 1.0, 0.5)]},
+                        {'weight_map': 'center'}):
+            sensor = AmbientLightSensor(**options)
+            # Yの限定範囲（16-235）の伸張を含め、BGRに変換した場合と同じ尺度の値になる
+            self.assertAlmostEqual(
+                sensor.get_frame_brightness(yuyv), sensor.get_frame_brightness(bgr), delta=1.0
+            )
+    
+    def test_raw_luma_falls_back_when_fourcc_is_ignored(self):
+        """カメラがYUYV形式に対応していない場合は、通常の読み取りを続けるかテスト"""
+        camera = RawFakeCapture(FakeClock(), [90], writable_props={cv2.CAP_PROP_CONVERT_RGB})
+        sensor = AmbientLightSensor(raw_luma=True)
+        sensor.camera = camera
+        
+        with self.assertLogs('lunar_brightness', level='WARNING'):
+            self.assertFalse(sensor.enable_raw_luma())
+        
+        self.assertEqual(camera.props[cv2.CAP_PROP_CONVERT_RGB], 1)
+        self.assertEqual(sensor.capture_frame().shape, (48, 64, 3))
+    
+    def test_raw_luma_falls_back_on_unexpected_frame(self):
+        """YUYVとして解釈できないフレーム（MJPEGなど）が返された場合は、BGRへの変換に戻すかテスト"""
+        camera = RawFakeCapture(FakeClock(), [90], raw_shape=(1, 1000),
+                                writable_props={cv2.CAP_PROP_FOURCC, cv2.CAP_PROP_CONVERT_RGB})
+        sensor = AmbientLightSensor(raw_luma=True)
+        sensor.camera = camera
+        self.assertTrue(sensor.enable_raw_luma())
+        
+        with self.assertLogs('lunar_brightness', level='WARNING'):
+            self.assertIsNone(sensor.capture_frame())
+        
+        self.assertFalse(sensor.raw_luma_active)
+        self.assertEqual(camera.props[cv2.CAP_PROP_CONVERT_RGB], 1)
+        self.assertEqual(sensor.get_frame_brightness(sensor.capture_frame()), 90.0)
+    
+    def test_warm_up_ends_when_exposure_settles(self):
+        """輝度が収束した時点でウォームアップを終了するかテスト"""
+        clock = FakeClock()
+        # 自動露出により輝度が 50 -> 200 へ指数的に収束するカメラ
+        levels = [round(200 - 150 * np.exp(-n / 3)) for n in range(100)]
+        camera = FakeCapture(clock, levels, grab_delay=1 / 30)
+        
+        sensor = AmbientLightSensor(warmup_timeout=2.0, warmup_tolerance=1.0,
+                                    warmup_stable_frames=3)
+        sensor.camera = camera
+        sensor._fresh_grab_threshold = 0.5 / 30
+        
+        with patch('time.monotonic', clock.monotonic), patch('time.sleep', clock.sleep):
+            elapsed = sensor.warm_up()
+        
+        # 輝度差が初めて1未満となったフレームから、3フレーム連続で安定した時点で終了
+        first_stable = next(n for n in range(1, 100) if abs(levels[n] - levels[n - 1]) < 1.0)
+        self.assertEqual(camera.retrieve_count, first_stable + 3)
+        self.assertAlmostEqual(elapsed, camera.retrieve_count / 30)
+        self.assertLess(elapsed, 2.0)
+        self.assertEqual(sensor.last_warmup_duration, elapsed)
+    
+    def test_warm_up_times_out(self):
+        """輝度が安定しない場合はタイムアウトで終了するかテスト"""
+        clock = FakeClock()
+        # 明暗を繰り返し、決して安定しないカメラ
+        camera = FakeCapture(clock, [50, 200] * 100, grab_delay=1 / 30)
+        
+        sensor = AmbientLightSensor(warmup_timeout=1.0)
+        sensor.camera = camera
+        sensor._fresh_grab_threshold = 0.5 / 30
+        
+        with patch('time.monotonic', clock.monotonic), patch('time.sleep', clock.sleep):
+            elapsed = sensor.warm_up()
+        
+        self.assertGreaterEqual(elapsed, 1.0)
+        self.assertLess(elapsed, 1.0 + 1 / 30 + 1e-9)
+    
+    def test_lock_exposure(self):
+        """露出とゲインを固定し、輝度をそのまま報告するかテスト"""
+        camera = FakeCapture(FakeClock(), [100], writable_props={
+            cv2.CAP_PROP_AUTO_EXPOSURE, cv2.CAP_PROP_EXPOSURE, cv2.CAP_PROP_GAIN
+        })
+        sensor = AmbientLightSensor(exposure_lock=True, exposure_value=156, gain_value=64)
+        sensor.camera = camera
+        
+        self.assertTrue(sensor.lock_exposure())
+        self.assertTrue(sensor.exposure_locked)
+        self.assertEqual(camera.props[cv2.CAP_PROP_AUTO_EXPOSURE], 1)
+        self.assertEqual(camera.props[cv2.CAP_PROP_EXPOSURE], 156)
+        self.assertEqual(camera.props[cv2.CAP_PROP_GAIN], 64)
+        
+        frame = np.full((10, 10, 3), 100, dtype=np.uint8)
+        self.assertAlmostEqual(sensor.get_frame_brightness(frame), 100.0)
+    
+    def test_lock_exposure_normalizes_by_actual_values(self):
+        """バックエンドが露出値を丸めた場合、設定値での輝度に換算するかテスト"""
+        def snap(prop_id, value):
+            # 露出は 120 に、ゲインは 0.8 倍に丸められる
+            return {cv2.CAP_PROP_EXPOSURE: 120.0, cv2.CAP_PROP_GAIN: value * 0.8}.get(prop_id, value)
+        
+        camera = FakeCapture(FakeClock(), [100], prop_filter=snap, writable_props={
+            cv2.CAP_PROP_AUTO_EXPOSURE, cv2.CAP_PROP_EXPOSURE, cv2.CAP_PROP_GAIN
+        })
+        sensor = AmbientLightSensor(exposure_lock=True, exposure_value=150, gain_value=64)
+        sensor.camera = camera
+        
+        self.assertTrue(sensor.lock_exposure())
+        
+        frame = np.full((10, 10, 3), 40, dtype=np.uint8)
+        # 40 * (150 / 120) * (64 / 51.2) = 62.5
+        self.assertAlmostEqual(sensor.get_frame_brightness(frame), 62.5)
+    
+    def test_lock_exposure_normalizes_approximate_lock(self):
+        """読み戻した値が設定値と大きく異なっても換算できる範囲なら、実際の値で換算するかテスト"""
+        def snap(prop_id, value):
+            # 露出は設定値の 0.4 倍に丸められる
+            return value * 0.4 if prop_id == cv2.CAP_PROP_EXPOSURE else value
+        
+        # ゲインは set() を受け付けないが、カメラは 32 で動いている
+        camera = FakeCapture(FakeClock(), [100], prop_filter=snap, writable_props={
+            cv2.CAP_PROP_AUTO_EXPOSURE, cv2.CAP_PROP_EXPOSURE
+        })
+        camera.props[cv2.CAP_PROP_GAIN] = 32.0
+        sensor = AmbientLightSensor(exposure_lock=True, exposure_value=150, gain_value=64)
+        sensor.camera = camera
+        
+        self.assertTrue(sensor.lock_exposure())
+        
+        frame = np.full((10, 10, 3), 20, dtype=np.uint8)
+        # 20 * (150 / 60) * (64 / 32) = 100
+        self.assertAlmostEqual(sensor.get_frame_brightness(frame), 100.0)
+    
+    def test_lock_exposure_falls_back_when_ignored(self):
+        """露出プロパティを無視するバックエンドでは自動露出に戻すかテスト"""
+        # 自動露出の切り替えは受け付けるが、露出値は反映されない（読み戻すと0）
+        camera = FakeCapture(FakeClock(), [100], writable_props={cv2.CAP_PROP_AUTO_EXPOSURE})
+        sensor = AmbientLightSensor(exposure_lock=True)
+        sensor.camera = camera
+        
+        self.assertFalse(sensor.lock_exposure())
+        self.assertFalse(sensor.exposure_locked)
+        self.assertEqual(camera.props[cv2.CAP_PROP_AUTO_EXPOSURE], 3)
+        
+        frame = np.full((10, 10, 3), 100, dtype=np.uint8)
+        self.assertAlmostEqual(sensor.get_frame_brightness(frame), 100.0)
+    
     @patch('cv2.VideoCapture')
-    @patch('time.sleep')
-    def test_measure_ambient_light(self, mock_sleep, mock_video_capture):
-        """周囲の輝度測定が正しく行われるかテスト"""
-        # モックの設定
-        mock_camera = MagicMock()
-        mock_camera.isOpened.return_value = True
+    def test_open_locks_exposure(self, mock_video_capture):
+        """exposure_lockが有効な場合、カメラを開いた後に露出を固定するかテスト"""
+        camera = FakeCapture(FakeClock(), [100], writable_props={
+            cv2.CAP_PROP_AUTO_EXPOSURE, cv2.CAP_PROP_EXPOSURE, cv2.CAP_PROP_GAIN
+        })
+        mock_video_capture.return_value = camera
+        
+        sensor = AmbientLightSensor(exposure_lock=True)
         
+        self.assertTrue(sensor.open())
+        self.assertTrue(sensor.exposure_locked)
+    
+    def test_measure_ambient_light(self):
+        """周囲の輝度測定が正しく行われるかテスト"""
+        clock = FakeClock()
         # 3つのフレームを読み取り、それぞれの平均輝度が異なる場合
-        frames = [
-            np.full((100, 100, 3), 100, dtype=np.uint8),  # 輝度=100
-            np.full((100, 100, 3), 150, dtype=np.uint8),  # 輝度=150
-            np.full((100, 100, 3), 200, dtype=np.uint8)   # 輝度=200
-        ]
-        
-        # read()が呼ばれるたびに異なるフレームを返すようにする
-        mock_camera.read.side_effect = [(True, frames[0]), (True, frames[1]), (True, frames[2])]
-        mock_video_capture.return_value = mock_camera
+        camera = FakeCapture(clock, [100, 150, 200])
         
-        # パッチを当てて輝度計算をモックする
-        with patch.object(AmbientLightSensor, 'get_frame_brightness') as mock_get_brightness:
-            mock_get_brightness.side_effect = [100.0, 150.0, 200.0]
-            
-            # タイミング制御用のモック
-            with patch('time.time') as mock_time:
-                # 0秒, 0.2秒, 0.4秒, 0.6秒のタイムスタンプをシミュレート
-                mock_time.side_effect = [0, 0.2, 0.4, 0.6]
-                
-                # センサーで周囲の輝度を測定（0.5秒間）
-                sensor = AmbientLightSensor()
-                sensor.open()
-                brightness = sensor.measure_ambient_light(duration=0.5, sample_interval=0.1)
-                
-                # 検証（0.5秒の間に取得されるのは 100 と 150 のみ。(100 + 150) / 2 = 125）
-                self.assertEqual(brightness, 125.0)
-
-                # 0.5秒の間に2つのフレームがキャプチャされるはず
-                self.assertEqual(mock_camera.read.call_count, 2)
-                self.assertEqual(mock_get_brightness.call_count, 2)
-
-                # sample_intervalごとにsleepするはず (2回)
-                mock_sleep.assert_has_calls([call(0.1), call(0.1)])
+        sensor = AmbientLightSensor()
+        sensor.camera = camera
+        
+        with patch('time.monotonic', clock.monotonic), \
+                patch('time.sleep', side_effect=clock.sleep) as mock_sleep:
+            brightness = sensor.measure_ambient_light(duration=0.5, sample_interval=0.25)
+        
+        # 検証（0.5秒の間に取得されるのは 100 と 150 のみ。(100 + 150) / 2 = 125）
+        self.assertEqual(brightness, 125.0)
+        
+        # 0.5秒の間に2つのフレームがデコードされるはず
+        self.assertEqual(camera.retrieve_count, 2)
+        
+        # sample_intervalごとにsleepするはず (2回)
+        mock_sleep.assert_has_calls([call(0.25), call(0.25)])
+    
+    def test_measure_logs_summary_instead_of_each_frame(self):
+        """デバッグログはフレームごとではなく、測定の終了時に1回だけ出力するかテスト"""
+        clock = FakeClock()
+        camera = FakeCapture(clock, [100, 150, 200, 250])
+        
+        sensor = AmbientLightSensor()
+        sensor.camera = camera
+        
+        with patch('time.monotonic', clock.monotonic), patch('time.sleep', clock.sleep), \
+                self.assertLogs('lunar_brightness', level='DEBUG') as logs:
+            sensor.measure_ambient_light(duration=0.4, sample_interval=0.1)
+        
+        frame_logs = [message for message in logs.output if 'フレーム輝度' in message]
+        self.assertEqual(len(frame_logs), 1)
+        self.assertIn('最小 100.00 / 最大 250.00', frame_logs[0])
+        self.assertIn('フレーム数: 4', frame_logs[0])
+    
+    def test_measure_drains_buffered_frames_without_decoding(self):
+        """バッファ済みフレームはgrab()のみで読み捨て、サンプルだけをデコードするかテスト"""
+        clock = FakeClock()
+        # grab()が即座に返る（＝常にバッファ済みフレームがある）カメラ
+        camera = FakeCapture(clock, [120] * 100)
+        
+        sensor = AmbientLightSensor(max_drain_frames=3)
+        sensor.camera = camera
+        
+        with patch('time.monotonic', clock.monotonic), patch('time.sleep', clock.sleep):
+            brightness = sensor.measure_ambient_light(duration=0.5, sample_interval=0.1)
+        
+        self.assertEqual(brightness, 120.0)
+        # 5サンプル分のみデコードし、それぞれ最大3枚を読み捨てる
+        self.assertEqual(camera.retrieve_count, 5)
+        self.assertEqual(camera.grab_count, 5 * 4)
+    
+    def test_measure_stops_draining_on_fresh_frame(self):
+        """grab()が新しいフレームを待った場合は読み捨てを止めるかテスト"""
+        clock = FakeClock()
+        # 30fpsのカメラで、grab()が毎回次のフレームの到着を待つ場合
+        camera = FakeCapture(clock, [80] * 100, grab_delay=1 / 30)
+        
+        sensor = AmbientLightSensor(max_drain_frames=3)
+        sensor.camera = camera
+        sensor._fresh_grab_threshold = 0.5 / 30
+        
+        with patch('time.monotonic', clock.monotonic), patch('time.sleep', clock.sleep):
+            sensor.measure_ambient_light(duration=0.5, sample_interval=0.1)
+        
+        # 読み捨ては発生せず、grab()とretrieve()が1対1で呼ばれる
+        self.assertGreater(camera.retrieve_count, 0)
+        self.assertEqual(camera.grab_count, camera.retrieve_count)
+    
+    def test_measure_stops_early_in_steady_light(self):
+        """輝度が安定している場合は、最小サンプル数を取得した時点で測定を終了するかテスト"""
+        clock = FakeClock()
+        camera = FakeCapture(clock, [120] * 100)
+        
+        sensor = AmbientLightSensor(max_drain_frames=0, early_stop_tolerance=0.5,
+                                    early_stop_min_samples=4)
+        sensor.camera = camera
+        
+        with patch('time.monotonic', clock.monotonic), patch('time.sleep', clock.sleep):
+            brightness = sensor.measure_ambient_light(duration=1.0, sample_interval=0.1)
+        
+        self.assertEqual(brightness, 120.0)
+        self.assertEqual(camera.retrieve_count, 4)
+        self.assertEqual(sensor.last_sample_count, 4)
+        self.assertAlmostEqual(sensor.last_measure_duration, 0.3)
+    
+    def test_measure_uses_full_duration_when_noisy(self):
+        """輝度のばらつきが大きい場合は、測定時間の上限までサンプリングするかテスト"""
+        clock = FakeClock()
+        camera = FakeCapture(clock, [60, 180] * 50)
+        
+        sensor = AmbientLightSensor(max_drain_frames=0, early_stop_tolerance=0.5,
+                                    early_stop_min_samples=4)
+        sensor.camera = camera
+        
+        with patch('time.monotonic', clock.monotonic), patch('time.sleep', clock.sleep):
+            brightness = sensor.measure_ambient_light(duration=0.95, sample_interval=0.1)
+        
+        self.assertEqual(camera.retrieve_count, 10)
+        self.assertAlmostEqual(brightness, 120.0)
+        self.assertAlmostEqual(sensor.last_measure_duration, 1.0)
+    
+    def test_measure_stops_when_cpu_budget_is_exhausted(self):
+        """次のフレームを処理するとCPU時間の予算を超える時点で測定を終了するかテスト"""
+        clock = FakeClock()
+        camera = FakeCapture(clock, [120] * 100, decode_cpu=0.002)
+        
+        sensor = AmbientLightSensor(max_drain_frames=0, cpu_budget_ms=5.0)
+        sensor.camera = camera
+        
+        with patch('time.monotonic', clock.monotonic), patch('time.sleep', clock.sleep), \
+                patch('time.process_time', clock.process_time):
+            brightness = sensor.measure_ambient_light(duration=1.0, sample_interval=0.1)
+        
+        # 2フレームで4ミリ秒、3フレーム目を処理すると6ミリ秒で予算を超える
+        self.assertEqual(brightness, 120.0)
+        self.assertEqual(camera.retrieve_count, 2)
+        self.assertAlmostEqual(sensor.last_cpu_time, 0.004)
+    
+    def test_measure_duty_cycle_scales_with_elapsed_time(self):
+        """CPU時間の割合の予算が、前回の測定からの経過時間に比例するかテスト"""
+        clock = FakeClock()
+        camera = FakeCapture(clock, [120] * 100, decode_cpu=0.002)
+        
+        sensor = AmbientLightSensor(max_drain_frames=0, cpu_duty_cycle=0.01)
+        sensor.camera = camera
+        
+        with patch('time.monotonic', clock.monotonic), patch('time.sleep', clock.sleep), \
+                patch('time.process_time', clock.process_time):
+            # 初回は測定時間（1秒）を基準に10ミリ秒
+            sensor.measure_ambient_light(duration=1.0, sample_interval=0.1)
+            self.assertEqual(sensor.last_sample_count, 5)
+            # 0.5秒後の測定は5ミリ秒、10秒後の測定は（測定時間の間すべてサンプリングして）予算内
+            sensor.measure_ambient_light(duration=1.0, sample_interval=0.1)
+            self.assertEqual(sensor.last_sample_count, 2)
+            clock.now += 10.0
+            sensor.measure_ambient_light(duration=0.95, sample_interval=0.1)
+            self.assertEqual(sensor.last_sample_count, 10)
+    
+    @patch('cv2.setNumThreads')
+    @patch('cv2.VideoCapture')
+    def test_open_requests_budget_capture_settings(self, mock_video_capture, mock_set_threads):
+        """CPU時間の予算がある場合、低い解像度・フレームレートを要求しスレッド数を制限するかテスト"""
+        camera = FakeCapture(FakeClock(), [100], writable_props={
+            cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT, cv2.CAP_PROP_FPS
+        })
+        mock_video_capture.return_value = camera
+        
+        sensor = AmbientLightSensor(cpu_budget_ms=10.0, capture_width=160, warmup_timeout=0)
+        
+        self.assertTrue(sensor.open())
+        self.assertEqual(camera.props[cv2.CAP_PROP_FRAME_WIDTH], 160)
+        self.assertEqual(camera.props[cv2.CAP_PROP_FRAME_HEIGHT], 240)
+        self.assertEqual(camera.props[cv2.CAP_PROP_FPS], 15.0)
+        mock_set_threads.assert_called_once_with(1)
+    
+    @patch('cv2.setNumThreads')
+    @patch('cv2.VideoCapture')
+    def test_open_without_budget_keeps_capture_settings(self, mock_video_capture, mock_set_threads):
+        """予算も解像度の指定もない場合は、カメラの設定を変えないかテスト"""
+        camera = FakeCapture(FakeClock(), [100], writable_props={cv2.CAP_PROP_FRAME_WIDTH})
+        mock_video_capture.return_value = camera
+        
+        sensor = AmbientLightSensor(warmup_timeout=0)
+        
+        self.assertTrue(sensor.open())
+        self.assertEqual(camera.props, {})
+        mock_set_threads.assert_not_called()
+    
+    def test_running_stats_matches_numpy(self):
+        """逐次計算した平均・分散がNumPyの結果と一致するかテスト"""
+        values = np.random.default_rng(0).normal(100, 5, size=200)
+        stats = RunningStats()
+        for value in values:
+            stats.add(float(value))
+        
+        self.assertAlmostEqual(stats.mean, float(np.mean(values)))
+        self.assertAlmostEqual(stats.variance, float(np.var(values, ddof=1)))
+        self.assertAlmostEqual(stats.std, float(np.std(values)))
+        self.assertAlmostEqual(stats.half_width(), 1.96 * float(np.std(values, ddof=1)) / np.sqrt(200))
+        self.assertEqual(stats.minimum, float(values.min()))
 
 
-@patch('src.camera.AmbientLightSensor')
-def test_measure_ambient_brightness(mock_sensor_class):
-    """measure_ambient_brightness関数が正しく動作するかテスト"""
-    # モック設定
-    mock_sensor_instance = MagicMock()
-    mock_sensor_instance.measure_ambient_light.return_value = 175.5
-    mock_sensor_class.return_value.__enter__.return_value = mock_sensor_instance
-    
-    # 関数を呼び出し
-    result = measure_ambient_brightness(capture_duration=2.0)
-    
-    # 検証
-    self.assertEqual(result, 175.5)
-    mock_sensor_instance.measure_ambient_light.assert_called_once_with(duration=2.0)
+class TestMeasureAmbientBrightness(unittest.TestCase):
+    """measure_ambient_brightness関数のテスト"""
+    
+    @patch('src.camera.AmbientLightSensor')
+    def test_measure_ambient_brightness(self, mock_sensor_class):
+        """measure_ambient_brightness関数が正しく動作するかテスト"""
+        # モック設定
+        mock_sensor_instance = MagicMock()
+        mock_sensor_instance.measure_ambient_light.return_value = 175.5
+        mock_sensor_class.return_value.__enter__.return_value = mock_sensor_instance
+        
+        # 関数を呼び出し
+        result = measure_ambient_brightness(capture_duration=2.0)
+        
+        # 検証
+        self.assertEqual(result, 175.5)
+        mock_sensor_instance.measure_ambient_light.assert_called_once_with(duration=2.0)
 
 
 if __name__ == '__main__':
@@ -5,7 +5,9 @@ import os
 import json
 import tempfile
 import unittest
-from src.config import BrightnessConfig, load_config
+from dataclasses import FrozenInstanceError
+from unittest.mock import patch
+from src.config import BrightnessConfig, ConfigWatcher, DisplayRange, load_config
 
 class TestBrightnessConfig(unittest.TestCase):
     """BrightnessConfigクラスのテスト"""
@@ -23,19 +25,55 @@ class TestBrightnessConfig(unittest.TestCase):
         config = BrightnessConfig(min_brightness=-10, max_brightness=150)
         
         # 検証実行
-        config.validate()
+        config = config.validate()
         
         # 値がクランプされていることを確認
         self.assertEqual(config.min_brightness, 0)
         self.assertEqual(config.max_brightness, 100)
     
+    def test_validation_returns_corrected_copy(self):
+        """検証は元の設定を変更せず、修正した新しい設定を返すかテスト"""
+        config = BrightnessConfig(min_brightness=-10, displays={'DELL': DisplayRange(90, 20)})
+        
+        validated = config.validate()
+        
+        self.assertIsNot(validated, config)
+        self.assertEqual(config.min_brightness, -10)
+        self.assertEqual(config.displays['DELL'], DisplayRange(90, 20))
+        self.assertEqual(validated.min_brightness, 0)
+        self.assertEqual(validated.displays['DELL'], DisplayRange(20, 90))
+    
+    def test_config_is_immutable(self):
+        """設定の値を直接変更できないかテスト"""
+        config = BrightnessConfig()
+        
+        with self.assertRaises(FrozenInstanceError):
+            config.min_brightness = 10
+        with self.assertRaises(FrozenInstanceError):
+            config.displays = {}
+    
+    def test_displays_are_read_only_copy(self):
+        """ディスプレイごとの輝度範囲も変更できず、渡した辞書と切り離されているかテスト"""
+        displays = {'DELL': DisplayRange(20, 90)}
+        config = BrightnessConfig(displays=displays).validate()
+        
+        with self.assertRaises(TypeError):
+            config.displays['LG'] = DisplayRange(0, 100)
+        displays['LG'] = DisplayRange(0, 100)
+        self.assertEqual(list(config.displays), ['DELL'])
+        
+        # 同じ内容の設定は等しく、ハッシュ値も計算できる
+        same = BrightnessConfig(displays={'DELL': DisplayRange(20, 90)}).validate()
+        self.assertEqual(config, same)
+        self.assertEqual(hash(config), hash(same))
+    
     def test_validation_swaps_min_max_if_needed(self):
         """min > maxの場合、値が交換されるかテスト"""
         # min > maxで初期化
         config = BrightnessConfig(min_brightness=80, max_brightness=30)
         
         # 検証実行
-        config.validate()
+        config = config.validate()
         
         # 値が交換されていることを確認
         self.assertEqual(config.min_brightness, 30)
@@ -47,10 +85,65 @@ class TestBrightnessConfig(unittest.TestCase):
         config = BrightnessConfig(capture_duration=0.01)
         
         # 検証実行
-        config.validate()
+        config = config.validate()
         
         # 最小値に調整されていることを確認
         self.assertEqual(config.capture_duration, 0.1)
+    
+    def test_validation_clamps_sampling_options(self):
+        """間引き設定が有効な範囲に修正されるかテスト"""
+        config = BrightnessConfig(sample_stride=0, thumbnail_size=-5,
+                                  early_stop_tolerance=-1.0, early_stop_min_samples=0)
+        
+        config = config.validate()
+        
+        self.assertEqual(config.sample_stride, 1)
+        self.assertEqual(config.thumbnail_size, 0)
+        self.assertEqual(config.early_stop_tolerance, 0.0)
+        self.assertEqual(config.early_stop_min_samples, 2)
+    
+    def test_validation_clamps_cpu_budget_options(self):
+        """CPU時間の予算とカメラに要求する値が有効な範囲に修正されるかテスト"""
+        config = BrightnessConfig(cpu_budget_ms=-1.0, cpu_duty_cycle=2.0, capture_width=-320,
+                                  capture_height=-240, capture_fps=-15.0)
+        
+        config = config.validate()
+        
+        self.assertEqual(config.cpu_budget_ms, 0.0)
+        self.assertEqual(config.cpu_duty_cycle, 1.0)
+        self.assertEqual((config.capture_width, config.capture_height, config.capture_fps), (0, 0, 0.0))
+
+    
+    def test_validation_fixes_display_ranges(self):
+        """ディスプレイごとの輝度範囲も検証されるかテスト"""
+        config = BrightnessConfig(displays={
+            'DELL': DisplayRange(min_brightness=90, max_brightness=20),
+            'LG': DisplayRange(min_brightness=-5, max_brightness=120),
+        })
+        
+        config = config.validate()
+        
+        self.assertEqual(config.displays['DELL'], DisplayRange(20, 90))
+        self.assertEqual(config.displays['LG'], DisplayRange(0, 100))
+    
+    def test_validation_fixes_curve_options(self):
+        """不正な応答カーブの設定がデフォルトに戻されるかテスト"""
+        config = BrightnessConfig(curve='s-curve', curve_gamma=-1, curve_log_factor=0)
+        config = config.validate()
+        self.assertEqual(config.curve, 'linear')
+        self.assertEqual(config.curve_gamma, 2.2)
+        self.assertEqual(config.curve_log_factor, 10.0)
+        
+        # 点が足りない折れ線カーブは線形になり、点は範囲内にクランプして並べ替えられる
+        config = BrightnessConfig(curve='piecewise', curve_points=[(300, 1.5)])
+        config = config.validate()
+        self.assertEqual(config.curve, 'linear')
+        self.assertEqual(config.curve_points, ((255.0, 1.0),))
+        
+        config = BrightnessConfig(curve='piecewise', curve_points=[(200, 0.9), (-5, 0)])
+        config = config.validate()
+        self.assertEqual(config.curve, 'piecewise')
+        self.assertEqual(config.curve_points, ((0.0, 0.0), (200.0, 0.9)))
 
 
 class TestLoadConfig(unittest.TestCase):
@@ -63,7 +156,15 @@ class TestLoadConfig(unittest.TestCase):
             json.dump({
                 "min_brightness": 40,
                 "max_brightness": 70,
-                "capture_duration": 2.5
+                "capture_duration": 2.5,
+                "sample_stride": 4,
+                "thumbnail_size": 32,
+                "luma_weighted": True,
+                "cpu_budget_ms": 20,
+                "cpu_duty_cycle": 0.005,
+                "capture_width": 160,
+                "capture_height": 120,
+                "capture_fps": 10
             }, temp_file)
             temp_file_path = temp_file.name
         
@@ -75,11 +176,80 @@ class TestLoadConfig(unittest.TestCase):
             self.assertEqual(config.min_brightness, 40)
             self.assertEqual(config.max_brightness, 70)
             self.assertEqual(config.capture_duration, 2.5)
+            self.assertEqual(config.sample_stride, 4)
+            self.assertEqual(config.thumbnail_size, 32)
+            self.assertTrue(config.luma_weighted)
+            self.assertEqual(config.cpu_budget_ms, 20.0)
+            self.assertEqual(config.cpu_duty_cycle, 0.005)
+            self.assertEqual((config.capture_width, config.capture_height), (160, 120))
+            self.assertEqual(config.capture_fps, 10.0)
             
         finally:
             # テスト用ファイルを削除
             os.unlink(temp_file_path)
     
+    def test_load_config_with_displays(self):
+        """ディスプレイごとの輝度範囲が読み込まれるかテスト"""
+        with tempfile.NamedTemporaryFile(mode='w', delete=False) as temp_file:
+            json.dump({
+                "min_brightness": 20,
+                "max_brightness": 90,
+                "displays": {
+                    "DELL U2720Q": {"min_brightness": 30, "max_brightness": 70},
+                    "LG": {"max_brightness": 60}
+                }
+            }, temp_file)
+            temp_file_path = temp_file.name
+        
+        try:
+            config = load_config(temp_file_path)
+            
+            self.assertEqual(config.displays, {
+                "DELL U2720Q": DisplayRange(30, 70),
+                # 省略した値は全体の設定を使用する
+                "LG": DisplayRange(20, 60),
+            })
+            
+        finally:
+            os.unlink(temp_file_path)
+    
+    def test_load_config_with_curve(self):
+        """応答カーブの設定が読み込まれるかテスト"""
+        with tempfile.NamedTemporaryFile(mode='w', delete=False) as temp_file:
+            json.dump({
+                "curve": "piecewise",
+                "curve_points": [[0, 0], [64, 0.5], [255, 1]]
+            }, temp_file)
+            temp_file_path = temp_file.name
+        
+        try:
+            config = load_config(temp_file_path)
+            
+            self.assertEqual(config.curve, 'piecewise')
+            self.assertEqual(config.curve_points, ((0.0, 0.0), (64.0, 0.5), (255.0, 1.0)))
+            
+        finally:
+            os.unlink(temp_file_path)
+    
+    def test_load_config_with_roi(self):
+        """領域のプリセット・割合の一覧と画素の重みが読み込まれ、検証されるかテスト"""
+        for roi, expected in [
+            ('top', [(0.0, 0.0, 1.0, 0.25)]),
+            ([[0.5, 0.8, 1.0, 0.5], [0, 0, 0, 1]], [(0.5, 0.8, 0.5, 0.2)]),
+        ]:
+            with tempfile.NamedTemporaryFile(mode='w', delete=False) as temp_file:
+                json.dump({"roi": roi, "weight_map": "fisheye"}, temp_file)
+                temp_file_path = temp_file.name
+            
+            try:
+                config = load_config(temp_file_path)
+                
+                self.assertEqual([tuple(round(v, 6) for v in region) for region in config.roi], expected)
+                self.assertEqual(config.weight_map, '')
+                
+            finally:
+                os.unlink(temp_file_path)
+    
     def test_load_config_with_invalid_json(self):
         """不正なJSONファイルの場合にデフォルト値が使用されるかテスト"""
         # 不正なJSON形式のテスト用一時ファイルを作成
@@ -114,5 +284,65 @@ class TestLoadConfig(unittest.TestCase):
         self.assertEqual(config.capture_duration, 1)
 
 
+class TestConfigWatcher(unittest.TestCase):
+    """ConfigWatcherクラスのテスト"""
+    
+    def setUp(self):
+        """各テスト前の準備"""
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = os.path.join(temp_dir.name, 'config.json')
+        self.mtime_ns = 1_000_000_000_000_000_000
+        self.write({"min_brightness": 40})
+        self.watcher = ConfigWatcher(self.path)
+        self.config = self.watcher.load()
+    
+    def write(self, content):
+        """設定ファイルを書き込み、更新時刻を進める"""
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(content if isinstance(content, str) else json.dumps(content))
+        self.mtime_ns += 1_000_000_000
+        os.utime(self.path, ns=(self.mtime_ns, self.mtime_ns))
+    
+    def test_unchanged_file_is_not_parsed(self):
+        """ファイルが変わっていない場合は解析し直さないかテスト"""
+        with patch('src.config.load_config') as mock_load:
+            self.assertIsNone(self.watcher.poll())
+            self.assertIsNone(self.watcher.poll())
+        
+        mock_load.assert_not_called()
+    
+    def test_changed_file_returns_new_config(self):
+        """変更された場合は新しい設定オブジェクトを返すかテスト"""
+        self.write({"min_brightness": 45, "curve": "gamma"})
+        
+        config = self.watcher.poll()
+        
+        self.assertIsNot(config, self.config)
+        self.assertEqual(config.min_brightness, 45)
+        self.assertEqual(config.curve, 'gamma')
+        # 以前の設定オブジェクトは変更されない
+        self.assertEqual(self.config.min_brightness, 40)
+        self.assertEqual(self.watcher.reloads, 1)
+        self.assertIsNone(self.watcher.poll())
+    
+    def test_touch_without_change_is_ignored(self):
+        """更新時刻だけが変わり内容が同じ場合は変更なしとみなすかテスト"""
+        self.write({"min_brightness": 40})
+        
+        self.assertIsNone(self.watcher.poll())
+        self.assertEqual(self.watcher.reloads, 0)
+    
+    def test_invalid_file_keeps_current_config(self):
+        """編集途中の不正なファイルでは現在の設定を使い続けるかテスト"""
+        self.write('{"min_brightness": 4')
+        
+        self.assertIsNone(self.watcher.poll())
+        self.assertIs(self.watcher.config, self.config)
+        
+        self.write({"min_brightness": 50})
+        self.assertEqual(self.watcher.poll().min_brightness, 50)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,174 @@
+"""
+デーモンモジュールのテスト
+"""
+import json
+import os
+import signal
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock
+from src.brightness_adjuster import CycleReport
+from src.daemon import BrightnessDaemon
+from src.metrics import metrics
+from src.trace import read_trace
+
+class TestBrightnessDaemon(unittest.TestCase):
+    """BrightnessDaemonクラスのテスト"""
+
+    def setUp(self):
+        """各テスト前の準備"""
+        self.adjuster = MagicMock()
+        self.adjuster.actuator = None
+        self.adjuster.config.metrics_file = ''
+        self.adjuster.config.trace_file = ''
+        self.daemon = BrightnessDaemon(self.adjuster, interval=0)
+
+    def tearDown(self):
+        """各テスト後の後片付け（共有のメトリクスを元に戻す）"""
+        metrics.enabled = False
+        metrics.reset()
+
+    def test_run_repeats_until_stopped(self):
+        """停止が要求されるまで調整を繰り返すかテスト"""
+        def adjust():
+            if self.adjuster.adjust.call_count == 3:
+                self.daemon.stop()
+            return True
+        self.adjuster.adjust.side_effect = adjust
+
+        result = self.daemon.run()
+
+        self.assertEqual(result, 0)
+        self.assertEqual(self.adjuster.adjust.call_count, 3)
+        self.assertEqual(self.daemon.cycles, 3)
+        # 終了時にカメラが解放されること
+        self.adjuster.sensor.close.assert_called_once()
+
+    def test_quiet_hours_release_sensor_and_skip_cycles(self):
+        """静音時間帯の間はカメラを解放して調整せず、終了後に最小間隔から始め直すかテスト"""
+        scheduler = MagicMock()
+        scheduler.quiet_remaining.side_effect = [0.01, 0.0]
+        scheduler.next_interval.return_value = 0
+        self.daemon.scheduler = scheduler
+        self.adjuster.adjust.side_effect = lambda: self.daemon.stop() or True
+
+        self.daemon.run()
+
+        self.assertEqual(self.adjuster.adjust.call_count, 1)
+        self.assertEqual(self.adjuster.sensor.close.call_count, 2)
+        scheduler.reset.assert_called_once()
+
+    def test_scheduler_receives_last_ambient(self):
+        """直前のサイクルの測定値から次の間隔を決めるかテスト"""
+        scheduler = MagicMock()
+        scheduler.next_interval.return_value = 12.5
+        self.daemon.scheduler = scheduler
+        self.adjuster.last_report = CycleReport(ambient=140.0)
+
+        self.assertEqual(self.daemon.next_interval(), 12.5)
+        scheduler.next_interval.assert_called_once_with(140.0)
+
+    def test_error_releases_sensor_and_continues(self):
+        """サイクル中の例外でセンサーを解放し、ループを継続するかテスト"""
+        def adjust():
+            if self.adjuster.adjust.call_count == 1:
+                raise RuntimeError("camera disconnected")
+            self.daemon.stop()
+            return True
+        self.adjuster.adjust.side_effect = adjust
+
+        self.daemon.run()
+
+        self.assertEqual(self.adjuster.adjust.call_count, 2)
+        # エラー時と終了時の2回解放される
+        self.assertEqual(self.adjuster.sensor.close.call_count, 2)
+
+    def test_sigterm_stops_daemon(self):
+        """SIGTERMを受け取るとループを抜けてカメラを解放するかテスト"""
+        previous_term = signal.getsignal(signal.SIGTERM)
+        previous_int = signal.getsignal(signal.SIGINT)
+        self.addCleanup(signal.signal, signal.SIGTERM, previous_term)
+        self.addCleanup(signal.signal, signal.SIGINT, previous_int)
+
+        self.daemon.install_signal_handlers()
+        self.adjuster.adjust.side_effect = lambda: os.kill(os.getpid(), signal.SIGTERM) or True
+
+        self.daemon.run()
+
+        self.assertTrue(self.daemon.stopped)
+        self.assertEqual(self.adjuster.adjust.call_count, 1)
+        self.adjuster.sensor.close.assert_called_once()
+
+    def test_reloads_changed_config_before_cycle(self):
+        """設定ファイルが変更されていれば、サイクルの前に反映するかテスト"""
+        watcher = MagicMock()
+        new_config = MagicMock()
+        watcher.poll.side_effect = [None, new_config]
+        daemon = BrightnessDaemon(self.adjuster, interval=0, config_watcher=watcher)
+
+        daemon.run_cycle()
+        self.adjuster.update_config.assert_not_called()
+
+        daemon.run_cycle()
+        self.adjuster.update_config.assert_called_once_with(new_config)
+        self.assertEqual(self.adjuster.adjust.call_count, 2)
+
+    def test_exports_metrics_after_each_cycle(self):
+        """メトリクスの出力先が設定されていれば、サイクルごとに書き出すかテスト"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'metrics.json')
+            self.adjuster.config.metrics_file = path
+
+            def adjust():
+                metrics.increment('frames_captured')
+                if self.adjuster.adjust.call_count == 2:
+                    self.daemon.stop()
+                return True
+            self.adjuster.adjust.side_effect = adjust
+
+            self.daemon.run()
+
+            with open(path, encoding='utf-8') as f:
+                snapshot = json.load(f)
+            # 出力先が設定された最初のサイクルの後から計測を始める
+            self.assertEqual(snapshot['counters'], {'frames_captured': 1})
+
+    def test_records_trace_after_each_cycle(self):
+        """トレースファイルが設定されていれば、サイクルごとに記録して終了時に閉じるかテスト"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'trace.bin')
+            self.adjuster.config.trace_file = path
+            self.adjuster.config.trace_max_bytes = 4096
+
+            def adjust():
+                self.adjuster.last_report = CycleReport(
+                    timestamp=time.time(), ambient=100.0 + self.adjuster.adjust.call_count,
+                    samples=10, target=50.0, applied=50.0, durations={'cycle': 0.5}
+                )
+                if self.adjuster.adjust.call_count == 3:
+                    self.daemon.stop()
+                return True
+            self.adjuster.adjust.side_effect = adjust
+
+            self.daemon.run()
+
+            self.assertIsNone(self.daemon.trace)
+            trace = read_trace(path)
+            self.assertEqual(list(trace['ambient']), [101.0, 102.0, 103.0])
+            self.assertEqual(list(trace['cycle_ms']), [500.0] * 3)
+
+    def test_wait_flushes_pending_brightness(self):
+        """サイクル間の待機中に、保留中の輝度を書き込むかテスト"""
+        actuator = MagicMock()
+        # 1回目の確認ではすぐに書き込み可能、書き込み後は保留なし
+        actuator.flush_delay.side_effect = [0.0, None]
+        self.adjuster.actuator = actuator
+
+        self.daemon._wait_until(time.monotonic() + 0.05)
+
+        actuator.flush.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+ロガーモジュールのテスト
+"""
+import io
+import logging
+import os
+import tempfile
+import unittest
+from logging.handlers import QueueHandler
+from unittest.mock import patch
+from src import logger as logger_module
+from src.logger import setup_logger, shutdown_logger
+
+
+class TestSetupLogger(unittest.TestCase):
+    """setup_logger関数のテスト"""
+
+    def setUp(self):
+        """各テスト前の準備（ログの出力先を一時ディレクトリにする）"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.log_file = os.path.join(self.temp_dir.name, 'test.log')
+        self.console = io.StringIO()
+        patches = [
+            patch.object(logger_module, 'LOG_DIR', self.temp_dir.name),
+            patch.object(logger_module, 'LOG_FILE', self.log_file),
+            patch('sys.stdout', self.console),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """各テスト後の後片付け"""
+        test_logger = logging.getLogger('test_setup_logger')
+        for handler in test_logger.handlers:
+            handler.close()
+        test_logger.handlers = []
+        self.temp_dir.cleanup()
+
+    def _read_log_file(self) -> str:
+        with open(self.log_file, encoding='utf-8') as f:
+            return f.read()
+
+    def test_writes_synchronously_by_default(self):
+        """デフォルトではファイルとコンソールに直接書き込むかテスト"""
+        test_logger = setup_logger('test_setup_logger', level='DEBUG')
+        test_logger.debug("輝度: %.1f", 12.5)
+
+        self.assertNotIn(QueueHandler, [type(handler) for handler in test_logger.handlers])
+        self.assertIn("輝度: 12.5", self._read_log_file())
+        self.assertIn("輝度: 12.5", self.console.getvalue())
+
+    def test_queue_mode_writes_on_background_thread(self):
+        """キューを使う場合は、出力スレッド経由で書き込み、停止時に残りを書き出すかテスト"""
+        test_logger = setup_logger('test_setup_logger', level='INFO', use_queue=True)
+        listener = logger_module._listeners['test_setup_logger']
+        self.addCleanup(lambda: [handler.close() for handler in listener.handlers])
+
+        self.assertEqual([type(handler) for handler in test_logger.handlers], [QueueHandler])
+
+        test_logger.debug("出力されないログ")
+        for index in range(100):
+            test_logger.info("サイクル %d", index)
+        shutdown_logger('test_setup_logger')
+
+        content = self._read_log_file()
+        self.assertIn("サイクル 99", content)
+        self.assertNotIn("出力されないログ", content)
+        self.assertEqual(self.console.getvalue().count("サイクル"), 100)
+        self.assertNotIn('test_setup_logger', logger_module._listeners)
+
+
+if __name__ == '__main__':
+    unittest.main()
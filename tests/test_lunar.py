@@ -1,9 +1,19 @@
 """
 Lunar CLI 制御モジュールのテスト
 """
+import os
+import signal
+import tempfile
+import time
 import unittest
 from unittest.mock import patch, MagicMock
-from src.lunar import LunarController, set_display_brightness
+from src.lunar import (
+    LunarController, PersistentLunarController, create_display_controller,
+    set_display_brightness
+)
+
+# テスト用のLunar CLIの代替スクリプト
+FAKE_LUNAR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_lunar')
 
 class TestLunarController(unittest.TestCase):
     """LunarControllerクラスのテスト"""
@@ -99,6 +109,36 @@ class TestLunarController(unittest.TestCase):
             text=True
         )
     
+    @patch('subprocess.run')
+    def test_set_brightness_for_display(self, mock_run):
+        """ディスプレイを指定した場合にdisplaysコマンドを使用するかテスト"""
+        mock_run.return_value = MagicMock(stdout="")
+        
+        self.assertTrue(self.controller.set_brightness(42, display='DELL U2720Q'))
+        
+        mock_run.assert_called_once_with(
+            ['lunar', 'displays', 'DELL U2720Q', 'brightness', '42'],
+            check=True,
+            capture_output=True,
+            text=True
+        )
+    
+    @patch('subprocess.run')
+    def test_set_brightness_many_reports_per_display(self, mock_run):
+        """複数ディスプレイの設定結果がディスプレイごとに返されるかテスト"""
+        import subprocess
+        
+        def run(command, **kwargs):
+            if command[2] == 'LG':
+                raise subprocess.CalledProcessError(returncode=1, cmd=command)
+            return MagicMock(stdout="")
+        mock_run.side_effect = run
+        
+        results = self.controller.set_brightness_many({'DELL': 40, 'LG': 50, 'BenQ': 60})
+        
+        self.assertEqual(results, {'DELL': True, 'LG': False, 'BenQ': True})
+        self.assertEqual(mock_run.call_count, 3)
+    
     @patch('subprocess.run')
     def test_get_current_brightness_success(self, mock_run):
         """現在の輝度取得が成功するケースをテスト"""
@@ -135,6 +175,128 @@ class TestLunarController(unittest.TestCase):
         mock_run.assert_called_once()
 
 
+class TestPersistentLunarController(unittest.TestCase):
+    """PersistentLunarControllerクラスのテスト"""
+    
+    def setUp(self):
+        """各テスト前の準備"""
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.log_path = os.path.join(temp_dir.name, 'calls.log')
+        env = {
+            'FAKE_LUNAR_LOG': self.log_path,
+            'FAKE_LUNAR_STATE': os.path.join(temp_dir.name, 'state'),
+        }
+        patcher = patch.dict(os.environ, env)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        self.controller = PersistentLunarController(FAKE_LUNAR)
+        self.addCleanup(self.controller.close)
+    
+    def read_calls(self):
+        """代替スクリプトが記録した呼び出しを返す"""
+        with open(self.log_path, encoding='utf-8') as f:
+            return f.read().splitlines()
+    
+    @patch('subprocess.run')
+    def test_reuses_helper_process(self, mock_run):
+        """複数回の書き込みで同じヘルパープロセスを使い回すかテスト"""
+        self.assertTrue(self.controller.set_brightness(40))
+        self.assertTrue(self.controller.set_brightness(60.7))
+        
+        self.assertEqual(self.read_calls(), ['set brightness 40', 'set brightness 60'])
+        self.assertEqual(self.controller.helper_starts, 1)
+        mock_run.assert_not_called()
+    
+    def test_get_current_brightness(self):
+        """ヘルパー経由で現在の輝度を取得できるかテスト"""
+        self.controller.set_brightness(35)
+        
+        self.assertEqual(self.controller.get_current_brightness(), 35.0)
+    
+    def test_command_failure(self):
+        """コマンドが失敗した場合にFalseを返すかテスト"""
+        with patch.dict(os.environ, {'FAKE_LUNAR_EXIT': '3'}):
+            controller = PersistentLunarController(FAKE_LUNAR)
+            self.addCleanup(controller.close)
+            
+            self.assertFalse(controller.set_brightness(50))
+    
+    def test_command_not_found(self):
+        """lunarコマンドが見つからない場合にFalseを返すかテスト"""
+        controller = PersistentLunarController('/nonexistent/lunar')
+        self.addCleanup(controller.close)
+        
+        self.assertFalse(controller.set_brightness(50))
+    
+    def test_restarts_dead_helper(self):
+        """ヘルパープロセスが終了していた場合に再起動するかテスト"""
+        self.controller.set_brightness(40)
+        os.kill(self.controller._helper.pid, signal.SIGKILL)
+        self.controller._helper.wait()
+        
+        self.assertTrue(self.controller.set_brightness(45))
+        self.assertEqual(self.controller.helper_starts, 2)
+    
+    def test_falls_back_to_cli(self):
+        """ヘルパーを起動できない場合はCLIを直接実行するかテスト"""
+        controller = PersistentLunarController(FAKE_LUNAR, helper_command=('/nonexistent/sh',))
+        self.addCleanup(controller.close)
+        
+        self.assertTrue(controller.set_brightness(55))
+        self.assertEqual(self.read_calls(), ['set brightness 55'])
+    
+    def test_set_brightness_many_batched(self):
+        """複数ディスプレイを1回のバッチで並行して設定するかテスト"""
+        with patch.dict(os.environ, {'FAKE_LUNAR_DELAY': '0.3'}):
+            controller = PersistentLunarController(FAKE_LUNAR)
+            self.addCleanup(controller.close)
+            
+            start = time.monotonic()
+            results = controller.set_brightness_many({'DELL': 40, 'LG U2': 50.8, 'BenQ': 60})
+            elapsed = time.monotonic() - start
+        
+        self.assertEqual(results, {'DELL': True, 'LG U2': True, 'BenQ': True})
+        self.assertEqual(sorted(self.read_calls()), [
+            'displays BenQ brightness 60',
+            'displays DELL brightness 40',
+            'displays LG U2 brightness 50',
+        ])
+        # 合計時間は最も遅いディスプレイ程度（直列なら0.9秒以上）
+        self.assertLess(elapsed, 0.75)
+    
+    def test_set_brightness_many_batched_failure(self):
+        """バッチ内で失敗したディスプレイがFalseとして報告されるかテスト"""
+        with patch.dict(os.environ, {'FAKE_LUNAR_EXIT': '1'}):
+            controller = PersistentLunarController(FAKE_LUNAR)
+            self.addCleanup(controller.close)
+            
+            results = controller.set_brightness_many({'DELL': 40, 'LG': 50})
+        
+        self.assertEqual(results, {'DELL': False, 'LG': False})
+    
+    def test_cli_set_brightness_many_runs_concurrently(self):
+        """CLIバックエンドでも複数ディスプレイを並行して設定するかテスト"""
+        with patch.dict(os.environ, {'FAKE_LUNAR_DELAY': '0.3'}):
+            controller = LunarController(FAKE_LUNAR)
+            
+            start = time.monotonic()
+            results = controller.set_brightness_many({'DELL': 40, 'LG': 50, 'BenQ': 60})
+            elapsed = time.monotonic() - start
+        
+        self.assertTrue(all(results.values()))
+        self.assertEqual(len(self.read_calls()), 3)
+        self.assertLess(elapsed, 0.75)
+    
+    def test_create_display_controller(self):
+        """設定に応じたバックエンドが作成されるかテスト"""
+        self.assertIsInstance(create_display_controller('persistent'), PersistentLunarController)
+        controller = create_display_controller('cli')
+        self.assertIsInstance(controller, LunarController)
+        self.assertNotIsInstance(controller, PersistentLunarController)
+
+
 @patch('src.lunar.LunarController')
 def test_set_display_brightness(mock_controller_class):
     """set_display_brightness関数が正しく動作するかテスト"""
@@ -147,7 +309,7 @@ def test_set_display_brightness(mock_controller_class):
     result = set_display_brightness(75.5)
     
     # 検証
-    self.assertTrue(result)
+    assert result is True
     mock_instance.set_brightness.assert_called_once_with(75.5)
 
 
@@ -0,0 +1,86 @@
+"""
+応答カーブモジュールのテスト
+"""
+import unittest
+import numpy as np
+from src.config import BrightnessConfig
+from src.mapping import ResponseCurve
+
+def reference_linear(ambient_brightness, min_brightness, max_brightness):
+    """従来の線形マッピングの計算式"""
+    if min_brightness == max_brightness:
+        return float(min_brightness)
+    target = min_brightness + (ambient_brightness / 255) * (max_brightness - min_brightness)
+    return max(min_brightness, min(max_brightness, target))
+
+
+class TestResponseCurve(unittest.TestCase):
+    """ResponseCurveクラスのテスト"""
+    
+    def test_linear_reproduces_original_formula_exactly(self):
+        """線形カーブが従来の計算式と完全に同じ結果を返すかテスト"""
+        curve = ResponseCurve()
+        ambient = np.concatenate([np.linspace(-20, 280, 1201), [0, 127.5, 255]])
+        
+        for min_brightness, max_brightness in [(30, 70), (0, 100), (35, 80), (50, 50)]:
+            expected = [reference_linear(a, min_brightness, max_brightness) for a in ambient.tolist()]
+            scalar = [curve.map(a, min_brightness, max_brightness) for a in ambient.tolist()]
+            vector = curve.map_many(ambient, min_brightness, max_brightness).tolist()
+            
+            self.assertEqual(scalar, expected)
+            self.assertEqual(vector, expected)
+    
+    def test_gamma_curve(self):
+        """ガンマカーブがテーブルの補間で解析解に近い値を返すかテスト"""
+        curve = ResponseCurve('gamma', gamma=2.2)
+        ambient = np.linspace(0, 255, 1000)
+        
+        fractions = curve.fractions(ambient)
+        
+        np.testing.assert_allclose(fractions, (ambient / 255) ** 2.2, atol=1e-4)
+        self.assertEqual(curve.map(0, 20, 80), 20)
+        self.assertEqual(curve.map(255, 20, 80), 80)
+        # 暗い環境ほど低めになる
+        self.assertLess(curve.map(127.5, 0, 100), 50)
+    
+    def test_log_curve(self):
+        """対数カーブが単調増加で、暗い環境での変化が大きいかテスト"""
+        curve = ResponseCurve('log', log_factor=10)
+        
+        outputs = curve.map_many(np.arange(256), 0, 100)
+        
+        self.assertAlmostEqual(outputs[0], 0)
+        self.assertAlmostEqual(outputs[-1], 100)
+        self.assertTrue(np.all(np.diff(outputs) > 0))
+        self.assertGreater(curve.map(127.5, 0, 100), 50)
+    
+    def test_piecewise_curve(self):
+        """折れ線カーブが指定した点を通るかテスト"""
+        curve = ResponseCurve('piecewise', points=[(0, 0), (64, 0.5), (255, 1)])
+        
+        self.assertAlmostEqual(curve.map(64, 0, 100), 50)
+        self.assertAlmostEqual(curve.map(32, 20, 60), 30)
+        self.assertAlmostEqual(curve.map(159.5, 0, 100), 75)
+        # 範囲外の入力は端の値になる
+        self.assertAlmostEqual(curve.map(300, 0, 100), 100)
+    
+    def test_map_many_matches_scalar(self):
+        """map_manyが1件ずつの変換と同じ結果を返すかテスト"""
+        curve = ResponseCurve('gamma', gamma=0.6)
+        ambient = np.random.default_rng(0).uniform(-10, 265, 500)
+        
+        expected = [curve.map(a, 25, 90) for a in ambient.tolist()]
+        
+        np.testing.assert_allclose(curve.map_many(ambient, 25, 90), expected, rtol=0, atol=1e-12)
+    
+    def test_from_config(self):
+        """設定からカーブが作成されるかテスト"""
+        curve = ResponseCurve.from_config(BrightnessConfig(curve='gamma', curve_gamma=1.8))
+        
+        self.assertEqual(curve.curve, 'gamma')
+        self.assertEqual(curve.gamma, 1.8)
+        self.assertIsNotNone(curve.lut)
+
+
+if __name__ == '__main__':
+    unittest.main()
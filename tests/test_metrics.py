@@ -0,0 +1,142 @@
+"""
+メトリクスモジュールのテスト
+"""
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+import numpy as np
+from src.brightness_adjuster import BrightnessAdjuster
+from src.camera import AmbientLightSensor
+from src.config import BrightnessConfig
+from src.metrics import Histogram, MetricsRegistry, export_metrics, metrics
+
+
+class TestHistogram(unittest.TestCase):
+    """Histogramクラスのテスト"""
+
+    def test_cumulative_counts(self):
+        """区切りごとの累積件数を計算するかテスト"""
+        histogram = Histogram(buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value)
+
+        self.assertEqual(histogram.cumulative_counts(), [('0.1', 2), ('1', 3), ('+Inf', 4)])
+        self.assertEqual(histogram.count, 4)
+        self.assertAlmostEqual(histogram.sum, 2.65)
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """MetricsRegistryクラスのテスト"""
+
+    def test_disabled_registry_records_nothing(self):
+        """無効な場合は何も記録しないかテスト"""
+        registry = MetricsRegistry()
+
+        with registry.time('cycle'):
+            pass
+        registry.increment('frames_captured')
+
+        self.assertEqual(registry.histograms, {})
+        self.assertEqual(registry.counters, {})
+
+    def test_time_records_duration(self):
+        """with 文のブロックの所要時間を記録するかテスト"""
+        registry = MetricsRegistry(enabled=True)
+
+        with patch('src.metrics.time.perf_counter', side_effect=[1.0, 1.25]):
+            with registry.time('cycle'):
+                pass
+
+        self.assertEqual(registry.histograms['cycle'].count, 1)
+        self.assertAlmostEqual(registry.histograms['cycle'].sum, 0.25)
+
+    def test_prometheus_format(self):
+        """Prometheusのテキスト形式で出力するかテスト"""
+        registry = MetricsRegistry(enabled=True)
+        registry.observe('frame_read', 0.003)
+        registry.increment('failed_reads', 2)
+
+        text = registry.to_prometheus()
+
+        self.assertIn('# TYPE lunar_brightness_stage_duration_seconds histogram', text)
+        self.assertIn(
+            'lunar_brightness_stage_duration_seconds_bucket{stage="frame_read",le="0.0025"} 0', text
+        )
+        self.assertIn(
+            'lunar_brightness_stage_duration_seconds_bucket{stage="frame_read",le="+Inf"} 1', text
+        )
+        self.assertIn('lunar_brightness_stage_duration_seconds_count{stage="frame_read"} 1', text)
+        self.assertIn('lunar_brightness_failed_reads_total 2', text)
+
+    def test_write_json(self):
+        """拡張子が .json の場合はJSONで書き出し、一時ファイルを残さないかテスト"""
+        registry = MetricsRegistry(enabled=True)
+        registry.increment('backend_calls')
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'metrics.json')
+            registry.write(path)
+
+            with open(path, encoding='utf-8') as f:
+                snapshot = json.load(f)
+            self.assertEqual(os.listdir(temp_dir), ['metrics.json'])
+
+        self.assertEqual(snapshot['counters'], {'backend_calls': 1})
+
+    def test_export_failure_is_not_fatal(self):
+        """書き出しに失敗しても例外を送出しないかテスト"""
+        with patch.object(metrics, 'enabled', True), \
+                patch.object(metrics, 'write', side_effect=PermissionError("denied")):
+            self.assertFalse(export_metrics('/root/metrics.prom'))
+
+        self.assertFalse(export_metrics(''))
+
+
+class TestInstrumentation(unittest.TestCase):
+    """各処理段階の計測のテスト"""
+
+    def setUp(self):
+        """各テスト前の準備"""
+        metrics.reset()
+        metrics.enabled = True
+
+    def tearDown(self):
+        """各テスト後の後片付け"""
+        metrics.enabled = False
+        metrics.reset()
+
+    def test_frame_capture_counters(self):
+        """フレームの読み取りの成功・失敗を数えるかテスト"""
+        sensor = AmbientLightSensor()
+        sensor.camera = MagicMock()
+        sensor.camera.isOpened.return_value = True
+        sensor.camera.grab.return_value = True
+        sensor.camera.retrieve.side_effect = [
+            (True, np.zeros((4, 4, 3), dtype=np.uint8)), (False, None)
+        ]
+
+        sensor.capture_frame()
+        sensor.capture_frame()
+
+        self.assertEqual(metrics.counters, {'frames_captured': 1, 'failed_reads': 1})
+        self.assertEqual(metrics.histograms['frame_read'].count, 2)
+
+    def test_adjust_stages(self):
+        """調整サイクルの各段階の所要時間とCPU時間を記録するかテスト"""
+        actuator = MagicMock()
+        actuator.apply.return_value = True
+        adjuster = BrightnessAdjuster(BrightnessConfig(), actuator=actuator)
+
+        with patch.object(adjuster, 'measure', return_value=128.0):
+            adjuster.adjust()
+
+        self.assertEqual(
+            sorted(metrics.histograms), ['actuation', 'cycle', 'cycle_cpu', 'mapping', 'measure']
+        )
+        self.assertGreaterEqual(adjuster.last_report.cpu_time, 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+"""
+領域（ROI）と画素の重みのモジュールのテスト
+"""
+import unittest
+import numpy as np
+from src.roi import FrameRegions, clamp_region, parse_regions
+
+
+class TestRegions(unittest.TestCase):
+    """領域の設定値の解釈のテスト"""
+    
+    def test_parse_presets_and_lists(self):
+        """プリセットの名前と割合の一覧のどちらも解釈できるかテスト"""
+        self.assertEqual(parse_regions('top'), [(0.0, 0.0, 1.0, 0.25)])
+        self.assertEqual(len(parse_regions('corners')), 4)
+        self.assertEqual(parse_regions('full'), [])
+        self.assertEqual(parse_regions([[0, 0.5, 1, 0.5]]), [(0.0, 0.5, 1.0, 0.5)])
+    
+    def test_unknown_preset_uses_full_frame(self):
+        """不明なプリセットは警告してフレーム全体を使うかテスト"""
+        with self.assertLogs('lunar_brightness', level='WARNING'):
+            self.assertEqual(parse_regions('ceiling'), [])
+    
+    def test_clamp_region(self):
+        """領域がフレームの内側に収められ、面積のない領域は除かれるかテスト"""
+        self.assertEqual(clamp_region((-0.5, 0.5, 1.0, 1.0)), (0.0, 0.5, 0.5, 0.5))
+        self.assertIsNone(clamp_region((1.0, 0.0, 0.5, 0.5)))
+        self.assertIsNone(clamp_region((0.2, 0.2, 0.0, 0.5)))
+
+
+class TestFrameRegions(unittest.TestCase):
+    """FrameRegionsクラスのテスト"""
+    
+    def test_layout_converts_fractions_to_slices(self):
+        """割合が解像度に応じた画素の範囲と面積の割合に変換されるかテスト"""
+        regions = FrameRegions(parse_regions('corners'))
+        
+        layout = regions.layout(480, 640)
+        
+        self.assertEqual(layout[0][0], (slice(0, 96), slice(0, 128)))
+        self.assertEqual(layout[3][0], (slice(384, 480), slice(512, 640)))
+        self.assertEqual([share for _, share in layout], [0.25] * 4)
+    
+    def test_layout_and_weights_are_cached_per_resolution(self):
+        """領域と重みは解像度ごとに一度だけ計算されるかテスト"""
+        regions = FrameRegions(weight_map='center')
+        
+        self.assertIs(regions.layout(480, 640), regions.layout(480, 640))
+        self.assertIs(regions.weights(0, 480, 640, (480, 640)), regions.weights(0, 480, 640, (480, 640)))
+        self.assertIsNot(regions.layout(240, 320), regions.layout(480, 640))
+    
+    def test_center_weights_are_normalized(self):
+        """中央重視の重みは合計が1で、中央ほど大きいかテスト"""
+        weights = FrameRegions(weight_map='center').weights(0, 48, 64, (48, 64))
+        
+        self.assertEqual(weights.dtype, np.float32)
+        self.assertAlmostEqual(float(weights.sum()), 1.0, places=5)
+        self.assertGreater(weights[24, 32], weights[0, 0] * 5)
+    
+    def test_vignette_weights_compensate_falloff(self):
+        """周辺減光の補正で、cos^4則で暗くなった一様な面が元の明るさに戻るかテスト"""
+        height, width = 48, 64
+        regions = FrameRegions(weight_map='vignette', vignette_strength=0.6)
+        y, x = np.mgrid[0:height, 0:width] + 0.5
+        radius_sq = ((y - height / 2) ** 2 + (x - width / 2) ** 2) / ((height / 2) ** 2 + (width / 2) ** 2)
+        frame = 100 / (1 + 0.6 * radius_sq) ** 2
+        
+        weights = regions.weights(0, height, width, (height, width))
+        
+        self.assertAlmostEqual(float((frame * weights).sum()), 100.0, places=3)
+    
+    def test_uniform_regions_have_no_weights(self):
+        """重みを指定しない場合は重みを作らないかテスト"""
+        self.assertIsNone(FrameRegions(parse_regions('top')).weights(0, 480, 640, (120, 640)))
+
+
+if __name__ == '__main__':
+    unittest.main()
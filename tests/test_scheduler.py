@@ -0,0 +1,139 @@
+"""
+調整間隔のスケジューラーモジュールのテスト
+"""
+import math
+import unittest
+from src.config import BrightnessConfig
+from src.scheduler import AdaptiveScheduler, parse_quiet_hours, parse_time_of_day
+
+
+class FakeClock:
+    """経過時間とその日の時刻を手動で進める疑似時計"""
+
+    def __init__(self, seconds_of_day=12 * 3600):
+        self.now = 0.0
+        self.time_of_day = seconds_of_day
+
+    def monotonic(self):
+        return self.now
+
+    def seconds_of_day(self):
+        return self.time_of_day
+
+    def advance(self, seconds):
+        self.now += seconds
+        self.time_of_day = (self.time_of_day + seconds) % (24 * 3600)
+
+
+def run(scheduler, clock, readings):
+    """測定値を順に与え、スケジューラーが決めた間隔だけ時計を進めて、間隔の一覧を返す"""
+    intervals = []
+    for ambient in readings:
+        interval = scheduler.next_interval(ambient)
+        intervals.append(interval)
+        clock.advance(interval)
+    return intervals
+
+
+class TestAdaptiveScheduler(unittest.TestCase):
+    """AdaptiveSchedulerクラスのテスト"""
+
+    def setUp(self):
+        """各テスト前の準備"""
+        self.clock = FakeClock()
+        self.scheduler = AdaptiveScheduler(
+            60, adaptive=True, min_interval=5, max_interval=300, backoff=2,
+            change_threshold=5, clock=self.clock
+        )
+
+    def test_backs_off_exponentially_when_stable(self):
+        """安定している間は、間隔を倍々に最大間隔まで延ばすかテスト"""
+        intervals = run(self.scheduler, self.clock, [100.0] * 9)
+
+        self.assertEqual(intervals, [5, 10, 20, 40, 80, 160, 300, 300, 300])
+
+    def test_shortens_interval_when_changing(self):
+        """速く変化している場合は、次の変化が閾値程度になる間隔に縮めるかテスト"""
+        run(self.scheduler, self.clock, [100.0] * 6)
+        self.assertEqual(self.scheduler.interval, 160)
+
+        # 160秒で80変化（0.5/秒）した場合は、5変化するまでの10秒にする
+        self.assertEqual(self.scheduler.next_interval(180.0), 10)
+        self.clock.advance(10)
+        # さらに速い変化（10秒で100）では最小間隔に制限する
+        self.assertEqual(self.scheduler.next_interval(80.0), 5)
+
+    def test_failed_measurement_keeps_interval(self):
+        """測定に失敗した場合は間隔を変えず、次の測定値と比べる基準も変えないかテスト"""
+        run(self.scheduler, self.clock, [100.0] * 3)
+
+        self.assertEqual(self.scheduler.next_interval(None), 20)
+        self.assertEqual(self.scheduler.next_interval(math.nan), 20)
+
+    def test_decisions_are_deterministic(self):
+        """同じ時刻と測定値の列からは、同じ間隔の列が得られるかテスト"""
+        readings = [100, 101, 130, 180, 181, 181, 150, 150, 150]
+        other_clock = FakeClock()
+        other = AdaptiveScheduler(
+            60, adaptive=True, min_interval=5, max_interval=300, backoff=2,
+            change_threshold=5, clock=other_clock
+        )
+
+        self.assertEqual(run(self.scheduler, self.clock, readings), run(other, other_clock, readings))
+
+    def test_fixed_interval_when_not_adaptive(self):
+        """可変にしない場合は、常に固定の間隔を返すかテスト"""
+        scheduler = AdaptiveScheduler(60, clock=self.clock)
+
+        self.assertEqual(run(scheduler, self.clock, [10.0, 200.0, 10.0]), [60, 60, 60])
+
+    def test_quiet_hours(self):
+        """静音時間帯の間は、その終了までの秒数を返すかテスト（日付をまたぐ時間帯を含む）"""
+        scheduler = AdaptiveScheduler(
+            60, quiet_hours=parse_quiet_hours([["23:00", "07:00"], ["12:30", "13:00"]]), clock=self.clock
+        )
+        cases = [
+            (23 * 3600, 8 * 3600),
+            (2 * 3600, 5 * 3600),
+            (7 * 3600, 0),
+            (12 * 3600 + 45 * 60, 15 * 60),
+            (22 * 3600 + 59 * 60, 0),
+        ]
+        for time_of_day, expected in cases:
+            self.clock.time_of_day = time_of_day
+            self.assertEqual(scheduler.quiet_remaining(), expected)
+
+    def test_configure_from_config(self):
+        """設定の値が反映され、可変への切り替え時は最小間隔から始めるかテスト"""
+        config = BrightnessConfig(adaptive_interval=True, min_interval=2, max_interval=30,
+                                  quiet_hours=[(0, 3600)]).validate()
+
+        scheduler = AdaptiveScheduler.from_config(config, 60, clock=self.clock)
+
+        self.assertTrue(scheduler.adaptive)
+        self.assertEqual(scheduler.interval, 2)
+        self.assertEqual(scheduler.quiet_hours, [(0, 3600)])
+
+
+class TestQuietHours(unittest.TestCase):
+    """静音時間帯の設定値の解釈のテスト"""
+
+    def test_parse_time_of_day(self):
+        """時刻が1日の始まりからの秒数に変換されるかテスト"""
+        self.assertEqual(parse_time_of_day("07:30"), 7 * 3600 + 30 * 60)
+        self.assertEqual(parse_time_of_day("23:59:30"), 23 * 3600 + 59 * 60 + 30)
+        self.assertEqual(parse_time_of_day("24:00"), 24 * 3600)
+        for value in ("7", "25:00", "12:60", "noon"):
+            with self.assertRaises(ValueError):
+                parse_time_of_day(value)
+
+    def test_invalid_periods_are_ignored(self):
+        """解釈できない時間帯と長さのない時間帯は除かれるかテスト"""
+        with self.assertLogs('lunar_brightness', level='WARNING'):
+            periods = parse_quiet_hours([["22:00", "24:00"], ["25:00", "06:00"], ["08:00", "08:00"], "x"])
+
+        self.assertEqual(periods, [(22 * 3600, 0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,225 @@
+"""
+環境光の配信サーバーとクライアントのモジュールのテスト
+"""
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+from src.brightness_adjuster import BrightnessAdjuster
+from src.config import BrightnessConfig
+from src.service import AmbientLightService, RemoteSensor
+
+
+class FakeSensor:
+    """呼び出されるたびに次の値を返す疑似センサー（値が尽きたら最後の値を返し続ける）"""
+
+    def __init__(self, values, delay=0.01):
+        self.values = list(values)
+        self.delay = delay
+        self.calls = 0
+        self.closed = 0
+        self.last_sample_count = 0
+        self.last_measure_duration = None
+
+    def measure_ambient_light(self, duration=1.0, sample_interval=0.1):
+        time.sleep(self.delay)
+        value = self.values[min(self.calls, len(self.values) - 1)]
+        self.calls += 1
+        self.last_sample_count = 5
+        self.last_measure_duration = self.delay
+        return value
+
+    def close(self):
+        self.closed += 1
+
+
+class TestAmbientLightService(unittest.TestCase):
+    """AmbientLightServiceとRemoteSensorのテスト"""
+
+    def setUp(self):
+        """各テスト前の準備（一時ディレクトリにソケットを作る）"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.temp_dir.name, 'ambient.sock')
+        self.services = []
+
+    def tearDown(self):
+        """各テスト後の後片付け"""
+        for service in self.services:
+            service.stop()
+        self.temp_dir.cleanup()
+
+    def start_service(self, sensor, **kwargs):
+        service = AmbientLightService(sensor, self.socket_path, **kwargs)
+        service.start()
+        self.services.append(service)
+        return service
+
+    def test_get_returns_latest_reading(self):
+        """get で最新の測定値・時刻・フレーム数が返されるかテスト"""
+        self.start_service(FakeSensor([100.0, 120.0, 140.0]))
+
+        with RemoteSensor(self.socket_path, timeout=2.0) as sensor:
+            first = sensor.measure_ambient_light()
+            time.sleep(0.1)
+            second = sensor.measure_ambient_light()
+
+            self.assertIn(first, (100.0, 120.0, 140.0))
+            self.assertEqual(second, 140.0)
+            self.assertEqual(sensor.last_sample_count, 5)
+            self.assertGreater(sensor.last_reading['sequence'], 1)
+            self.assertAlmostEqual(sensor.last_reading['timestamp'], time.time(), delta=5)
+
+    def test_subscribe_streams_each_new_reading(self):
+        """subscribe で新しい測定値が順に送られ続けるかテスト"""
+        self.start_service(FakeSensor([float(value) for value in range(100)]))
+
+        with RemoteSensor(self.socket_path, timeout=2.0) as sensor:
+            readings = []
+            for reading in sensor.subscribe():
+                readings.append(reading)
+                if len(readings) == 5:
+                    break
+
+        sequences = [reading['sequence'] for reading in readings]
+        self.assertEqual(sequences, list(range(sequences[0], sequences[0] + 5)))
+
+    def test_many_concurrent_clients(self):
+        """複数のクライアントが同時に測定値を受け取れるかテスト"""
+        service = self.start_service(FakeSensor([90.0]))
+        results = []
+
+        def client():
+            with RemoteSensor(self.socket_path, timeout=2.0) as sensor:
+                results.append([sensor.measure_ambient_light() for _ in range(20)])
+
+        threads = [threading.Thread(target=client) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [[90.0] * 20] * 8)
+        self.assertEqual(service.requests, 160)
+
+    def test_raw_protocol_and_unknown_command(self):
+        """JSON Linesのリクエストに1行ずつ応答し、不明なコマンドにはエラーを返すかテスト"""
+        self.start_service(FakeSensor([80.0]))
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.settimeout(2.0)
+            connection.connect(self.socket_path)
+            reader = connection.makefile('rb')
+            connection.sendall(b'{"command": "get"}\n{"command": "reboot"}\n')
+
+            self.assertEqual(json.loads(reader.readline())['ambient'], 80.0)
+            self.assertIn('error', json.loads(reader.readline()))
+            reader.close()
+
+    def test_failed_measurement_releases_camera(self):
+        """測定に失敗した場合はカメラを解放し、測定値を配信しないかテスト"""
+        sensor = FakeSensor([None])
+        service = self.start_service(sensor)
+        time.sleep(0.1)
+
+        self.assertGreaterEqual(sensor.closed, 1)
+        self.assertIsNone(service.latest)
+
+    def test_failed_measurement_discards_previous_reading(self):
+        """測定に失敗し続ける場合は、最後の測定値ではなくエラーを返すかテスト"""
+        service = self.start_service(FakeSensor([100.0, None]))
+        time.sleep(0.1)
+
+        self.assertIsNone(service.latest)
+        self.assertGreaterEqual(service.failures, 1)
+        with RemoteSensor(self.socket_path, timeout=2.0) as sensor, \
+                self.assertLogs('lunar_brightness', level='ERROR') as logs:
+            self.assertIsNone(sensor.measure_ambient_light())
+        self.assertIn('測定値がありません', logs.output[0])
+
+    def test_remote_sensor_rejects_stale_reading(self):
+        """max_age とサーバーの測定の開始間隔より古い測定値を使わないかテスト"""
+        service = self.start_service(FakeSensor([None]))
+        time.sleep(0.1)
+        service.publish(100.0, 5)
+        now = time.time()
+
+        with RemoteSensor(self.socket_path, timeout=2.0, max_age=3.0) as sensor:
+            with patch('src.service.time.time', return_value=now + 2.0):
+                self.assertEqual(sensor.measure_ambient_light(), 100.0)
+            with patch('src.service.time.time', return_value=now + 10.0), \
+                    self.assertLogs('lunar_brightness', level='ERROR') as logs:
+                self.assertIsNone(sensor.measure_ambient_light())
+        self.assertIn('古い', logs.output[0])
+
+    def test_stop_removes_socket_and_releases_sensor(self):
+        """停止時にソケットのファイルを削除し、センサーを解放するかテスト"""
+        sensor = FakeSensor([100.0])
+        service = self.start_service(sensor)
+        self.services.remove(service)
+
+        service.stop()
+
+        self.assertFalse(os.path.exists(self.socket_path))
+        self.assertEqual(sensor.closed, 1)
+
+    def test_socket_is_private_from_creation(self):
+        """ソケットのファイルが作成された時点から、所有者のみがアクセスできるかテスト"""
+        modes = []
+        chmod = os.chmod
+
+        def record_mode(path, mode):
+            # bind() の直後（権限を変更する前）の状態を記録する
+            modes.append(os.stat(path).st_mode & 0o777)
+            chmod(path, mode)
+
+        previous_umask = os.umask(0)
+        try:
+            with patch('src.service.os.chmod', side_effect=record_mode):
+                self.start_service(FakeSensor([100.0]))
+        finally:
+            restored_umask = os.umask(previous_umask)
+
+        # 作成時点でグループ・その他のユーザーの権限がない
+        self.assertEqual(len(modes), 1)
+        self.assertEqual(modes[0] & 0o077, 0)
+        self.assertEqual(os.stat(self.socket_path).st_mode & 0o777, 0o600)
+        # プロセスの umask は元に戻す
+        self.assertEqual(restored_umask, 0)
+
+    def test_stale_socket_file_is_replaced(self):
+        """応答のない古いソケットのファイルは置き換え、実行中のサーバーとは競合しないかテスト"""
+        with open(self.socket_path, 'w'):
+            pass
+        self.start_service(FakeSensor([100.0]))
+
+        with self.assertRaises(OSError):
+            AmbientLightService(FakeSensor([100.0]), self.socket_path).start()
+
+    def test_remote_sensor_without_server(self):
+        """サーバーが実行されていない場合は、エラーを記録してNoneを返すかテスト"""
+        sensor = RemoteSensor(self.socket_path, timeout=0.5)
+
+        with self.assertLogs('lunar_brightness', level='ERROR'):
+            self.assertIsNone(sensor.measure_ambient_light())
+
+    def test_adjuster_uses_remote_sensor(self):
+        """BrightnessAdjusterがサーバーの測定値で輝度を調整するかテスト"""
+        self.start_service(FakeSensor([255.0]))
+        config = BrightnessConfig(min_brightness=30, max_brightness=70, sensor_socket=self.socket_path)
+        actuator = MagicMock()
+        actuator.last_applied = None
+        adjuster = BrightnessAdjuster(config, sensor=RemoteSensor(self.socket_path), actuator=actuator)
+
+        self.assertTrue(adjuster.adjust())
+
+        actuator.apply.assert_called_once_with(70.0)
+        self.assertEqual(adjuster.last_report.samples, 5)
+        adjuster.sensor.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+"""
+フレームの取得元モジュールのテスト
+"""
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import cv2
+import numpy as np
+from src.camera import AmbientLightSensor, sensor_settings
+from src.config import BrightnessConfig
+from src.sources import (
+    CameraSource, ImageDirectorySource, SyntheticSource, VideoFileSource, create_frame_source
+)
+
+
+def solid_frame(level, size=(8, 6)):
+    """一様な明るさのフレーム"""
+    width, height = size
+    return np.full((height, width, 3), level, dtype=np.uint8)
+
+
+class TestSyntheticSource(unittest.TestCase):
+    """SyntheticSourceクラスのテスト"""
+
+    def test_default_frames_cycle_through_levels(self):
+        """フレームを省略した場合は levels の明るさを順に繰り返すかテスト"""
+        source = SyntheticSource(levels=(10, 20), count=3)
+        self.assertTrue(source.open())
+
+        levels = []
+        while source.grab():
+            ok, frame = source.retrieve()
+            self.assertTrue(ok)
+            levels.append(int(frame[0, 0, 0]))
+
+        self.assertEqual(levels, [10, 20, 10])
+
+    def test_reopen_restarts_generator(self):
+        """開き直すと最初のフレームから返すかテスト"""
+        source = SyntheticSource(frames=[solid_frame(1), solid_frame(2)])
+        source.open()
+        source.grab()
+        source.grab()
+        self.assertFalse(source.grab())
+
+        source.release()
+        source.open()
+        source.grab()
+        self.assertEqual(source.retrieve()[1][0, 0, 0], 1)
+
+
+class TestImageDirectorySource(unittest.TestCase):
+    """ImageDirectorySourceクラスのテスト"""
+
+    def setUp(self):
+        """各テスト前の準備（画像ファイルを作成）"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        for name, level in (('b.png', 20), ('a.png', 10), ('c.png', 30)):
+            cv2.imwrite(os.path.join(self.temp_dir.name, name), solid_frame(level))
+        with open(os.path.join(self.temp_dir.name, 'notes.txt'), 'w') as f:
+            f.write('画像以外のファイル')
+
+    def tearDown(self):
+        """各テスト後の後片付け"""
+        self.temp_dir.cleanup()
+
+    def read_levels(self, source, limit=10):
+        levels = []
+        while len(levels) < limit and source.grab():
+            levels.append(int(source.retrieve()[1][0, 0, 0]))
+        return levels
+
+    def test_reads_images_in_name_order(self):
+        """画像ファイルのみをファイル名順に返し、最後で終わるかテスト"""
+        source = ImageDirectorySource(self.temp_dir.name)
+
+        self.assertTrue(source.open())
+        self.assertEqual(self.read_levels(source), [10, 20, 30])
+
+    def test_loop(self):
+        """loop=True の場合は最初の画像に戻るかテスト"""
+        source = ImageDirectorySource(self.temp_dir.name, loop=True)
+        source.open()
+
+        self.assertEqual(self.read_levels(source, limit=4), [10, 20, 30, 10])
+
+    def test_empty_directory_fails_to_open(self):
+        """画像がない場合は開けないかテスト"""
+        with tempfile.TemporaryDirectory() as empty_dir:
+            self.assertFalse(ImageDirectorySource(empty_dir).open())
+
+
+class TestCreateFrameSource(unittest.TestCase):
+    """create_frame_source関数のテスト"""
+
+    def test_specs(self):
+        """設定値に応じた取得元を作成するかテスト"""
+        self.assertEqual(create_frame_source('', camera_index=2).camera_index, 2)
+        self.assertEqual(create_frame_source('camera:1').camera_index, 1)
+        self.assertIsInstance(create_frame_source('synthetic'), SyntheticSource)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.assertIsInstance(create_frame_source(temp_dir), ImageDirectorySource)
+        self.assertIsInstance(create_frame_source('recording.mp4'), VideoFileSource)
+
+    def test_live_flag(self):
+        """カメラのみが実時間の取得元として扱われるかテスト"""
+        self.assertTrue(CameraSource().live)
+        self.assertFalse(VideoFileSource('recording.mp4').live)
+        self.assertFalse(SyntheticSource().live)
+
+
+class TestSensorWithFrameSource(unittest.TestCase):
+    """AmbientLightSensorでファイルなどの取得元を使う場合のテスト"""
+
+    def test_measure_replays_without_waiting(self):
+        """待機せずに、実時間の測定と同じ間隔のフレームを読み取るかテスト"""
+        # 30fpsで、フレームごとに明るさが 0, 1, 2, ... と変わる取得元
+        source = SyntheticSource(frames=(solid_frame(level) for level in range(30)), fps=30)
+        sensor = AmbientLightSensor(source=source)
+
+        with patch('time.sleep') as mock_sleep:
+            brightness = sensor.measure_ambient_light(duration=1.0, sample_interval=0.1)
+
+        mock_sleep.assert_not_called()
+        # 0.1秒（3フレーム）ごとに10サンプル: 2, 5, 8, ..., 29 の平均
+        self.assertAlmostEqual(brightness, 15.5)
+        self.assertIsNone(sensor.last_warmup_duration)
+
+    def test_measure_stops_at_end_of_source(self):
+        """取得元の終わりに達した場合は、それまでのフレームで測定するかテスト"""
+        source = SyntheticSource(levels=(100,), count=4, fps=30)
+        sensor = AmbientLightSensor(source=source)
+
+        self.assertEqual(sensor.measure_ambient_light(duration=1.0, sample_interval=0), 100.0)
+        self.assertEqual(source.frames_read, 4)
+
+    def test_frame_source_from_config(self):
+        """設定の frame_source で取得元を選べるかテスト"""
+        config = BrightnessConfig(frame_source='synthetic')
+
+        with AmbientLightSensor(**sensor_settings(config)) as sensor:
+            self.assertIsInstance(sensor.camera, SyntheticSource)
+            # デフォルトの合成フレーム（40, 80, 120, 160）を1フレームごとに読み取る
+            brightness = sensor.measure_ambient_light(duration=4 / 30, sample_interval=0)
+
+        self.assertAlmostEqual(brightness, 100.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+起動時間（遅延インポート・ログの遅延セットアップ）のテスト
+"""
+import os
+import subprocess
+import sys
+import unittest
+from typing import Dict, Tuple
+from unittest.mock import patch
+from src.lazy import LazyModule
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENTRY_POINT = os.path.join(PROJECT_ROOT, 'adjust_brightness')
+
+# `adjust_brightness --help` がこのパッケージのモジュールの読み込みに使ってよい時間（ミリ秒）
+# （OpenCVとnumpyを読み込んでいた頃は150ミリ秒以上かかっていた）
+IMPORT_TIME_BUDGET_MS = 120
+# 起動時に読み込んではいけない重いモジュール
+HEAVY_MODULES = ('cv2', 'numpy', 'asyncio', 'concurrent.futures', 'logging.handlers')
+
+def run_importtime(*args) -> Dict[str, Tuple[int, int]]:
+    """
+    python -X importtime でエントリーポイントを実行し、読み込まれたモジュールを返す
+
+    Returns:
+        Dict[str, Tuple[int, int]]: モジュール名ごとの (ネストの深さ, 累積読み込み時間（マイクロ秒）)
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', ENTRY_POINT, *args],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = (depth, int(cumulative))
+    return modules
+
+
+class TestStartupTime(unittest.TestCase):
+    """CLIのエントリーポイントの起動時間のテスト"""
+
+    def test_help_does_not_import_heavy_modules(self):
+        """--help で OpenCV などの重いモジュールを読み込まないかテスト"""
+        modules = run_importtime('--help')
+
+        self.assertIn('src.brightness_adjuster', modules)
+        for name in HEAVY_MODULES:
+            self.assertNotIn(name, modules)
+
+    def test_import_time_budget(self):
+        """パッケージの読み込み時間が予算内に収まるかテスト"""
+        # 実行環境の揺らぎを避けるため、3回のうち最も速い結果で判定する
+        elapsed_ms = min(
+            sum(
+                # 最上位で読み込まれたもののみ数える（子モジュールは累積時間に含まれる）
+                cumulative for name, (depth, cumulative) in run_importtime('--help').items()
+                if depth == 0 and (name == 'src' or name.startswith('src.'))
+            ) / 1000
+            for _ in range(3)
+        )
+
+        self.assertLess(elapsed_ms, IMPORT_TIME_BUDGET_MS)
+
+    def test_logger_setup_is_deferred(self):
+        """インポートしただけではログファイルを開かず、--debug のレベルが反映されるかテスト"""
+        script = (
+            "import logging\n"
+            "from src.logger import logger, setup_logger\n"
+            "print(any(isinstance(h, logging.FileHandler) for h in logger.handlers))\n"
+            "setup_logger(level='DEBUG')\n"
+            "print(logger.level == logging.DEBUG)\n"
+        )
+        result = subprocess.run(
+            [sys.executable, '-c', script],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        )
+
+        self.assertEqual(result.stdout.split(), ['False', 'True'])
+
+
+class TestLazyModule(unittest.TestCase):
+    """LazyModuleクラスのテスト"""
+
+    def test_loads_on_first_attribute_access(self):
+        """属性に最初にアクセスした時点でモジュールを読み込むかテスト"""
+        module = LazyModule('json')
+        self.assertFalse(module.loaded)
+
+        self.assertEqual(module.dumps([1]), '[1]')
+        self.assertTrue(module.loaded)
+
+    def test_patch_applies_to_real_module(self):
+        """mock.patch による置き換えが読み込んだモジュールに反映され、元に戻るかテスト"""
+        module = LazyModule('json')
+        original = module.load().dumps
+
+        with patch.object(module, 'dumps', return_value='patched'):
+            self.assertEqual(module.dumps([1]), 'patched')
+
+        self.assertIs(module.load().dumps, original)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+"""
+トレースモジュールのテスト
+"""
+import math
+import os
+import tempfile
+import unittest
+import numpy as np
+from src.trace import (
+    HEADER_SIZE, TraceRecorder, read_trace, read_traces, trace_dtype, trace_files
+)
+
+
+class TestTraceRecorder(unittest.TestCase):
+    """TraceRecorderクラスのテスト"""
+
+    def setUp(self):
+        """各テスト前の準備"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'trace.bin')
+
+    def tearDown(self):
+        """各テスト後の後片付け"""
+        self.temp_dir.cleanup()
+
+    def make_recorder(self, records_per_file=100, backup_count=3):
+        return TraceRecorder(
+            self.path,
+            max_bytes=HEADER_SIZE + records_per_file * trace_dtype().itemsize,
+            backup_count=backup_count
+        )
+
+    def test_record_and_read(self):
+        """記録したレコードをフィールドごとに読み取れるかテスト"""
+        recorder = self.make_recorder()
+        recorder.record(1000.0, 120.5, 10, 62.25, 62.0, {'measure': 1.0, 'cycle': 1.25}, override=70.0)
+        recorder.record(1001.0, 80.0)
+
+        trace = read_trace(self.path)
+        recorder.close()
+
+        self.assertEqual(len(trace), 2)
+        self.assertEqual(list(trace['timestamp']), [1000.0, 1001.0])
+        self.assertEqual(trace['ambient'][0], np.float32(120.5))
+        self.assertEqual(trace['samples'][0], 10)
+        self.assertEqual(trace['target'][0], np.float16(62.25))
+        self.assertEqual(trace['measure_ms'][0], np.float16(1000.0))
+        self.assertEqual(trace['override'][0], np.float16(70.0))
+        # 記録しなかった値は NaN
+        self.assertTrue(math.isnan(trace['mapping_ms'][0]))
+        self.assertTrue(math.isnan(trace['applied'][1]))
+        self.assertTrue(math.isnan(trace['override'][1]))
+
+    def test_file_is_preallocated(self):
+        """ファイルを最大サイズまで確保し、読み取りはコピーせずに参照するかテスト"""
+        recorder = self.make_recorder(records_per_file=100)
+        recorder.record(1000.0, 100.0)
+        recorder.close()
+
+        self.assertEqual(os.path.getsize(self.path), HEADER_SIZE + 100 * trace_dtype().itemsize)
+        trace = read_trace(self.path)
+        self.assertIsInstance(trace, np.memmap)
+        self.assertFalse(trace.flags.writeable)
+
+    def test_resume_existing_file(self):
+        """既存のファイルには続きから記録するかテスト"""
+        recorder = self.make_recorder()
+        recorder.record(1.0, 10.0)
+        recorder.close()
+
+        recorder = self.make_recorder()
+        recorder.record(2.0, 20.0)
+        recorder.close()
+
+        self.assertEqual(list(read_trace(self.path)['ambient']), [10.0, 20.0])
+
+    def test_rollover(self):
+        """ファイルが一杯になると古いファイルに回し、古いものから削除するかテスト"""
+        recorder = self.make_recorder(records_per_file=4, backup_count=2)
+        for index in range(14):
+            recorder.record(float(index), float(index))
+        recorder.close()
+
+        self.assertEqual(
+            trace_files(self.path), [self.path + '.2', self.path + '.1', self.path]
+        )
+        self.assertEqual(list(read_traces(self.path)['timestamp']), list(range(4, 14)))
+
+    def test_refuses_non_trace_file(self):
+        """トレースファイルではない既存のファイルを上書きしないかテスト"""
+        with open(self.path, 'w') as f:
+            f.write('大切なファイル')
+
+        with self.assertRaises(ValueError):
+            self.make_recorder().record(1.0, 10.0)
+        with self.assertRaises(ValueError):
+            read_trace(self.path)
+
+        with open(self.path) as f:
+            self.assertEqual(f.read(), '大切なファイル')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+"""
+トランジションモジュールのテスト
+"""
+import math
+import threading
+import unittest
+from unittest.mock import MagicMock
+from src.transition import BrightnessTransition
+
+class FakeController:
+    """書き込まれた輝度を記録する疑似コントローラー"""
+
+    def __init__(self):
+        self.calls = []
+        self.closed = False
+
+    def set_brightness(self, brightness_level, display=None):
+        self.calls.append((display, brightness_level))
+        return True
+
+    def set_brightness_many(self, levels):
+        return {display: self.set_brightness(level, display) for display, level in levels.items()}
+
+    def close(self):
+        self.closed = True
+
+
+class TestBrightnessTransition(unittest.TestCase):
+    """BrightnessTransitionクラスのテスト"""
+
+    def setUp(self):
+        """各テスト前の準備"""
+        self.controller = FakeController()
+        self.transition = BrightnessTransition(self.controller, step=5, rate=100)
+
+    def levels(self):
+        """書き込まれた輝度の一覧"""
+        return [level for _, level in self.controller.calls]
+
+    def run_until_idle(self):
+        """目標値に到達するまでステップを進める"""
+        steps = 0
+        while self.transition.step_once():
+            steps += 1
+            self.assertLess(steps, 100)
+
+    def test_first_target_is_applied_directly(self):
+        """現在値が不明な場合は目標値を直接書き込むかテスト"""
+        self.transition.set_brightness(40)
+        self.run_until_idle()
+
+        self.assertEqual(self.levels(), [40])
+
+    def test_ramps_in_bounded_steps(self):
+        """目標値まで一定量ずつ変化し、書き込み回数が上限内に収まるかテスト"""
+        self.transition.set_brightness(40)
+        self.run_until_idle()
+        self.controller.calls.clear()
+
+        self.transition.set_brightness(62.9)
+        self.run_until_idle()
+
+        self.assertEqual(self.levels(), [45, 50, 55, 60, 62])
+        self.assertLessEqual(len(self.levels()), math.ceil((62 - 40) / 5))
+
+    def test_retargets_mid_ramp(self):
+        """変化の途中で目標値が変わった場合、古い目標値へのステップを書き込まないかテスト"""
+        self.transition.set_brightness(40)
+        self.run_until_idle()
+        self.controller.calls.clear()
+
+        self.transition.set_brightness(80)
+        self.transition.step_once()
+        self.transition.step_once()
+        # 50 の時点で 30 へ向かい直す
+        self.transition.set_brightness(30)
+        self.run_until_idle()
+
+        self.assertEqual(self.levels(), [45, 50, 45, 40, 35, 30])
+        # 向かい直した後の書き込み回数は新しい目標値までの距離で決まる
+        self.assertEqual(len(self.levels()) - 2, math.ceil((50 - 30) / 5))
+
+    def test_displays_ramp_independently(self):
+        """ディスプレイごとに独立して変化するかテスト"""
+        self.transition.set_brightness_many({'DELL': 40, 'LG': 60})
+        self.run_until_idle()
+        self.controller.calls.clear()
+
+        self.transition.set_brightness_many({'DELL': 50, 'LG': 62})
+        self.run_until_idle()
+
+        self.assertEqual(
+            self.controller.calls, [('DELL', 45), ('LG', 62), ('DELL', 50)]
+        )
+
+    def test_failed_write_aborts_transition(self):
+        """書き込みに失敗した場合は変化を中止するかテスト"""
+        controller = MagicMock()
+        controller.set_brightness.return_value = False
+        transition = BrightnessTransition(controller, step=5)
+
+        transition.set_brightness(40)
+        self.assertEqual(transition.step_once(), 1)
+        self.assertEqual(transition.step_once(), 0)
+        self.assertTrue(transition.is_idle())
+
+    def test_thread_is_non_blocking(self):
+        """set_brightnessは即座に返り、スレッドが目標値まで書き込むかテスト"""
+        gate = threading.Event()
+        original = self.controller.set_brightness
+
+        def slow_set_brightness(brightness_level, display=None):
+            gate.wait(timeout=5)
+            return original(brightness_level, display)
+        self.controller.set_brightness = slow_set_brightness
+
+        self.transition.start()
+        self.addCleanup(self.transition.close)
+
+        # 書き込みがブロックされていても目標値の更新は即座に返る
+        self.assertTrue(self.transition.set_brightness(40))
+        self.assertTrue(self.transition.set_brightness(50))
+        self.assertFalse(self.transition.is_idle())
+
+        gate.set()
+        self.assertTrue(self.transition.wait_idle(timeout=5))
+        self.assertEqual(self.levels()[-1], 50)
+
+    def test_close_stops_thread_and_controller(self):
+        """closeでスレッドを停止し、コントローラーを閉じるかテスト"""
+        self.transition.start()
+        self.transition.close()
+
+        self.assertTrue(self.controller.closed)
+        self.assertIsNone(self.transition._thread)
+
+
+if __name__ == '__main__':
+    unittest.main()